@@ -36,20 +36,41 @@ command line. The processing of a command works as follows:
 """
 
 from collections import defaultdict
-from weakref import WeakValueDictionary
 from copy import copy
 from traceback import format_exc
 from twisted.internet.defer import inlineCallbacks, returnValue
 from django.conf import settings
 from evennia.comms.channelhandler import CHANNELHANDLER
 from evennia.utils import logger, utils
-from evennia.utils.utils import string_suggestions, to_unicode
+from evennia.utils.dbserialize import flush_dirty
+from evennia.utils.utils import string_suggestions, to_unicode, LRUCache
 
 from django.utils.translation import ugettext as _
 
 __all__ = ("cmdhandler",)
 _GA = object.__getattribute__
-_CMDSET_MERGE_CACHE = WeakValueDictionary()
+
+# Cache of merged cmdsets, keyed on the version stamps of the merged
+# cmdsets. The index maps each version to the merges it takes part in,
+# so a changed cmdset can have its merges invalidated directly.
+_CMDSET_MERGE_INDEX = defaultdict(set)
+
+
+def _unindex_merge(mergehash, cmdset=None):
+    """
+    Helper to remove a cached merge from the version index. This
+    is also called by the cache when it evicts a merge.
+
+    """
+    for version in mergehash:
+        mergehashes = _CMDSET_MERGE_INDEX.get(version)
+        if mergehashes is not None:
+            mergehashes.discard(mergehash)
+            if not mergehashes:
+                del _CMDSET_MERGE_INDEX[version]
+
+_CMDSET_MERGE_CACHE = LRUCache(maxsize=settings.CMDSET_MERGE_CACHE_SIZE,
+                               on_evict=_unindex_merge)
 
 # tracks recursive calls by each caller
 # to avoid infinite loops (commands calling themselves)
@@ -130,6 +151,42 @@ class ExecSystemCommand(Exception):
 class ErrorReported(Exception):
     "Re-raised when a subsructure already reported the error"
 
+# Merge cache handling
+
+def invalidate_merge_cache(cmdset):
+    """
+    Remove all cached merges the given cmdset took part in. This is
+    called by the `CmdSetHandler` whenever its current cmdset changes.
+
+    Args:
+        cmdset (CmdSet): The cmdset that was changed or discarded.
+
+    """
+    for mergehash in _CMDSET_MERGE_INDEX.pop(cmdset._version, ()):
+        if _CMDSET_MERGE_CACHE.pop(mergehash) is not None:
+            _unindex_merge(mergehash)
+
+
+def merge_cache_stats():
+    """
+    Get statistics for the cache of merged cmdsets.
+
+    Returns:
+        stats (dict): The current `size` and `maxsize` of the cache
+            along with its number of `hits`, `misses` and `evictions`.
+
+    """
+    return _CMDSET_MERGE_CACHE.stats()
+
+
+def flush_merge_cache():
+    """
+    Empty the cache of merged cmdsets.
+
+    """
+    _CMDSET_MERGE_CACHE.clear()
+    _CMDSET_MERGE_INDEX.clear()
+
 # Helper function
 
 @inlineCallbacks
@@ -285,11 +342,9 @@ def get_and_merge_cmdsets(caller, session, player, obj,
 
         if cmdsets:
             # faster to do tuple on list than to build tuple directly
-            mergehash = tuple([id(cmdset) for cmdset in cmdsets])
-            if mergehash in _CMDSET_MERGE_CACHE:
-                # cached merge exist; use that
-                cmdset = _CMDSET_MERGE_CACHE[mergehash]
-            else:
+            mergehash = tuple([cmdset._version for cmdset in cmdsets])
+            cmdset = _CMDSET_MERGE_CACHE.get(mergehash)
+            if cmdset is None:
                 # we group and merge all same-prio cmdsets separately (this avoids
                 # order-dependent clashes in certain cases, such as
                 # when duplicates=True)
@@ -315,7 +370,9 @@ def get_and_merge_cmdsets(caller, session, player, obj,
                 # store the full sets for diagnosis
                 cmdset.merged_from = cmdsets
                 # cache
-                _CMDSET_MERGE_CACHE[mergehash] = cmdset
+                _CMDSET_MERGE_CACHE.set(mergehash, cmdset)
+                for version in mergehash:
+                    _CMDSET_MERGE_INDEX[version].add(mergehash)
         else:
             cmdset = None
 
@@ -441,6 +498,9 @@ def cmdhandler(called_by, raw_string, _testing=False, callertype="session", sess
             # post-command hook
             yield cmd.at_post_cmd()
 
+            # save Attribute changes batched during the command
+            flush_dirty()
+
             if cmd.save_for_next:
                 # store a reference to this command, possibly
                 # accessible by the next command.
@@ -27,11 +27,16 @@ Set theory.
 
 """
 
+from itertools import count
 from weakref import WeakKeyDictionary
 from django.utils.translation import ugettext as _
+from evennia.utils.logger import log_trace
 from evennia.utils.utils import inherits_from, is_iter
 __all__ = ("CmdSet",)
 
+# unique, never-reused version stamps for cmdset contents
+_VERSION_COUNTER = count(1)
+
 
 class _CmdSetMeta(type):
     """
@@ -178,8 +183,14 @@ class CmdSet(object):
 
         if key:
             self.key = key
+        # version stamp, changed whenever the set of commands changes.
+        # This is used by the cmdhandler to cache merges.
+        self._version = next(_VERSION_COUNTER)
         self.commands = []
         self.system_commands = []
+        # (version, commands, {lowercase cmdname: [(order, cmdname, cmd), ...]},
+        #  max cmdname length), built by get_command_candidates
+        self._cmdname_index = None
         self.actual_mergetype = self.mergetype
         self.cmdsetobj = cmdsetobj
         # this is set only on merged sets, in cmdhandler.py, in order to
@@ -477,6 +488,7 @@ class CmdSet(object):
             cmds = [self._instantiate(c) for c in cmd]
         else:
             cmds = [self._instantiate(cmd)]
+        self._version = next(_VERSION_COUNTER)
         commands = self.commands
         system_commands = self.system_commands
         for cmd in cmds:
@@ -510,6 +522,7 @@ class CmdSet(object):
 
         """
         cmd = self._instantiate(cmd)
+        self._version = next(_VERSION_COUNTER)
         self.commands = [oldcmd for oldcmd in self.commands if oldcmd != cmd]
 
     def get(self, cmd):
@@ -580,8 +593,50 @@ class CmdSet(object):
                     unique[cmd.key] = cmd
             else:
                 unique[cmd.key] = cmd
+        self._version = next(_VERSION_COUNTER)
         self.commands = unique.values()
 
+    def get_command_candidates(self, l_raw_string):
+        """
+        Get all commands with a key or alias that the given input
+        starts with. This uses an index of command names, rebuilt
+        whenever the commands of the set change.
+
+        Args:
+            l_raw_string (str): The (lower-case) input string.
+
+        Returns:
+            candidates (list): A list of `(cmdname, cmd)` tuples, in
+                the same order as the commands in the set and their
+                keys/aliases.
+
+        """
+        index = self._cmdname_index
+        if not index or index[0] != self._version or index[1] is not self.commands:
+            cmdnames = {}
+            order = 0
+            for cmd in self.commands:
+                try:
+                    names = [(cmdname.lower(), cmdname) for cmdname in [cmd.key] + cmd.aliases
+                             if cmdname]
+                except Exception:
+                    # a broken command should not stop the others from matching
+                    log_trace("cmdset error: could not index command %r." % cmd)
+                    continue
+                for l_cmdname, cmdname in names:
+                    cmdnames.setdefault(l_cmdname, []).append((order, cmdname, cmd))
+                    order += 1
+            maxlen = max(len(cmdname) for cmdname in cmdnames) if cmdnames else 0
+            index = self._cmdname_index = (self._version, self.commands, cmdnames, maxlen)
+        cmdnames, maxlen = index[2], index[3]
+        candidates = []
+        for ilen in xrange(1, min(maxlen, len(l_raw_string)) + 1):
+            if l_raw_string[:ilen] in cmdnames:
+                candidates.extend(cmdnames[l_raw_string[:ilen]])
+        if len(candidates) > 1:
+            candidates.sort(key=lambda tup: tup[0])
+        return [(cmdname, cmd) for _, cmdname, cmd in candidates]
+
     def get_all_cmd_keys_and_aliases(self, caller=None):
         """
         Collects keys/aliases from commands
@@ -75,6 +75,7 @@ from django.utils.translation import ugettext as _
 __all__ = ("import_cmdset", "CmdSetHandler")
 
 _CACHED_CMDSETS = {}
+_INVALIDATE_MERGE_CACHE = None
 _CMDSET_PATHS = utils.make_iter(settings.CMDSET_PATHS)
 
 class _ErrorCmdSet(CmdSet):
@@ -322,6 +323,13 @@ class CmdSetHandler(object):
                             cmdset.permanent = cmdset.key != '_CMDSET_ERROR'
                             self.cmdset_stack.append(cmdset)
 
+        if self.current:
+            # drop cached mergers involving the outgoing current cmdset
+            global _INVALIDATE_MERGE_CACHE
+            if not _INVALIDATE_MERGE_CACHE:
+                from evennia.commands.cmdhandler import invalidate_merge_cache as _INVALIDATE_MERGE_CACHE
+            _INVALIDATE_MERGE_CACHE(self.current)
+
         # merge the stack into a new merged cmdset
         new_current = None
         self.mergetype_stack = []
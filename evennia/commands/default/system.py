@@ -20,6 +20,10 @@ from evennia.players.models import PlayerDB
 from evennia.utils import logger, utils, gametime, create, is_pypy, prettytable
 from evennia.utils.evtable import EvTable
 from evennia.utils.utils import crop
+from evennia.commands.cmdhandler import merge_cache_stats
+from evennia.typeclasses.attributes import value_cache_stats
+from evennia.scripts.timerwheel import TIMER_WHEEL
+from evennia.server.amp import COMPRESSION_STATS as _AMP_COMPRESSION_STATS
 from evennia.commands.default.muxcommand import MuxCommand
 
 # delayed imports
@@ -644,7 +648,8 @@ class CmdServerLoad(MuxCommand):
     loaded by use of the idmapper functionality. This allows Evennia
     to maintain the same instances of an entity and allowing
     non-persistent storage schemes. The total amount of cached objects
-    are displayed plus a breakdown of database object types.
+    are displayed plus a breakdown of database object types and
+    how often the cache was hit or missed for each database model.
 
     The {wflushmem{n switch allows to flush the object cache. Please
     note that due to how Python's memory management works, releasing
@@ -748,14 +753,49 @@ class CmdServerLoad(MuxCommand):
             # because it lacks sys.getsizeof
 
             # object cache size
-            total_num, cachedict = _IDMAPPER.cache_size()
+            total_num, cachedict, dbstats = _IDMAPPER.cache_size(stats=True)
             sorted_cache = sorted([(key, num) for key, num in cachedict.items() if num > 0],
                                     key=lambda tup: tup[1], reverse=True)
             memtable = EvTable("entity name", "number", "idmapper %", align="l")
             for tup in sorted_cache:
                 memtable.add_row(tup[0], "%i" % tup[1], "%.2f" % (float(tup[1]) / total_num * 100))
-
-            string += "\n{w Entity idmapper cache:{n %i items\n%s" % (total_num, memtable)
+            statstable = EvTable("database model", "cached", "hits", "misses", "evictions", align="l")
+            for key, dbstat in sorted(dbstats.items()):
+                if dbstat["size"] or dbstat["misses"]:
+                    statstable.add_row(key, "%i" % dbstat["size"], "%i" % dbstat["hits"],
+                                       "%i" % dbstat["misses"], "%i" % dbstat["evictions"])
+
+            string += "\n{w Entity idmapper cache:{n %i items\n%s\n%s" % (total_num, memtable, statstable)
+
+        # cmdset merge cache efficiency
+        mstats = merge_cache_stats()
+        string += "\n{w Merged cmdset cache:{n %i/%s items, %i hits, %i misses, %i evictions" % (
+                    mstats["size"], mstats["maxsize"], mstats["hits"],
+                    mstats["misses"], mstats["evictions"])
+        if settings.ATTRIBUTE_VALUE_CACHE:
+            vstats = value_cache_stats()
+            string += "\n{w Attribute value cache:{n %i hits, %i misses" % (
+                        vstats["hits"], vstats["misses"])
+        if TIMER_WHEEL:
+            wstats = TIMER_WHEEL.get_stats()
+            string += "\n{w Timer wheel:{n %i pending, %i calls, lag %.3fs (max %.3fs)" % (
+                        wstats["pending"], wstats["calls"], wstats["last_lag"], wstats["max_lag"])
+        amp_protocol = getattr(SESSIONS.server, "amp_protocol", None)
+        if amp_protocol:
+            bstats = amp_protocol.msg_batch_stats
+            string += "\n{w Server->Portal messages:{n %i messages sent as %i entries in %i batches" % (
+                        bstats["messages"], bstats["entries"], bstats["batches"])
+        for direction in ("sent", "received"):
+            cstats = _AMP_COMPRESSION_STATS[direction]
+            string += "\n{w AMP payloads %s:{n %i (%i compressed), %i bytes -> %i on the wire, %.3fs" % (
+                        direction, cstats["payloads"], cstats["compressed"],
+                        cstats["raw_bytes"], cstats["wire_bytes"], cstats["time"])
+        if settings.IDMAPPER_WRITE_BEHIND_INTERVAL:
+            wstats = _IDMAPPER.write_behind_stats()
+            string += "\n{w Write-behind queue:{n %i pending, %i saves merged into " \
+                      "%i rows over %i flushes, latency %.3fs (max %.3fs)" % (
+                        wstats["pending"], wstats["queued"], wstats["rows"],
+                        wstats["flushes"], wstats["last_latency"], wstats["max_latency"])
 
         # return to caller
         self.caller.msg(string)
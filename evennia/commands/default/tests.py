@@ -15,7 +15,7 @@ main test suite started with
 import re
 
 from django.conf import settings
-from mock import Mock
+from mock import Mock, patch
 
 from evennia.commands.default.cmdset_character import CharacterCmdSet
 from evennia.utils.test_resources import EvenniaTest
@@ -311,3 +311,25 @@ class TestBatchProcess(CommandTest):
         self.call(batchprocess.CmdBatchCommands(), "example_batch_cmds", "Running Batchcommand processor  Automatic mode for example_batch_cmds")
         #self.call(batchprocess.CmdBatchCode(), "examples.batch_code", "")
 
+
+
+class TestCmdParser(CommandTest):
+    def test_cmdparser(self):
+        from evennia.commands.cmdparser import cmdparser
+        cmdset = CharacterCmdSet()
+        matches = cmdparser("LOOK at me", cmdset, self.char1)
+        self.assertEqual([("look", " at me")], [match[:2] for match in matches])
+        self.assertEqual("look", cmdparser("l me", cmdset, self.char1)[0][2].key)
+        self.assertEqual([], cmdparser("xyzzy", cmdset, self.char1))
+        # the index follows changes to the cmdset
+        cmdset.add(general.CmdHome(key="xyz"))
+        self.assertEqual("xyz", cmdparser("xyz", cmdset, self.char1)[0][0])
+        cmdset.remove("xyz")
+        self.assertEqual([], cmdparser("xyz", cmdset, self.char1))
+        # a command with broken aliases does not break the others
+        cmd = general.CmdHome(key="xyz")
+        cmdset.add(cmd)
+        cmd.aliases = None
+        with patch("evennia.commands.cmdset.log_trace") as mock_log_trace:
+            self.assertEqual("look", cmdparser("look", cmdset, self.char1)[0][2].key)
+        self.assertEqual(1, mock_log_trace.call_count)
@@ -9,6 +9,43 @@ from evennia.comms.managers import ChannelManager
 from evennia.utils import logger
 from evennia.utils.utils import make_iter
 
+_SESSIONS = None
+_DEFAULT_PLAYER_MSG = None
+_DEFAULT_AT_MSG_SEND = None
+
+
+def _uses_default_msg(entity):
+    """
+    Check if a subscriber is a Player with the default `msg` method,
+    so messages to it can be sent directly to its sessions.
+
+    """
+    global _DEFAULT_PLAYER_MSG
+    if "msg" in entity.__dict__:
+        # msg replaced on the instance
+        return False
+    if not _DEFAULT_PLAYER_MSG:
+        from evennia.players.players import DefaultPlayer
+        _DEFAULT_PLAYER_MSG = DefaultPlayer.msg.im_func
+    return getattr(getattr(type(entity), "msg", None), "im_func", None) is _DEFAULT_PLAYER_MSG
+
+
+def _uses_default_at_msg_send(sender):
+    """
+    Check if a sender has no custom `at_msg_send` hook, so it need not
+    be called for each receiver.
+
+    """
+    global _DEFAULT_AT_MSG_SEND
+    if "at_msg_send" in getattr(sender, "__dict__", {}):
+        # hook replaced on the instance
+        return False
+    if not _DEFAULT_AT_MSG_SEND:
+        from evennia.objects.objects import DefaultObject
+        _DEFAULT_AT_MSG_SEND = DefaultObject.at_msg_send.im_func
+    func = getattr(getattr(type(sender), "at_msg_send", None), "im_func", None)
+    return func is None or func is _DEFAULT_AT_MSG_SEND
+
 
 class DefaultChannel(ChannelDB):
     """
@@ -190,18 +227,42 @@ class DefaultChannel(ChannelDB):
         sent to on this channel, and sending them a message.
 
         msg (str): Message to distribute.
-        online (bool): Only send to receivers who are actually online
-            (not currently used):
+        online (bool): Only send to receivers who are actually online.
+            Offline Players with the default `msg` method are always
+            skipped, since they would not receive anything anyway.
 
-        """
-        # get all players connected to this channel and send to them
-        for entity in self.subscriptions.all():
+        Notes:
+            Players using the default `msg` method get the message
+            sent directly to their sessions, all in one go. Other
+            subscribers (Objects, bots and Players with a custom
+            `msg`) have their `msg` method called. If a sender of the
+            message has a custom `at_msg_send` hook, all receivers
+            have their `msg` method called instead, so the hook is
+            called as it would be by `msg`.
+
+        """
+        global _SESSIONS
+        if not _SESSIONS:
+            from evennia.server.sessionhandler import SESSIONS as _SESSIONS
+        subscriptions = self.subscriptions
+        receivers = subscriptions.online()
+        if not online:
+            receivers.extend(entity for entity in subscriptions.offline()
+                             if not _uses_default_msg(entity))
+        bulk = all(_uses_default_at_msg_send(sender) for sender in make_iter(msg.senders))
+        players = []
+        for entity in receivers:
+            if bulk and _uses_default_msg(entity):
+                players.append(entity)
+                continue
             try:
                 # note our addition of the from_channel keyword here. This could be checked
                 # by a custom player.msg() to treat channel-receives differently.
                 entity.msg(msg.message, from_obj=msg.senders, from_channel=self.id)
             except AttributeError, e:
                 logger.log_trace("%s\nCannot send msg to '%s'." % (e, entity))
+        if players:
+            _SESSIONS.data_out_players(players, text=msg.message, from_channel=self.id)
 
     def msg(self, msgobj, header=None, senders=None, sender_strings=None,
             persistent=False, online=False, emit=False, external=False):
@@ -8,12 +8,15 @@ from django.db import models
 from django.db.models import Q
 from evennia.typeclasses.managers import (TypedObjectManager, TypeclassManager,
                                       returns_typeclass_list, returns_typeclass)
+from evennia.comms.msgindex import get_msg_index
 
 _GA = object.__getattribute__
 _PlayerDB = None
 _ObjectDB = None
 _ChannelDB = None
 _SESSIONS = None
+# max number of ids to look up at a time
+_INDEX_CHUNK_SIZE = 500
 
 # error class
 
@@ -251,7 +254,8 @@ class MsgManager(models.Manager):
         """
         return self.filter(db_receivers_channels=channel).exclude(db_hide_from_channels=channel)
 
-    def message_search(self, sender=None, receiver=None, freetext=None, dbref=None):
+    def message_search(self, sender=None, receiver=None, freetext=None, dbref=None,
+                       offset=0, limit=None):
         """
         Search the message database for particular messages. At least
         one of the arguments must be given to do a search.
@@ -261,19 +265,28 @@ class MsgManager(models.Manager):
             receiver (Object, Player or Channel, optional): Get messages
                 received by a certain player,object or channel
             freetext (str): Search for a text string in a message.  NOTE:
-                This can potentially be slow, so make sure to supply one of
-                the other arguments to limit the search.
+                Without a search index (see `settings.MSG_SEARCH_INDEX`)
+                this can potentially be slow, so make sure to supply one of
+                the other arguments to limit the search. With an index,
+                this matches messages containing all the words of `freetext`,
+                best match first.
             dbref (int): The exact database id of the message. This will override
                     all other search criteria since it's unique and
                     always gives only one match.
+            offset (int, optional): Skip this many matches, for paging
+                through the results.
+            limit (int, optional): Return at most this many matches.
 
         Returns:
             messages (list or Msg): A list of message matches or a single match if `dbref` was given.
 
+        Notes:
+            When paging without an index, matches are sorted newest first.
+
         """
         # unique msg id
         if dbref:
-            msg = self.objects.filter(id=dbref)
+            msg = self.filter(id=dbref)
             if msg:
                 return msg[0]
 
@@ -300,13 +313,53 @@ class MsgManager(models.Manager):
             receiver_restrict = Q(db_receivers_channels=receiver) & ~Q(db_hide_from_channels=receiver)
         else:
             receiver_restrict = Q()
+        index = get_msg_index() if freetext else None
+        if index:
+            return self._indexed_search(index.search(freetext), sender_restrict & receiver_restrict,
+                                        offset, limit)
         # filter by full text
         if freetext:
             fulltext_restrict = Q(db_header__icontains=freetext) | Q(db_message__icontains=freetext)
         else:
             fulltext_restrict = Q()
         # execute the query
-        return list(self.filter(sender_restrict & receiver_restrict & fulltext_restrict))
+        query = self.filter(sender_restrict & receiver_restrict & fulltext_restrict)
+        if offset or limit is not None:
+            query = query.order_by("-id")[offset:None if limit is None else offset + limit]
+        return list(query)
+
+    def _indexed_search(self, msgids, restrict, offset, limit):
+        """
+        Get the messages found by a search index.
+
+        Args:
+            msgids (list): Ids of the matching messages, best first.
+            restrict (Q): Further restrictions on the messages.
+            offset (int): Number of matches to skip.
+            limit (int or None): Max number of matches to return.
+
+        Returns:
+            messages (list): The matching messages, best first.
+
+        """
+        end = None if limit is None else offset + limit
+        if not restrict:
+            # no need to look at more messages than returned
+            msgids = msgids[offset:end]
+            offset, end = 0, None
+        found = []
+        for ichunk in xrange(0, len(msgids), _INDEX_CHUNK_SIZE):
+            chunk = msgids[ichunk:ichunk + _INDEX_CHUNK_SIZE]
+            matches = set(self.filter(restrict, id__in=chunk).values_list("id", flat=True))
+            found.extend(msgid for msgid in chunk if msgid in matches)
+            if end is not None and len(found) >= end:
+                break
+        msgids = found[offset:end]
+        msgs = {}
+        for ichunk in xrange(0, len(msgids), _INDEX_CHUNK_SIZE):
+            msgs.update((msg.id, msg) for msg in
+                        self.filter(id__in=msgids[ichunk:ichunk + _INDEX_CHUNK_SIZE]))
+        return [msgs[msgid] for msgid in msgids if msgid in msgs]
 
 
 #
@@ -21,11 +21,13 @@ necessary to easily be able to delete connections on the fly).
 from django.conf import settings
 from django.utils import timezone
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete
 from evennia.typeclasses.models import TypedObject
 from evennia.utils.idmapper.models import SharedMemoryModel
 from evennia.comms import managers
 from evennia.locks.lockhandler import LockHandler
 from evennia.utils.utils import crop, make_iter, lazy_property
+from evennia.comms.msgindex import get_msg_index
 
 __all__ = ("Msg", "TempMsg", "ChannelDB")
 
@@ -303,6 +305,42 @@ class Msg(SharedMemoryModel):
         receivers = ",".join(["[%s]" % obj.key for obj in self.channels] + [obj.key for obj in self.receivers])
         return "%s->%s: %s" % (senders, receivers, crop(self.message, width=40))
 
+    def at_db_message_postsave(self, new):
+        """
+        This is called automatically after the message text was
+        saved. It updates the search index, if one is used.
+
+        Args:
+            new (bool): Set if this was a save of all fields.
+
+        """
+        index = get_msg_index()
+        if index:
+            index.add(self)
+
+    def at_db_header_postsave(self, new):
+        """
+        This is called automatically after the header was saved. It
+        updates the search index, if one is used.
+
+        Args:
+            new (bool): Set if this was a save of all fields.
+
+        """
+        if not new:
+            # on a full save, at_db_message_postsave already did this
+            self.at_db_message_postsave(new)
+
+    def delete(self, *args, **kwargs):
+        """
+        Delete the message, also removing it from the search index.
+
+        """
+        index = get_msg_index()
+        if index:
+            index.remove(self.id)
+        super(Msg, self).delete(*args, **kwargs)
+
 
 #------------------------------------------------------------
 #
@@ -410,6 +448,15 @@ class SubscriptionHandler(object):
     This handler manages subscriptions to the
     channel and hides away which type of entity is
     subscribing (Player or Object)
+
+    The subscribers are kept in memory once loaded, with the Player
+    subscribers split into those online and offline so messages can
+    be sent to the online ones without looking at the others. The
+    split is kept up to date by the session handler calling
+    `update_online_subscriber` as Players log in and out. Changes
+    to the subscriptions made directly in the database (such as from
+    the admin) reset the cache, and deleted subscribers are dropped
+    when read.
     """
     def __init__(self, obj):
         """
@@ -420,6 +467,68 @@ class SubscriptionHandler(object):
 
         """
         self.obj = obj
+        self._online = None
+        self._offline = None
+        self._objects = None
+        # set while the handler itself changes the subscriptions
+        self._changing = False
+
+    def _recache(self):
+        """
+        Load the subscribers from the database.
+
+        """
+        self._online, self._offline = set(), set()
+        for player in self.obj.db_subscriptions.all():
+            if player.is_connected:
+                self._online.add(player)
+            else:
+                self._offline.add(player)
+        self._objects = set(self.obj.db_object_subscriptions.all())
+
+    def _prune(self, subscribers):
+        """
+        Remove deleted entities from a set of cached subscribers.
+        Deleted subscribers are normally removed as they are deleted,
+        this catches any deleted without signals.
+
+        Args:
+            subscribers (set): The subscribers to check.
+
+        Returns:
+            subscribers (set): The same set.
+
+        """
+        if any(entity._is_deleted or entity.pk is None for entity in subscribers):
+            # deleted entities can't be hashed, so the set is rebuilt
+            live = [entity for entity in subscribers
+                    if not (entity._is_deleted or entity.pk is None)]
+            subscribers.clear()
+            subscribers.update(live)
+        return subscribers
+
+    def forget(self, entity):
+        """
+        Remove a deleted subscriber from the cache. This does not
+        touch the database.
+
+        Args:
+            entity (Player or Object): The entity being deleted.
+
+        """
+        if self._objects is not None:
+            self._online.discard(entity)
+            self._offline.discard(entity)
+            self._objects.discard(entity)
+
+    def reset(self):
+        """
+        Forget the cached subscribers, loading them anew from the
+        database when next needed.
+
+        """
+        if not self._changing:
+            self._online = self._offline = self._objects = None
 
     def has(self, entity):
         """
@@ -435,11 +544,15 @@ class SubscriptionHandler(object):
                 subscriber.
 
         """
+        if self._objects is None:
+            self._recache()
+        if entity._is_deleted or entity.pk is None:
+            return False
         clsname = entity.__dbclass__.__name__
         if clsname == "PlayerDB":
-            return entity in self.obj.db_subscriptions.all()
+            return entity in self._online or entity in self._offline
         elif clsname == "ObjectDB":
-            return entity in self.obj.db_object_subscriptions.all()
+            return entity in self._objects
 
 
     def add(self, entity):
@@ -456,14 +569,29 @@ class SubscriptionHandler(object):
                 no hooks will be called.
 
         """
+        if self._objects is None:
+            self._recache()
+        self._changing = True
+        try:
+            self._add(entity)
+        finally:
+            self._changing = False
+
+    def _add(self, entity):
+        "Subscribe entities, updating the cache"
         for subscriber in make_iter(entity):
             if subscriber:
                 clsname = subscriber.__dbclass__.__name__
                 # chooses the right type
                 if clsname == "ObjectDB":
                     self.obj.db_object_subscriptions.add(subscriber)
+                    self._objects.add(subscriber)
                 elif clsname == "PlayerDB":
                     self.obj.db_subscriptions.add(subscriber)
+                    if subscriber.is_connected:
+                        self._online.add(subscriber)
+                    else:
+                        self._offline.add(subscriber)
 
     def remove(self, entity):
         """
@@ -474,14 +602,48 @@ class SubscriptionHandler(object):
                 entities to un-subscribe from the channel.
 
         """
+        if self._objects is None:
+            self._recache()
+        self._changing = True
+        try:
+            self._remove(entity)
+        finally:
+            self._changing = False
+
+    def _remove(self, entity):
+        "Un-subscribe entities, updating the cache"
         for subscriber in make_iter(entity):
             if subscriber:
                 clsname = subscriber.__dbclass__.__name__
                 # chooses the right type
                 if clsname == "PlayerDB":
-                    self.obj.db_subscriptions.remove(entity)
+                    self.obj.db_subscriptions.remove(subscriber)
+                    self._online.discard(subscriber)
+                    self._offline.discard(subscriber)
                 elif clsname == "ObjectDB":
-                    self.obj.db_object_subscriptions.remove(entity)
+                    self.obj.db_object_subscriptions.remove(subscriber)
+                    self._objects.discard(subscriber)
+
+    def update_online(self, player):
+        """
+        Move a Player subscriber between the online and offline
+        subscribers, according to if it is connected.
+
+        Args:
+            player (Player): A Player that logged in or out. Nothing
+                is done if it does not subscribe to this channel.
+
+        """
+        if self._objects is None:
+            # nothing cached yet
+            return
+        if player in self._online or player in self._offline:
+            self._online.discard(player)
+            self._offline.discard(player)
+            if player.is_connected:
+                self._online.add(player)
+            else:
+                self._offline.add(player)
 
     def all(self):
         """
@@ -492,8 +654,38 @@ class SubscriptionHandler(object):
                 may be a mix of Players and Objects!
 
         """
-        return list(self.obj.db_subscriptions.all()) + \
-               list(self.obj.db_object_subscriptions.all())
+        if self._objects is None:
+            self._recache()
+        return (list(self._prune(self._online)) + list(self._prune(self._offline)) +
+                list(self._prune(self._objects)))
+
+    def online(self):
+        """
+        Get the subscribers currently online.
+
+        Returns:
+            subscribers (list): The connected Players and the
+                Objects currently puppeted.
+
+        """
+        if self._objects is None:
+            self._recache()
+        return list(self._prune(self._online)) + [obj for obj in self._prune(self._objects)
+                                                  if obj.sessid.get()]
+
+    def offline(self):
+        """
+        Get the subscribers currently offline.
+
+        Returns:
+            subscribers (list): The Players not connected and the
+                Objects not puppeted.
+
+        """
+        if self._objects is None:
+            self._recache()
+        return list(self._prune(self._offline)) + [obj for obj in self._prune(self._objects)
+                                                   if not obj.sessid.get()]
 
     def clear(self):
         """
@@ -502,6 +694,56 @@ class SubscriptionHandler(object):
         """
         self.obj.db_subscriptions.clear()
         self.obj.db_object_subscriptions.clear()
+        self._online, self._offline, self._objects = set(), set(), set()
+
+
+def update_online_subscriber(player):
+    """
+    Tell the channels a Player subscribes to that it has logged in
+    or out. Only channels whose subscribers are already loaded need
+    to know, since the others check when loading.
+
+    Args:
+        player (Player): The Player that logged in or out.
+
+    """
+    for channel in ChannelDB.get_all_cached_instances():
+        if "subscriptions" in channel.__dict__:
+            channel.subscriptions.update_online(player)
+
+
+def _subscriptions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal handler called when the subscriptions of channels change
+    in the database. Resets the subscriber cache of the affected
+    channels.
+
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        channels = [instance]
+    elif pk_set:
+        channels = [ChannelDB.get_cached_instance(pk) for pk in pk_set]
+    else:
+        # cleared from the subscriber's side
+        channels = ChannelDB.get_all_cached_instances()
+    for channel in channels:
+        if channel and "subscriptions" in channel.__dict__:
+            channel.subscriptions.reset()
+
+
+def _subscriber_deleted(sender, instance, **kwargs):
+    """
+    Signal handler called when any database object is deleted. Drops
+    deleted Players and Objects from the subscriber caches.
+
+    """
+    dbclass = getattr(instance, "__dbclass__", None)
+    if dbclass and dbclass.__name__ in ("PlayerDB", "ObjectDB"):
+        for channel in ChannelDB.get_all_cached_instances():
+            if "subscriptions" in channel.__dict__:
+                channel.subscriptions.forget(instance)
 
 
 class ChannelDB(TypedObject):
@@ -542,3 +784,8 @@ class ChannelDB(TypedObject):
     @lazy_property
     def subscriptions(self):
         return SubscriptionHandler(self)
+
+
+m2m_changed.connect(_subscriptions_changed, sender=ChannelDB.db_subscriptions.through)
+m2m_changed.connect(_subscriptions_changed, sender=ChannelDB.db_object_subscriptions.through)
+post_delete.connect(_subscriber_deleted)
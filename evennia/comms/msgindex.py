@@ -0,0 +1,321 @@
+"""
+Full-text search index for Msgs
+
+Searching the text of Msgs (such as with `search_message(freetext=...)`)
+normally means scanning every stored message for a substring, which
+gets slow once a game has a long channel history. With
+`settings.MSG_SEARCH_INDEX` set, the words of all messages are instead
+kept in a search index, which finds the messages containing all
+searched words without looking at the others, ranked by how well they
+match (using BM25 scoring).
+
+Note that an index matches whole words, case-insensitively and
+ignoring color codes, rather than any part of the text.
+
+Two indexes are included:
+
+- `SQLiteFTSIndex` keeps the index in a SQLite FTS5 table in the game
+  database. It needs the SQLite database backend with the FTS5
+  extension (included in most SQLite builds).
+- `InvertedIndex` keeps the index in memory. It works with any
+  database backend but is built from all messages the first time it
+  is searched, and takes memory in proportion to the amount of text
+  stored.
+
+Setting `MSG_SEARCH_INDEX = "auto"` picks the first if available,
+otherwise the second. It can also be set to the python path of a
+custom index class, which should implement the methods of `MsgIndex`.
+
+The index is updated whenever the header or text of a Msg is saved
+and when a Msg is deleted. Messages deleted in bulk (such as with
+`Msg.objects.filter(...).delete()`) bypass this; use
+`get_msg_index().rebuild()` after such an operation.
+
+"""
+import re
+from math import log
+from collections import defaultdict
+from django.conf import settings
+from django.db import connection
+from evennia.utils import logger
+from evennia.utils.ansi import strip_ansi
+from evennia.utils.utils import class_from_module, to_unicode
+
+__all__ = ("get_msg_index", "MsgIndex", "InvertedIndex", "SQLiteFTSIndex")
+
+_RE_WORD = re.compile(r"\w+", re.UNICODE)
+_CHUNK_SIZE = 500
+# BM25 tuning parameters
+_K1 = 1.2
+_B = 0.75
+
+_MSG_INDEX = None
+
+
+def tokenize(text):
+    """
+    Split text into the words to index or search for.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        words (list): The lowercase words of the text, without color
+            codes.
+
+    """
+    return _RE_WORD.findall(strip_ansi(to_unicode(text or "")).lower())
+
+
+def _msg_text(msg):
+    "Get the searchable text of a message"
+    return u"%s\n%s" % (to_unicode(msg.db_header or ""), to_unicode(msg.db_message or ""))
+
+
+def _iter_messages():
+    """
+    Iterate over the id and searchable text of all messages, reading
+    them from the database in chunks.
+
+    """
+    from evennia.comms.models import Msg
+    last_id = 0
+    while True:
+        rows = list(Msg.objects.filter(id__gt=last_id).order_by("id").values_list(
+                    "id", "db_header", "db_message")[:_CHUNK_SIZE])
+        if not rows:
+            return
+        for msgid, header, message in rows:
+            yield msgid, u"%s\n%s" % (to_unicode(header or ""), to_unicode(message or ""))
+        last_id = rows[-1][0]
+
+
+class MsgIndex(object):
+    """
+    Base class for Msg search indexes. An index should implement
+    these methods:
+
+    - `add(msg)` - index a message, replacing any earlier indexing
+      of it.
+    - `remove(msgid)` - remove the message with this id from the
+      index.
+    - `search(text)` - return the ids of the messages containing all
+      the words of `text`, best match first.
+    - `rebuild()` - re-index all messages in the database.
+
+    """
+
+
+class InvertedIndex(MsgIndex):
+    """
+    An in-memory inverted index, mapping each word to the messages
+    containing it.
+
+    """
+    def __init__(self):
+        """
+        Set up the index. It is filled on first use.
+
+        """
+        self.loaded = False
+        # {word: {msgid: count}}
+        self.postings = defaultdict(dict)
+        # {msgid: (nwords, words)}
+        self.docs = {}
+        self.total_length = 0
+
+    def _index(self, msgid, text):
+        """
+        Add the words of a text to the index.
+
+        """
+        self._unindex(msgid)
+        counts = defaultdict(int)
+        for word in tokenize(text):
+            counts[word] += 1
+        if counts:
+            postings = self.postings
+            for word, count in counts.iteritems():
+                postings[word][msgid] = count
+            length = sum(counts.itervalues())
+            self.docs[msgid] = (length, tuple(counts))
+            self.total_length += length
+
+    def _unindex(self, msgid):
+        """
+        Remove a message from the index.
+
+        """
+        doc = self.docs.pop(msgid, None)
+        if doc:
+            length, words = doc
+            self.total_length -= length
+            for word in words:
+                posting = self.postings[word]
+                posting.pop(msgid, None)
+                if not posting:
+                    del self.postings[word]
+
+    def add(self, msg):
+        if self.loaded:
+            self._index(msg.id, _msg_text(msg))
+
+    def remove(self, msgid):
+        if self.loaded:
+            self._unindex(msgid)
+
+    def rebuild(self):
+        self.postings = defaultdict(dict)
+        self.docs = {}
+        self.total_length = 0
+        for msgid, text in _iter_messages():
+            self._index(msgid, text)
+        self.loaded = True
+
+    def search(self, text):
+        if not self.loaded:
+            self.rebuild()
+        words = set(tokenize(text))
+        if not words:
+            return []
+        postings = [self.postings.get(word) for word in words]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+        ndocs = len(self.docs)
+        avg_length = float(self.total_length) / ndocs
+        idfs = [(posting, log(1.0 + (ndocs - len(posting) + 0.5) / (len(posting) + 0.5)))
+                for posting in postings]
+        docs = self.docs
+        scores = {}
+        for msgid in matches:
+            norm = _K1 * (1 - _B + _B * docs[msgid][0] / avg_length)
+            scores[msgid] = sum(idf * posting[msgid] * (_K1 + 1) / (posting[msgid] + norm)
+                                for posting, idf in idfs)
+        # best first, newest first if equal
+        return sorted(matches, key=lambda msgid: (-scores[msgid], -msgid))
+
+
+class SQLiteFTSIndex(MsgIndex):
+    """
+    An index kept in a SQLite FTS5 table next to the messages.
+
+    """
+    table = "comms_msg_fts"
+
+    def __init__(self):
+        """
+        Set up the index. The table is created on first use.
+
+        """
+        self.ready = False
+
+    @staticmethod
+    def is_available():
+        """
+        Check if the database supports this index.
+
+        Returns:
+            available (bool): If the database is SQLite with FTS5.
+
+        """
+        if connection.vendor != "sqlite":
+            return False
+        cursor = connection.cursor()
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.evennia_fts5_check USING fts5(content)")
+            cursor.execute("DROP TABLE temp.evennia_fts5_check")
+        except Exception:
+            return False
+        return True
+
+    def _setup(self):
+        """
+        Create and fill the index table if it does not exist.
+
+        Returns:
+            created (bool): If the table was created (and filled).
+
+        """
+        cursor = connection.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=%s",
+                       [self.table])
+        self.ready = True
+        if cursor.fetchone():
+            return False
+        cursor.execute("CREATE VIRTUAL TABLE %s USING fts5(content)" % self.table)
+        self._fill()
+        return True
+
+    def add(self, msg):
+        if not self.ready:
+            self._setup()
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM %s WHERE rowid=%%s" % self.table, [msg.id])
+        cursor.execute("INSERT INTO %s(rowid, content) VALUES (%%s, %%s)" % self.table,
+                       [msg.id, strip_ansi(_msg_text(msg))])
+
+    def remove(self, msgid):
+        if not self.ready:
+            self._setup()
+        connection.cursor().execute("DELETE FROM %s WHERE rowid=%%s" % self.table, [msgid])
+
+    def _fill(self):
+        """
+        Replace the contents of the table with all messages.
+
+        """
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM %s" % self.table)
+        rows = []
+        for msgid, text in _iter_messages():
+            rows.append((msgid, strip_ansi(text)))
+            if len(rows) >= _CHUNK_SIZE:
+                cursor.executemany("INSERT INTO %s(rowid, content) VALUES (%%s, %%s)" % self.table,
+                                   rows)
+                rows = []
+        if rows:
+            cursor.executemany("INSERT INTO %s(rowid, content) VALUES (%%s, %%s)" % self.table,
+                               rows)
+
+    def rebuild(self):
+        if self.ready or not self._setup():
+            self._fill()
+
+    def search(self, text):
+        if not self.ready:
+            self._setup()
+        words = tokenize(text)
+        if not words:
+            return []
+        # quote the words so they are not read as query syntax
+        query = " AND ".join('"%s"' % word for word in words)
+        cursor = connection.cursor()
+        cursor.execute("SELECT rowid FROM %s WHERE %s MATCH %%s ORDER BY rank, rowid DESC"
+                       % (self.table, self.table), [query])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def get_msg_index():
+    """
+    Get the Msg search index set by `settings.MSG_SEARCH_INDEX`.
+
+    Returns:
+        index (MsgIndex or None): The index, or None if not using one.
+
+    """
+    global _MSG_INDEX
+    if _MSG_INDEX is None:
+        path = settings.MSG_SEARCH_INDEX
+        if not path:
+            return None
+        if path == "auto":
+            index_class = SQLiteFTSIndex if SQLiteFTSIndex.is_available() else InvertedIndex
+        else:
+            index_class = class_from_module(path)
+        logger.log_info("Msg search index: %s" % index_class.__name__)
+        _MSG_INDEX = index_class()
+    return _MSG_INDEX
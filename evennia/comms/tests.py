@@ -0,0 +1,121 @@
+from mock import Mock, patch
+from evennia.comms import msgindex
+from evennia.comms.models import Msg, TempMsg
+from evennia.server.serversession import ServerSession
+from evennia.server.sessionhandler import SESSIONS
+from evennia.utils import create
+from evennia.utils.test_resources import EvenniaTest
+
+
+class TestChannelSubscriptions(EvenniaTest):
+    "Check the in-memory online/offline split of channel subscribers"
+    def setUp(self):
+        super(TestChannelSubscriptions, self).setUp()
+        self.channel = create.create_channel("testchan")
+        self.channel.subscriptions.add([self.player, self.player2])
+
+    def test_online(self):
+        subscriptions = self.channel.subscriptions
+        with self.assertNumQueries(0):
+            self.assertTrue(subscriptions.has(self.player2))
+            self.assertEqual([self.player], subscriptions.online())
+            self.assertEqual([self.player2], subscriptions.offline())
+        # let player2 log in, auto-puppeting its character
+        self.char2.locks.add("puppet:pid(%i)" % self.player2.id)
+        session = ServerSession()
+        session.init_session("telnet", ("localhost", "testmode"), SESSIONS)
+        session.sessid = 2
+        try:
+            SESSIONS.portal_connect(session.get_sync_data())
+            SESSIONS.login(SESSIONS.session_from_sessid(2), self.player2, testmode=True)
+            self.assertEqual(set([self.player, self.player2]), set(subscriptions.online()))
+            self.assertEqual([], subscriptions.offline())
+        finally:
+            SESSIONS.sessions.pop(2, None)
+
+    def test_distribute(self):
+        msg = TempMsg(message="Hello")
+        with patch.object(SESSIONS, "data_out_players") as mock_data_out:
+            self.channel.distribute_message(msg)
+        mock_data_out.assert_called_once_with([self.player], text="Hello",
+                                              from_channel=self.channel.id)
+        # with a custom at_msg_send hook on a sender, each receiver's
+        # msg is called, as it handles the hook
+        self.char1.at_msg_send = Mock()
+        msg = TempMsg(senders=[self.char1], message="Hello")
+        with patch.object(SESSIONS, "data_out_players") as mock_data_out_players:
+            with patch.object(SESSIONS, "data_out") as mock_data_out:
+                self.channel.distribute_message(msg)
+        self.assertFalse(mock_data_out_players.called)
+        self.assertEqual(1, mock_data_out.call_count)
+
+    def test_changed_outside(self):
+        subscriptions = self.channel.subscriptions
+        obj = create.create_object("evennia.objects.objects.DefaultObject", key="listener")
+        subscriptions.add(obj)
+        self.assertTrue(subscriptions.has(obj))
+        # deleted subscribers are dropped from the cache
+        obj.delete()
+        self.assertFalse(subscriptions.has(obj))
+        self.assertEqual(set([self.player, self.player2]), set(subscriptions.all()))
+        # changes made directly to the database reset the cache
+        self.channel.db_subscriptions.remove(self.player2)
+        self.assertFalse(subscriptions.has(self.player2))
+        self.player2.subscription_set.add(self.channel)
+        self.assertEqual([self.player2], subscriptions.offline())
+
+
+class TestMsgSearchIndex(EvenniaTest):
+    "Check searching messages through the in-memory index"
+    def setUp(self):
+        super(TestMsgSearchIndex, self).setUp()
+        self.index = msgindex.InvertedIndex()
+        self.patcher = patch.object(msgindex, "_MSG_INDEX", self.index)
+        self.patcher.start()
+        self.channel = create.create_channel("testchan")
+        self.msg1 = create.create_message(self.player, "The dragon sleeps",
+                                          channels=self.channel)
+        self.msg2 = create.create_message(self.player2, "A {rred{n dragon, a red dragon!",
+                                          channels=self.channel)
+        self.msg3 = create.create_message(self.player, "Nothing to see here")
+
+    def tearDown(self):
+        self.patcher.stop()
+        super(TestMsgSearchIndex, self).tearDown()
+
+    def test_search(self):
+        search = Msg.objects.message_search
+        self.assertEqual([self.msg2, self.msg1], search(freetext="Dragon"))
+        self.assertEqual([self.msg2], search(freetext="red dragon"))
+        self.assertEqual([], search(freetext="drag"))
+        self.assertEqual([self.msg1], search(freetext="dragon", offset=1, limit=1))
+        self.assertEqual([self.msg1], search(sender=self.player, freetext="dragon"))
+        # the index follows changes to messages
+        self.msg3.message = "Here be dragons"
+        self.msg2.delete()
+        self.assertEqual([self.msg1], search(freetext="dragon"))
+        self.assertEqual([self.msg3], search(freetext="dragons"))
+
+
+class TestSQLiteFTSIndex(EvenniaTest):
+    "Check the SQLite FTS5 message index"
+    def setUp(self):
+        super(TestSQLiteFTSIndex, self).setUp()
+        if not msgindex.SQLiteFTSIndex.is_available():
+            self.skipTest("the database does not support FTS5")
+        self.msg1 = create.create_message(self.player, "The dragon sleeps")
+        self.msg2 = create.create_message(self.player2, "A {rred{n dragon, a red dragon!")
+
+    def test_search(self):
+        index = msgindex.SQLiteFTSIndex()
+        with patch.object(msgindex, "_MSG_INDEX", index):
+            self.assertEqual([self.msg2.id, self.msg1.id], index.search("Dragon"))
+            self.assertEqual([self.msg2.id], index.search("red dragon"))
+            msg3 = create.create_message(self.player, "Another dragon")
+            self.assertIn(msg3.id, index.search("dragon"))
+        # a bulk delete bypasses the index until it is rebuilt, also
+        # by a new index finding the table already made
+        Msg.objects.filter(id=self.msg1.id).delete()
+        index = msgindex.SQLiteFTSIndex()
+        index.rebuild()
+        self.assertEqual([self.msg2.id, msg3.id], sorted(index.search("dragon")))
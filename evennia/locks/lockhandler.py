@@ -126,6 +126,13 @@ class LockException(Exception):
     pass
 
 
+#
+# Cached parsed locks, keyed by lockstring. These are shared by all
+# lockhandlers, so they must never be modified in-place.
+#
+
+_PARSED_LOCKS = utils.LRUCache(maxsize=settings.LOCKSTRING_CACHE_SIZE)
+
 #
 # Cached lock functions
 #
@@ -137,6 +144,8 @@ def _cache_lockfuncs():
     """
     global _LOCKFUNCS
     _LOCKFUNCS = {}
+    # parsed locks reference the old lock functions
+    _PARSED_LOCKS.clear()
     for modulepath in settings.LOCK_FUNC_MODULES:
         mod = utils.mod_import(modulepath)
         if mod:
@@ -154,6 +163,90 @@ _RE_SEPS = re.compile(r"(?<=[ )])AND(?=\s)|(?<=[ )])OR(?=\s)|(?<=[ )])NOT(?=\s)"
 _RE_OK = re.compile(r"%s|and|or|not")
 
 
+#
+# Lock compilation
+#
+
+def _compile_lockfunc(func, args, kwargs):
+    """
+    Wrap a single lock function call in a closure.
+
+    """
+    def _lockfunc(accessing_obj, accessed_obj):
+        return bool(func(accessing_obj, accessed_obj, *args, **kwargs))
+    return _lockfunc
+
+
+def _compile_lock(evalstring, lock_funcs):
+    """
+    Compile a purged evalstring into a callable that combines the
+    results of the lock functions with AND/OR/NOT. Python operator
+    precedence is kept (NOT binds tighter than AND, which binds tighter
+    than OR) and evaluation short-circuits, so lock functions are not
+    called once the result is decided.
+
+    Args:
+        evalstring (str): A string of space-separated `%s` placeholders
+            and `and`, `or` and `not` operators, as produced by
+            `LockHandler._parse_lockstring`.
+        lock_funcs (tuple): Tuples `(func, args, kwargs)`, one for each
+            `%s` placeholder in `evalstring`, in order.
+
+    Returns:
+        lockfunc (callable): A callable `lockfunc(accessing_obj, accessed_obj)`
+            returning `True` or `False`.
+
+    Raises:
+        ValueError: If the evalstring is not a valid expression.
+
+    """
+    tokens = evalstring.split()
+    funcs = iter(lock_funcs)
+    # position in tokens, as a mutable for the nested helpers
+    pos = [0]
+
+    def _peek():
+        return tokens[pos[0]] if pos[0] < len(tokens) else None
+
+    def _factor():
+        token = _peek()
+        pos[0] += 1
+        if token == "not":
+            operand = _factor()
+            return lambda accessing_obj, accessed_obj: not operand(accessing_obj, accessed_obj)
+        elif token == "%s":
+            return _compile_lockfunc(*next(funcs))
+        raise ValueError("Unexpected token '%s' in lock definition." % token)
+
+    def _term():
+        operands = [_factor()]
+        while _peek() == "and":
+            pos[0] += 1
+            operands.append(_factor())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda accessing_obj, accessed_obj: all(
+            operand(accessing_obj, accessed_obj) for operand in operands)
+
+    def _expr():
+        operands = [_term()]
+        while _peek() == "or":
+            pos[0] += 1
+            operands.append(_term())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda accessing_obj, accessed_obj: any(
+            operand(accessing_obj, accessed_obj) for operand in operands)
+
+    try:
+        lockfunc = _expr()
+    except StopIteration:
+        raise ValueError("Lock definition has more placeholders than lock functions.")
+    if pos[0] != len(tokens):
+        raise ValueError("Unexpected token '%s' in lock definition." % _peek())
+    return lockfunc
+
+
 #
 #
 # Lock handler
@@ -200,10 +293,18 @@ class LockHandler(object):
         Args:
             storage_locksring (str): The lockstring to parse.
 
+        Returns:
+            locks (dict): The parsed locks, keyed by access type. This
+                may be shared with other handlers and must not be
+                modified in-place.
+
         """
-        locks = {}
         if not storage_lockstring:
+            return {}
+        locks = _PARSED_LOCKS.get(storage_lockstring)
+        if locks is not None:
             return locks
+        locks = {}
         duplicates = 0
         elist = []  # errors
         wlist = []  # warnings
@@ -236,23 +337,26 @@ class LockHandler(object):
             if len(lock_funcs) < nfuncs:
                 continue
             try:
-                # purge the eval string of any superfluous items, then test it
+                # purge the eval string of any superfluous items, then compile it
                 evalstring = " ".join(_RE_OK.findall(evalstring))
-                eval(evalstring % tuple(True for func in funclist), {}, {})
-            except Exception:
+                lockfunc = _compile_lock(evalstring, lock_funcs)
+            except ValueError:
                 elist.append(_("Lock: definition '%s' has syntax errors.") % raw_lockstring)
                 continue
             if access_type in locks:
                 duplicates += 1
                 wlist.append(_("LockHandler on %(obj)s: access type '%(access_type)s' changed from '%(source)s' to '%(goal)s' " % \
                         {"obj":self.obj, "access_type":access_type, "source":locks[access_type][2], "goal":raw_lockstring}))
-            locks[access_type] = (evalstring, tuple(lock_funcs), raw_lockstring)
+            locks[access_type] = (evalstring, tuple(lock_funcs), raw_lockstring, lockfunc)
         if wlist:
             # a warning text was set, it's not an error, so only report
             logger.log_file("\n".join(wlist), WARNING_LOG)
         if elist:
             # an error text was set, raise exception.
             raise LockException("\n".join(elist))
+        if not wlist:
+            # only cache clean definitions, so warnings are always logged
+            _PARSED_LOCKS.set(storage_lockstring, locks)
         # return the gathered locks in an easily executable form
         return locks
 
@@ -361,7 +465,7 @@ class LockHandler(object):
         """
 
         if access_type:
-            return self.locks.get(access_type, ["", "", ""])[2]
+            return self.locks.get(access_type, ["", "", "", None])[2]
         return str(self)
 
     def remove(self, access_type):
@@ -377,6 +481,8 @@ class LockHandler(object):
 
         """
         if access_type in self.locks:
+            # copy before removing, the parsed locks may be shared
+            self.locks = dict(self.locks)
             del self.locks[access_type]
             self._save_locks()
             return True
@@ -420,15 +526,14 @@ class LockHandler(object):
 
             Parsing the lockstring, we (during cache) extract the valid
             lock functions and store their function objects in the right
-            order along with their args/kwargs. These are now executed in
-            sequence, creating a list of True/False values. This is put
-            into the evalstring, which is a string of AND/OR/NOT entries
-            separated by placeholders where each function result should
-            go. We just put those results in and evaluate the string to
-            get a final, combined True/False value for the lockstring.
+            order along with their args/kwargs. The AND/OR/NOT entries
+            between them are compiled into a tree of closures around
+            those functions. Checking the lock calls this tree, which
+            only executes lock functions until the combined True/False
+            result of the lockstring is known.
 
             The important bit with this solution is that the full
-            lockstring is never blindly evaluated, and thus there (should
+            lockstring is never evaluated, and thus there (should
             be) no way to sneak in malign code in it. Only "safe" lock
             functions (as defined by your settings) are executed.
 
@@ -446,19 +551,14 @@ class LockHandler(object):
 
         # no superuser or bypass -> normal lock operation
         if access_type in self.locks:
-            # we have a lock, test it.
-            evalstring, func_tup, raw_string = self.locks[access_type]
-            # execute all lock funcs in the correct order, producing a tuple of True/False results.
-            true_false = tuple(bool(tup[0](accessing_obj, self.obj, *tup[1], **tup[2])) for tup in func_tup)
-            # the True/False tuple goes into evalstring, which combines them
-            # with AND/OR/NOT in order to get the final result.
-            return eval(evalstring % true_false)
+            # we have a lock, test it using its compiled lock function.
+            return self.locks[access_type][3](accessing_obj, self.obj)
         else:
             return default
 
     def _eval_access_type(self, accessing_obj, locks, access_type):
         """
-        Helper method for evaluating the access type using eval().
+        Helper method for evaluating the access type.
 
         Args:
             accessing_obj (object): Object seeking access.
@@ -466,10 +566,7 @@ class LockHandler(object):
             access_type (str): An access-type key to evaluate.
 
         """
-        evalstring, func_tup, raw_string = locks[access_type]
-        true_false = tuple(tup[0](accessing_obj, self.obj, *tup[1], **tup[2])
-                           for tup in func_tup)
-        return eval(evalstring % true_false)
+        return locks[access_type][3](accessing_obj, self.obj)
 
     def check_lockstring(self, accessing_obj, lockstring, no_superuser_bypass=False,
                          default=False, access_type=None):
@@ -16,6 +16,7 @@ except ImportError:
     from django.test import TestCase
 
 from evennia.locks import lockfuncs
+from evennia.locks.lockhandler import LockException
 
 # ------------------------------------------------------------
 # Lock testing
@@ -36,6 +37,24 @@ class TestLockCheck(EvenniaTest):
         self.assertEquals(False, self.obj1.locks.check(self.obj2, 'get'))
         self.assertEquals(True, self.obj1.locks.check(self.obj2, 'not_exist', default=True))
 
+    def test_compiled_lock(self):
+        self.obj2.permissions.add('Wizards')
+        # NOT binds tighter than AND, which binds tighter than OR
+        self.obj1.locks.add("get:false() and false() or not false() and perm(Wizards)")
+        self.assertEquals(True, self.obj1.locks.check(self.obj2, 'get', no_superuser_bypass=True))
+        self.obj1.locks.add("get:not perm(Wizards) or false()")
+        self.assertEquals(False, self.obj1.locks.check(self.obj2, 'get', no_superuser_bypass=True))
+        self.assertRaises(LockException, self.obj1.locks.add, "get:true() false()")
+
+    def test_shared_parsed_locks(self):
+        lockstring = "get:all();edit:perm(Wizards)"
+        self.obj1.locks.replace(lockstring)
+        self.obj2.locks.replace(lockstring)
+        self.assertTrue(self.obj1.locks.locks is self.obj2.locks.locks)
+        self.obj1.locks.remove("edit")
+        self.assertEquals("", self.obj1.locks.get("edit"))
+        self.assertEquals("edit:perm(Wizards)", self.obj2.locks.get("edit"))
+
 
 class TestLockfuncs(EvenniaTest):
     def testrun(self):
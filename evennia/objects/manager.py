@@ -12,6 +12,7 @@ from evennia.utils.utils import to_unicode, is_iter, make_iter, string_partial_m
 
 __all__ = ("ObjectManager",)
 _GA = object.__getattribute__
+_TYPECLASS_AGGRESSIVE_CACHE = settings.TYPECLASS_AGGRESSIVE_CACHE
 
 # delayed import
 _ATTR = None
@@ -250,6 +251,10 @@ class ObjectDBManager(TypedObjectManager):
             # if candidates is an empty iterable there can be no matches
             # Exit early.
             return []
+        if candidates is not None and all(isinstance(obj, self.model.__dbclass__)
+                                          for obj in make_iter(candidates) if obj):
+            # all candidates are already loaded; match them in memory
+            return self._match_key_or_alias(ostring, exact, candidates, typeclasses)
 
         # build query objects
         candidates_id = [_GA(obj, "id") for obj in make_iter(candidates) if obj]
@@ -280,6 +285,59 @@ class ObjectDBManager(TypedObjectManager):
                 return [alias.db_obj for ind, alias in enumerate(alias_candidates) if ind in index_matches]
             return []
 
+    def _match_key_or_alias(self, ostring, exact, candidates, typeclasses):
+        """
+        Match keys and aliases of candidate objects in memory. This
+        gives the same matches as the database search in
+        `get_objs_with_key_or_alias`, in the same order.
+
+        Args:
+            ostring (str): A search criterion.
+            exact (bool): Require exact (case-insensitive) match.
+            candidates (list): Objects to match among.
+            typeclasses (list): Only match objects with these typeclass paths.
+
+        Returns:
+            matches (list): A list of matches of length 0, 1 or more.
+
+        Notes:
+            The keys are read directly from the objects and the aliases
+            from their alias handlers. Handlers not yet cached are
+            filled with a single query for all candidates.
+
+        """
+        objs = dict((obj.id, obj) for obj in make_iter(candidates) if obj and obj.id)
+        if typeclasses:
+            typeclasses = make_iter(typeclasses)
+            objs = dict((objid, obj) for objid, obj in objs.items()
+                        if obj.db_typeclass_path in typeclasses)
+        # sorted by id, as the fuzzy matching in the database search
+        objs = [objs[objid] for objid in sorted(objs)]
+        self.prefetch_tags(objs, tagtype="alias", force=not _TYPECLASS_AGGRESSIVE_CACHE)
+
+        ostring = to_unicode(ostring).lower()
+        if exact:
+            matches = [obj for obj in objs if to_unicode(obj.db_key).lower() == ostring or
+                       any(to_unicode(tag.db_key).lower() == ostring
+                           for tag in obj.aliases._cache.itervalues())]
+        else:
+            index_matches = string_partial_matching([obj.db_key for obj in objs],
+                                                    ostring, ret_index=True)
+            if index_matches:
+                matches = [objs[ind] for ind in index_matches]
+            else:
+                aliases = [(obj, tag.db_key) for obj in objs
+                           for tag in obj.aliases._cache.itervalues()]
+                index_matches = string_partial_matching([alias for _, alias in aliases],
+                                                        ostring, ret_index=True)
+                matches = []
+                for ind in index_matches:
+                    if aliases[ind][0] not in matches:
+                        matches.append(aliases[ind][0])
+        # the default ordering of typeclassed models, newest first
+        matches.sort(key=lambda obj: (obj.db_date_created, -obj.id), reverse=True)
+        return matches
+
     # main search methods and helper functions
 
     @returns_typeclass_list
@@ -360,7 +418,9 @@ class ObjectDBManager(TypedObjectManager):
                 candidates = [cand for cand in candidates
                                 if _GA(cand, "db_typeclass_path") in typeclass]
 
-        dbref = not attribute_name and exact and self.dbref(searchdata)
+        # only look up a dbref if searchdata is one; this also keeps
+        # candidate searches from querying the database
+        dbref = self.dbref(searchdata) if exact and not attribute_name else None
         if dbref is not None:
             # Easiest case - dbref matching (always exact)
             dbref_match = self.dbref_search(dbref)
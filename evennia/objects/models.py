@@ -24,12 +24,47 @@ from evennia.utils import logger
 from evennia.utils.utils import (make_iter, dbref, lazy_property)
 
 
+_DefaultCharacter = None
+
+# content kinds
+_EXIT, _CHARACTER, _THING = "exit", "character", "thing"
+
+
+def _content_kind(obj):
+    """
+    Get which kind of content an object is.
+
+    Args:
+        obj (Object): The object to check.
+
+    Returns:
+        kind (str): One of "exit" (has a destination), "character"
+            (is a DefaultCharacter) or "thing".
+
+    """
+    global _DefaultCharacter
+    if not _DefaultCharacter:
+        from evennia.objects.objects import DefaultCharacter as _DefaultCharacter
+    if obj.db_destination_id:
+        return _EXIT
+    if isinstance(obj, _DefaultCharacter):
+        return _CHARACTER
+    return _THING
+
+
 class ContentsHandler(object):
     """
     Handles and caches the contents of an object to avoid excessive
     lookups (this is done very often due to cmdhandler needing to look
     for object-cmdsets). It is stored on the 'contents_cache' property
     of the ObjectDB.
+
+    The contents are kept sorted by kind (exits, characters and other
+    things) so that one kind can be fetched without looking at the
+    others. The kinds are updated when objects are added or removed
+    and, through `changed`, when the destination or typeclass of an
+    object in the location changes.
+
     """
     def __init__(self, obj):
         """
@@ -42,7 +77,8 @@ class ContentsHandler(object):
         """
         self.obj = obj
         self._pkcache = {}
-        self._idcache = obj.__class__.__instance_cache__
+        self._buckets = {_EXIT: {}, _CHARACTER: {}, _THING: {}}
+        self._changed = set()
         self.init()
 
     def init(self):
@@ -50,8 +86,60 @@ class ContentsHandler(object):
         Re-initialize the content cache
 
         """
-        self._pkcache.update(dict((obj.pk, None) for obj in
-                            ObjectDB.objects.filter(db_location=self.obj)))
+        for obj in ObjectDB.objects.filter(db_location=self.obj):
+            self.add(obj)
+
+    def _place(self, pk, kind):
+        "Put pk in the bucket of the given kind"
+        old_kind = self._pkcache.get(pk)
+        if old_kind != kind:
+            if old_kind:
+                del self._buckets[old_kind][pk]
+            self._buckets[kind][pk] = None
+            self._pkcache[pk] = kind
+
+    def _get(self, kind=None, exclude=None):
+        """
+        Get the objects of a kind.
+
+        Args:
+            kind (str, optional): The kind of objects to get. If not
+                given, get all objects.
+            exclude (Object or list of Object, optional): object(s) to ignore.
+
+        Returns:
+            objects (list): The objects.
+
+        Notes:
+            Objects no longer in the idmapper cache are reloaded from
+            the database in a single query.
+
+        """
+        if self._changed:
+            # sort objects whose kind may have changed
+            idcache = ObjectDB.__instance_cache__
+            for pk in self._changed:
+                if pk in self._pkcache and pk in idcache:
+                    self._place(pk, _content_kind(idcache[pk]))
+            self._changed = set(pk for pk in self._changed
+                                if pk in self._pkcache and pk not in idcache)
+        pks = self._buckets[kind].keys() if kind else self._pkcache.keys()
+        if exclude:
+            excludes = set(excl.pk for excl in make_iter(exclude))
+            pks = [pk for pk in pks if pk not in excludes]
+        idcache = ObjectDB.__instance_cache__
+        try:
+            return [idcache[pk] for pk in pks]
+        except KeyError:
+            # this can happen if the idmapper cache was cleared for an object
+            # in the contents cache. If so we reload the missing objects.
+            missing = [pk for pk in pks if pk not in idcache]
+            found = dict((obj.pk, obj) for obj in ObjectDB.objects.filter(pk__in=missing))
+            for pk in missing:
+                if pk not in found:
+                    # deleted or moved without us knowing
+                    self._buckets[self._pkcache.pop(pk)].pop(pk, None)
+            return [idcache.get(pk) or found[pk] for pk in pks if pk in self._pkcache]
 
     def get(self, exclude=None):
         """
@@ -64,16 +152,46 @@ class ContentsHandler(object):
             objects (list): the Objects inside this location
 
         """
-        pks = self._pkcache.keys()
-        if exclude:
-            pks = [pk for pk in pks if pk not in [excl.pk for excl in make_iter(exclude)]]
-        try:
-            return [self._idcache[pk] for pk in pks]
-        except KeyError:
-            # this can happen if the idmapper cache was cleared for an object
-            # in the contents cache. If so we need to re-initialize and try again.
-            self.init()
-            return self.get(exclude=exclude)
+        return self._get(exclude=exclude)
+
+    def contents_without(self, obj):
+        """
+        Return the contents except for one object.
+
+        Args:
+            obj (Object): The object to leave out.
+
+        Returns:
+            objects (list): The Objects inside this location.
+
+        """
+        return self._get(exclude=obj)
+
+    def exits(self, exclude=None):
+        """
+        Return the exits in this location.
+
+        Args:
+            exclude (Object or list of Object): object(s) to ignore
+
+        Returns:
+            exits (list): The Objects with a destination.
+
+        """
+        return self._get(_EXIT, exclude=exclude)
+
+    def characters(self, exclude=None):
+        """
+        Return the characters in this location.
+
+        Args:
+            exclude (Object or list of Object): object(s) to ignore
+
+        Returns:
+            characters (list): The Characters inside this location.
+
+        """
+        return self._get(_CHARACTER, exclude=exclude)
 
     def add(self, obj):
         """
@@ -83,7 +201,7 @@ class ContentsHandler(object):
             obj (Object): object to add
 
         """
-        self._pkcache[obj.pk] = None
+        self._place(obj.pk, _content_kind(obj))
 
     def remove(self, obj):
         """
@@ -93,7 +211,20 @@ class ContentsHandler(object):
             obj (Object): object to remove
 
         """
-        self._pkcache.pop(obj.pk, None)
+        kind = self._pkcache.pop(obj.pk, None)
+        if kind:
+            del self._buckets[kind][obj.pk]
+
+    def changed(self, obj):
+        """
+        Flag an object in this location as possibly having changed
+        kind. It is sorted again on the next lookup.
+
+        Args:
+            obj (Object): The object that changed.
+
+        """
+        self._changed.add(obj.pk)
 
     def clear(self):
         """
@@ -101,7 +232,9 @@ class ContentsHandler(object):
 
         """
         self._pkcache = {}
-        self._init()
+        self._buckets = {_EXIT: {}, _CHARACTER: {}, _THING: {}}
+        self._changed = set()
+        self.init()
 
 #------------------------------------------------------------
 #
@@ -302,6 +435,37 @@ class ObjectDB(TypedObject):
                 logger.log_warn("db_location direct save triggered contents_cache.init() for all objects!")
                 [o.contents_cache.init() for o in self.__dbclass__.get_all_cached_instances()]
 
+    def _contents_changed(self):
+        "Tell our location that we may have changed kind of content"
+        location = self.db_location
+        if location and "contents_cache" in location.__dict__:
+            location.contents_cache.changed(self)
+
+    def at_db_destination_postsave(self, new):
+        """
+        This is called automatically after the destination field was
+        saved. Turning an object into an exit (or back) changes how
+        its location's contents cache sorts it.
+
+        Args:
+            new (bool): Set if this object has not yet been saved before.
+
+        """
+        if not new:
+            self._contents_changed()
+
+    def at_db_typeclass_path_postsave(self, new):
+        """
+        This is called automatically after the typeclass path was
+        saved, such as by `swap_typeclass`.
+
+        Args:
+            new (bool): Set if this object has not yet been saved before.
+
+        """
+        if not new:
+            self._contents_changed()
+
     class Meta:
         "Define Django meta options"
         verbose_name = "Object"
@@ -184,7 +184,7 @@ class DefaultObject(ObjectDB):
         return self.db_player and self.db_player.is_superuser \
                 and not self.db_player.attributes.get("_quell")
 
-    def contents_get(self, exclude=None):
+    def contents_get(self, exclude=None, prefetch_attributes=False):
         """
         Returns the contents of this object, i.e. all
         objects that has this object set as its location.
@@ -193,6 +193,9 @@ class DefaultObject(ObjectDB):
         Args:
             exclude (Object): Object to exclude from returned
                 contents list
+            prefetch_attributes (bool, optional): Load the Attributes
+                of all returned objects not yet cached in one go. Use this
+                when you are about to access Attributes on many of them.
 
         Returns:
             contents (list): List of contents of this Object.
@@ -201,7 +204,10 @@ class DefaultObject(ObjectDB):
             Also available as the `contents` property.
 
         """
-        return self.contents_cache.get(exclude=exclude)
+        contents = self.contents_cache.get(exclude=exclude)
+        if prefetch_attributes:
+            ObjectDB.objects.prefetch_attributes(contents)
+        return contents
     contents = property(contents_get)
 
     @property
@@ -210,7 +216,7 @@ class DefaultObject(ObjectDB):
         Returns all exits from this object, i.e. all objects at this
         location having the property destination != `None`.
         """
-        return [exi for exi in self.contents if exi.destination]
+        return self.contents_cache.exits()
 
     # main methods
 
@@ -1260,8 +1266,8 @@ class DefaultObject(ObjectDB):
         if not looker:
             return
         # get and identify all objects
-        visible = (con for con in self.contents if con != looker and
-                                                    con.access(looker, "view"))
+        visible = (con for con in self.contents_cache.contents_without(looker)
+                   if con.access(looker, "view"))
         exits, users, things = [], [], []
         for con in visible:
             key = con.get_display_name(looker)
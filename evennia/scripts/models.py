@@ -159,3 +159,33 @@ class ScriptDB(TypedObject):
         _GA(self, "save")(update_fields=[fname])
     obj = property(__get_obj, __set_obj)
     object = property(__get_obj, __set_obj)
+
+    def _scripts_changed(self):
+        "Tell the object we are stored on about us"
+        obj = self.obj
+        if obj and "scripts" in obj.__dict__:
+            obj.scripts.cache(self)
+
+    def at_db_obj_postsave(self, new):
+        """
+        This is called automatically after the obj field was saved.
+        It adds this script to the script cache of its object.
+
+        Args:
+            new (bool): Set if this script has not yet been saved before.
+
+        """
+        self._scripts_changed()
+
+    def at_db_player_postsave(self, new):
+        """
+        This is called automatically after the player field was
+        saved. It adds this script to the script cache of its player.
+
+        Args:
+            new (bool): Set if this script has not yet been saved before.
+
+        """
+        if not new:
+            # on a full save, at_db_obj_postsave already did this
+            self._scripts_changed()
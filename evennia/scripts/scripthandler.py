@@ -4,6 +4,12 @@ make sure they are still relevant. A scripthandler is automatically
 added to all game objects. You access it through the property
 `scripts` on the game object.
 
+The handler keeps the scripts of its object in memory once they have
+been looked up, so listing and validating them (which happens on
+every command) does not need to query the database. The cache is
+kept up to date by the handler itself and by the scripts (see
+`ScriptDB.at_db_obj_postsave`).
+
 """
 
 from evennia.scripts.models import ScriptDB
@@ -27,13 +33,14 @@ class ScriptHandler(object):
 
         """
         self.obj = obj
+        self._cache = None
 
     def __str__(self):
         """
         List the scripts tied to this object.
 
         """
-        scripts = ScriptDB.objects.get_all_scripts_on_obj(self.obj)
+        scripts = self._get_cache()
         string = ""
         for script in scripts:
             interval = "inf"
@@ -76,8 +83,86 @@ class ScriptHandler(object):
         if not script:
             logger.log_errmsg("Script %s could not be created and/or started." % scriptclass)
             return False
+        self.cache(script)
         return True
 
+    def _owns(self, script):
+        """
+        Check if a cached script still belongs to this handler.
+
+        Args:
+            script (Script): The script to check.
+
+        Returns:
+            owned (bool): If the script is not deleted, has not moved
+                to another object and is still the instance in the
+                idmapper cache.
+
+        """
+        if script._is_deleted:
+            return False
+        if ScriptDB.__instance_cache__.get(script.id) is not script:
+            return False
+        if self.obj.__dbclass__.__name__ == "PlayerDB":
+            return script.db_player_id == self.obj.id
+        return script.db_obj_id == self.obj.id
+
+    def _get_cache(self):
+        """
+        Get the scripts on this object, loading them from the
+        database the first time.
+
+        Returns:
+            scripts (list): The scripts on this object, in order of
+                creation.
+
+        """
+        if self._cache is None:
+            self._cache = list(ScriptDB.objects.get_all_scripts_on_obj(self.obj))
+        elif not all(self._owns(script) for script in self._cache):
+            # a script was deleted, moved or flushed from the
+            # idmapper cache behind our back - reload.
+            self._cache = list(ScriptDB.objects.get_all_scripts_on_obj(self.obj))
+        return self._cache
+
+    def cache(self, script):
+        """
+        Add a script to the in-memory list of scripts on this object.
+        This is called when a script is stored on the object.
+
+        Args:
+            script (Script): The script to add.
+
+        """
+        if self._cache is not None and script not in self._cache and self._owns(script):
+            self._cache.append(script)
+
+    def reset_cache(self):
+        """
+        Forget the cached scripts, making the next lookup load them
+        from the database.
+
+        """
+        self._cache = None
+
+    def _match(self, key):
+        """
+        Find scripts on this object matching a key.
+
+        Args:
+            key (str): The script's key or dbref.
+
+        Returns:
+            scripts (list): The matching scripts.
+
+        """
+        dbref = ScriptDB.objects.dbref(key)
+        if dbref is not None:
+            # dbref() gives the number as a string
+            dbref = int(dbref)
+            return [script for script in self._get_cache() if script.id == dbref]
+        return [script for script in self._get_cache() if script.db_key == key]
+
     def start(self, key):
         """
         Find scripts and force-start them
@@ -89,7 +174,7 @@ class ScriptHandler(object):
             nr_started (int): The number of started scripts found.
 
         """
-        scripts = ScriptDB.objects.get_all_scripts_on_obj(self.obj, key=key)
+        scripts = self._match(key)
         num = 0
         for script in scripts:
             num += script.start()
@@ -106,7 +191,7 @@ class ScriptHandler(object):
             scripts (list): The found scripts matching `key`.
 
         """
-        return ScriptDB.objects.get_all_scripts_on_obj(self.obj, key=key)
+        return self._match(key)
 
     def delete(self, key=None):
         """
@@ -118,12 +203,17 @@ class ScriptHandler(object):
                 If no key is given, delete *all* scripts on the object!
 
         """
-        delscripts = ScriptDB.objects.get_all_scripts_on_obj(self.obj, key=key)
-        if not delscripts:
-            delscripts = [script for script in ScriptDB.objects.get_all_scripts_on_obj(self.obj) if script.path == key]
+        if key:
+            delscripts = self._match(key)
+            if not delscripts:
+                delscripts = [script for script in self._get_cache() if script.path == key]
+        else:
+            delscripts = list(self._get_cache())
         num = 0
         for script in delscripts:
             num += script.stop()
+        if self._cache is not None:
+            self._cache = [script for script in self._cache if script not in delscripts]
         return num
     # alias to delete
     stop = delete
@@ -132,8 +222,11 @@ class ScriptHandler(object):
         """
         Get all scripts stored in this handler.
 
+        Returns:
+            scripts (list): The scripts on this object.
+
         """
-        return ScriptDB.objects.get_all_scripts_on_obj(self.obj)
+        return list(self._get_cache())
 
     def validate(self, init_mode=False):
         """
@@ -147,5 +240,16 @@ class ScriptHandler(object):
                 - `"reset"` - server reboot. Kill non-persistent scripts
                 - `"reload"` - server reload. Keep non-persistent scripts.
 
+        Notes:
+            Outside of init mode only the cached scripts are
+            validated, so an object without scripts costs no database
+            access.
+
         """
-        ScriptDB.objects.validate(obj=self.obj, init_mode=init_mode)
+        if init_mode:
+            ScriptDB.objects.validate(obj=self.obj, init_mode=init_mode)
+            self.reset_cache()
+            return
+        scripts = self._get_cache()
+        if scripts:
+            ScriptDB.objects.validate(scripts=list(scripts))
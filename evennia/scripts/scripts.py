@@ -11,6 +11,7 @@ from django.utils.translation import ugettext as _
 from evennia.typeclasses.models import TypeclassBase
 from evennia.scripts.models import ScriptDB
 from evennia.scripts.manager import ScriptManager
+from evennia.scripts.timerwheel import TIMER_WHEEL
 from evennia.utils import logger
 
 __all__ = ["DefaultScript", "DoNothing", "Store"]
@@ -22,12 +23,28 @@ _SESSIONS = None
 class ExtendedLoopingCall(LoopingCall):
     """
     LoopingCall that can start at a delay different
-    than `self.interval`.
+    than `self.interval`. Its calls are scheduled in the shared
+    timer wheel (see `evennia.scripts.timerwheel`) unless
+    `settings.SCRIPT_TIMER_RESOLUTION` is None.
 
     """
     start_delay = None
     callcount = 0
 
+    def __init__(self, f, *a, **kw):
+        """
+        Set up the call.
+
+        Args:
+            f (callable): The function to call.
+            *a: Arguments to `f`.
+            **kw: Keyword arguments to `f`.
+
+        """
+        LoopingCall.__init__(self, f, *a, **kw)
+        if TIMER_WHEEL:
+            self.clock = TIMER_WHEEL
+
     def start(self, interval, now=True, start_delay=None, count_start=0):
         """
         Start running function every interval seconds.
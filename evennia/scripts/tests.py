@@ -4,6 +4,7 @@ from django.utils.unittest import TestCase
 from evennia.scripts.models import ScriptDB, ObjectDoesNotExist
 from evennia.utils.create import create_script
 from evennia.scripts.scripts import DoNothing
+from evennia.utils.test_resources import EvenniaTest
 
 
 class TestScriptDB(TestCase):
@@ -41,3 +42,141 @@ class TestScriptDB(TestCase):
         "Can deleted scripts be said to be valid?"
         self.scr.delete()
         self.assertFalse(self.scr.is_valid())  # assertRaises? See issue #509
+
+
+class TestSlicedTicker(TestCase):
+    "Check that a sliced ticker calls every subscriber once per interval"
+    def test_slices(self):
+        from mock import Mock
+        from evennia.scripts.tickerhandler import Ticker
+
+        class _Subscriber(object):
+            def __init__(self, pk):
+                self.pk, self.ticks = pk, 0
+            def at_tick(self, *args, **kwargs):
+                self.ticks += 1
+
+        class _SlicedTicker(Ticker):
+            time_slices = 4
+
+        ticker = _SlicedTicker(10)
+        ticker.task = Mock(running=True)
+        subscribers = [_Subscriber(pk) for pk in range(1, 9)]
+        for sub in subscribers:
+            ticker.add("key%i" % sub.pk, sub, _hook_key="at_tick")
+        self.assertEqual([2, 2, 2, 2], [len(bucket) for bucket in ticker.buckets])
+        ticker._callback()
+        self.assertEqual(2, sum(sub.ticks for sub in subscribers))
+        for _ in range(3):
+            ticker._callback()
+        self.assertEqual([1] * 8, [sub.ticks for sub in subscribers])
+        stats = ticker.get_stats()
+        self.assertEqual((4, 8, 0), (stats["sweeps"], stats["subscribers"], stats["overruns"]))
+
+
+class TestTickerSave(EvenniaTest):
+    "Check that ticker subscriptions are saved together"
+    def test_debounced_save(self):
+        from mock import patch
+        from evennia.scripts import tickerhandler
+        handler = tickerhandler.TickerHandler(save_name="test_ticker_storage")
+        with patch.object(tickerhandler, "_SAVE_DELAY", 0), \
+                patch.object(tickerhandler, "reactor") as mock_reactor, \
+                patch.object(handler, "save") as mock_save:
+            mock_reactor.callLater.return_value.active.return_value = True
+            handler.add(self.obj1, 10)
+            handler.add(self.obj2, 10, idstring="other")
+            handler.remove(self.obj2, 10, idstring="other")
+            self.assertEqual(1, mock_reactor.callLater.call_count)
+            self.assertFalse(mock_save.called)
+        handler.add(self.char1, 20, hook_key="at_other_tick")
+        handler.save()
+        handler.ticker_pool.stop()
+        restored = tickerhandler.TickerHandler(save_name="test_ticker_storage")
+        restored.restore()
+        self.assertEqual(set([self.obj1, self.char1]),
+                         set(obj for subs in restored.all().values() for obj, _, _ in subs))
+        restored.clear()
+        restored.save()
+
+
+class TestScriptHandlerCache(EvenniaTest):
+    "Check that the script handler keeps track of scripts in memory"
+    def test_cache(self):
+        self.obj1.scripts.all()
+        with self.assertNumQueries(0):
+            self.obj1.scripts.validate()
+            self.assertEqual([], self.obj1.scripts.all())
+        # scripts created outside the handler are picked up
+        script = create_script(DoNothing, key="outside", obj=self.obj1)
+        with self.assertNumQueries(0):
+            self.assertEqual([script], self.obj1.scripts.get("outside"))
+            self.assertEqual([script], self.obj1.scripts.get("#%i" % script.id))
+        self.obj1.scripts.add(DoNothing, key="inside")
+        self.assertEqual(["outside", "inside"],
+                         [scr.key for scr in self.obj1.scripts.all()])
+        self.assertEqual(1, self.obj1.scripts.delete("outside"))
+        self.assertEqual(["inside"], [scr.key for scr in self.obj1.scripts.all()])
+        # moving a script to another object
+        inside = self.obj1.scripts.get("inside")[0]
+        self.obj2.scripts.all()
+        inside.obj = self.obj2
+        self.assertEqual([], self.obj1.scripts.all())
+        self.assertEqual([inside], self.obj2.scripts.all())
+        inside.stop()
+        self.assertEqual([], self.obj2.scripts.all())
+
+
+class TestTimerWheel(TestCase):
+    "Check scheduling calls in the timer wheel"
+    def setUp(self):
+        from twisted.internet.task import Clock
+        from evennia.scripts.timerwheel import TimerWheel
+        self.clock = Clock()
+        self.wheel = TimerWheel(resolution=0.1, clock=self.clock)
+
+    def test_schedule(self):
+        fired = []
+        self.wheel.callLater(1.05, fired.append, "a")
+        cancelled = self.wheel.callLater(1.0, fired.append, "b")
+        self.wheel.callLater(100000, fired.append, "c")
+        cancelled.cancel()
+        self.assertFalse(cancelled.active())
+        self.clock.advance(1.0)
+        self.assertEqual([], fired)
+        self.clock.advance(0.15)
+        self.assertEqual(["a"], fired)
+        self.clock.pump([1000] * 100)
+        self.assertEqual(["a", "c"], fired)
+        self.assertEqual(0, self.wheel.get_stats()["pending"])
+
+    def test_looping_call(self):
+        from evennia.scripts.scripts import ExtendedLoopingCall
+        task = ExtendedLoopingCall(lambda: None)
+        task.clock = self.wheel
+        task.start(10, now=False)
+        self.clock.advance(4.05)
+        self.assertAlmostEqual(5.95, task.next_call_time())
+        self.clock.advance(6)
+        self.assertEqual(1, task.callcount)
+        task.force_repeat()
+        self.assertEqual(2, task.callcount)
+        self.clock.advance(10.1)
+        self.assertEqual(3, task.callcount)
+        task.stop()
+        self.assertEqual(0, self.wheel.get_stats()["pending"])
+
+    def test_epoch_time(self):
+        # at epoch-sized reactor times, a driver due "now" must not be
+        # re-armed without running its tick
+        from evennia.scripts.timerwheel import TimerWheel
+        self.clock.advance(1700000000.123)
+        wheel = TimerWheel(resolution=0.1, clock=self.clock)
+        fired = []
+        for inum in xrange(200):
+            wheel.callLater(0.1 * inum + 0.01 * (inum % 7), fired.append, inum)
+        while self.clock.getDelayedCalls():
+            # wake up exactly when the driver is due
+            self.clock.advance(self.clock.getDelayedCalls()[0].getTime() - self.clock.seconds())
+        self.assertEqual(range(200), sorted(fired))
+        self.assertEqual(0, wheel.get_stats()["pending"])
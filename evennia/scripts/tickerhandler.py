@@ -49,21 +49,40 @@ class MyTickerHandler(TickerHandler):
     ticker_pool_class = MyTickerPool
 ```
 
+A ticker with many subscribers can spread them over its interval
+rather than calling them all at once, by setting `time_slices` on the
+Ticker class. A `time_budget` makes the ticker hand control back to
+the reactor during long sweeps:
+
+```python
+class MySlicedTicker(Ticker):
+    time_slices = 10     # call a tenth of the subscribers every interval/10
+    time_budget = 0.05   # yield to the reactor every 50 ms
+```
+
 If one wants to duplicate TICKER_HANDLER's auto-saving feature in
 a  custom handler one can make a custom `AT_STARTSTOP_MODULE` entry to
 call the handler's `save()` and `restore()` methods when the server reboots.
 
 """
+from collections import defaultdict
+from random import random
+from time import time
+from twisted.internet import reactor
 from twisted.internet.defer import inlineCallbacks
+from twisted.internet.task import deferLater
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from evennia.scripts.scripts import ExtendedLoopingCall
 from evennia.server.models import ServerConfig
 from evennia.utils.logger import log_trace, log_err
-from evennia.utils.dbserialize import dbserialize, dbunserialize, pack_dbobj, unpack_dbobj
+from evennia.utils.dbserialize import dbserialize, dbunserialize, pack_dbobj, unpack_dbobjs
 
 _GA = object.__getattribute__
 _SA = object.__setattr__
 
+_SAVE_DELAY = settings.TICKER_SAVE_DELAY
+
 
 _ERROR_ADD_INTERVAL = \
 """TickerHandler: Tried to add a ticker with invalid interval:
@@ -76,7 +95,53 @@ class Ticker(object):
     Represents a repeatedly running task that calls
     hooks repeatedly. Overload `_callback` to change the
     way it operates.
+
+    Set `prefetch_attributes` on a child class to have the Attributes
+    of all subscribers loaded in bulk before they are called (use the
+    `ticker_class` of the TickerPool to make use of the child class).
+
+    Set `time_slices` to split the subscribers into that many evenly
+    sized groups, called one at a time at evenly spaced moments of the
+    interval, so each subscriber is still called once per interval.
+    Sliced tickers also start at a random point of their first slice,
+    so tickers of different intervals don't all fire together. Set
+    `time_budget` (in seconds) to let the reactor handle other events
+    whenever a sweep over the subscribers has run that long.
     """
+    prefetch_attributes = False
+    time_slices = 1
+    time_budget = None
+
+    def _prefetch_attributes(self, store_keys):
+        """
+        Fill the Attribute caches of subscribers, with one query
+        per type of database model subscribing.
+
+        Args:
+            store_keys (list): The subscriptions to prefetch for.
+
+        """
+        objs_by_model = defaultdict(list)
+        for store_key in store_keys:
+            obj = self.subscriptions[store_key][0]
+            if obj and hasattr(obj, "__dbclass__"):
+                objs_by_model[obj.__dbclass__].append(obj)
+        for dbclass, objs in objs_by_model.items():
+            dbclass.objects.prefetch_attributes(objs)
+
+    def _next_sweep(self):
+        """
+        Get the subscriptions to call this time.
+
+        Returns:
+            store_keys (list): The subscriptions of the next slice.
+
+        """
+        if self.slices == 1:
+            return self.subscriptions.keys()
+        store_keys = list(self.buckets[self.next_bucket])
+        self.next_bucket = (self.next_bucket + 1) % self.slices
+        return store_keys
 
     @inlineCallbacks
     def _callback(self):
@@ -92,25 +157,55 @@ class Ticker(object):
         can yield appropriately.
 
         The _hook_key, which is passed down through the handler via
-        kwargs is used here to identify which hook method to call.
+        kwargs, is stored separately by `add` and is used here to
+        identify which hook method to call.
 
         """
-        for store_key, (obj, args, kwargs) in self.subscriptions.items():
-            hook_key = yield kwargs.pop("_hook_key", "at_tick")
+        store_keys = self._next_sweep()
+        if self.prefetch_attributes:
+            try:
+                self._prefetch_attributes(store_keys)
+            except Exception:
+                log_trace()
+        sweep_start = turn_start = time()
+        for store_key in store_keys:
+            try:
+                obj, args, kwargs = self.subscriptions[store_key]
+            except KeyError:
+                # unsubscribed during the sweep
+                continue
             if not obj or not obj.pk:
                 # object was deleted between calls
                 self.remove(store_key)
                 continue
             try:
-                yield _GA(obj, hook_key)(*args, **kwargs)
+                yield _GA(obj, self.hook_keys[store_key])(*args, **kwargs)
             except ObjectDoesNotExist:
                 log_trace()
                 self.remove(store_key)
             except Exception:
                 log_trace()
-            finally:
-                # make sure to re-store
-                kwargs["_hook_key"] = hook_key
+            if self.time_budget and time() - turn_start > self.time_budget:
+                # let the reactor handle other things for a while
+                yield deferLater(reactor, 0, lambda: None)
+                turn_start = time()
+        self._update_stats(time() - sweep_start)
+
+    def _update_stats(self, sweep_time):
+        """
+        Store timing statistics after a sweep.
+
+        Args:
+            sweep_time (float): The time the sweep took, in seconds.
+
+        """
+        stats = self.stats
+        stats["sweeps"] += 1
+        stats["last_sweep_time"] = sweep_time
+        stats["max_sweep_time"] = max(stats["max_sweep_time"], sweep_time)
+        if sweep_time > float(self.interval) / self.slices:
+            # the sweep took longer than the time to the next one
+            stats["overruns"] += 1
 
     def __init__(self, interval):
         """
@@ -122,6 +217,13 @@ class Ticker(object):
         """
         self.interval = interval
         self.subscriptions = {}
+        self.hook_keys = {}
+        # subscriptions per time slice
+        self.slices = max(1, int(self.time_slices))
+        self.buckets = [set() for _ in range(self.slices)]
+        self.next_bucket = 0
+        self.stats = {"sweeps": 0, "last_sweep_time": 0.0,
+                      "max_sweep_time": 0.0, "overruns": 0}
         # set up a twisted asynchronous repeat call
         self.task = ExtendedLoopingCall(self._callback)
 
@@ -135,15 +237,14 @@ class Ticker(object):
 
         """
         subs = self.subscriptions
-        if None in subs.values():
-            # clean out objects that may have been deleted
-            subs = dict((store_key, obj) for store_key, obj in subs if obj)
-            self.subscriptions = subs
         if self.task.running:
             if not subs:
                 self.task.stop()
         elif subs:
-            self.task.start(self.interval, now=False, start_delay=start_delay)
+            interval = float(self.interval) / self.slices if self.slices > 1 else self.interval
+            if start_delay is None and self.slices > 1:
+                start_delay = random() * interval
+            self.task.start(interval, now=False, start_delay=start_delay)
 
     def add(self, store_key, obj, *args, **kwargs):
         """
@@ -162,6 +263,10 @@ class Ticker(object):
 
         """
         start_delay = kwargs.pop("_start_delay", None)
+        self.hook_keys[store_key] = kwargs.pop("_hook_key", "at_tick")
+        if store_key not in self.subscriptions:
+            # put in the emptiest slice
+            min(self.buckets, key=len).add(store_key)
         self.subscriptions[store_key] = (obj, args, kwargs)
         self.validate(start_delay=start_delay)
 
@@ -173,7 +278,10 @@ class Ticker(object):
             store_key (str): Unique store key.
 
         """
-        self.subscriptions.pop(store_key, False)
+        if self.subscriptions.pop(store_key, False):
+            self.hook_keys.pop(store_key, None)
+            for bucket in self.buckets:
+                bucket.discard(store_key)
         self.validate()
 
     def stop(self):
@@ -182,8 +290,27 @@ class Ticker(object):
 
         """
         self.subscriptions = {}
+        self.hook_keys = {}
+        self.buckets = [set() for _ in range(self.slices)]
         self.validate()
 
+    def get_stats(self):
+        """
+        Get timing statistics for this ticker.
+
+        Returns:
+            stats (dict): The number of `subscribers` and `slices`, the
+                number of `sweeps` run, the `last_sweep_time` and
+                `max_sweep_time` in seconds and the number of
+                `overruns`, sweeps taking longer than the time until
+                the next one was due.
+
+        """
+        stats = dict(self.stats)
+        stats["subscribers"] = len(self.subscriptions)
+        stats["slices"] = self.slices
+        return stats
+
 
 class TickerPool(object):
     """
@@ -281,6 +408,7 @@ class TickerHandler(object):
         self.ticker_storage = {}
         self.save_name = save_name
         self.ticker_pool = self.ticker_pool_class()
+        self.save_task = None
 
     def _store_key(self, obj, interval, idstring=""):
         """
@@ -310,6 +438,17 @@ class TickerHandler(object):
         # return sidb and store_key
         return isdb, (objkey, interval, idstring)
 
+    def _schedule_save(self):
+        """
+        Save soon, after `settings.TICKER_SAVE_DELAY` seconds, so that
+        many changes in a row are saved together.
+
+        """
+        if _SAVE_DELAY is None:
+            self.save()
+        elif not (self.save_task and self.save_task.active()):
+            self.save_task = reactor.callLater(_SAVE_DELAY, self.save)
+
     def save(self):
         """
         Save ticker_storage as a serialized string into a temporary
@@ -318,6 +457,10 @@ class TickerHandler(object):
         will be saved so it can start over from that point.
 
         """
+        if self.save_task and self.save_task.active():
+            # we are saving now, no need for the scheduled save
+            self.save_task.cancel()
+        self.save_task = None
         if self.ticker_storage:
             start_delays = dict((interval, ticker.task.next_call_time())
                                  for interval, ticker in self.ticker_pool.tickers.items())
@@ -345,9 +488,11 @@ class TickerHandler(object):
         if ticker_storage:
             self.ticker_storage = dbunserialize(ticker_storage)
             #print "restore:", self.ticker_storage
-            for store_key, (args, kwargs) in self.ticker_storage.items():
-                obj, interval, idstring = store_key
-                obj = unpack_dbobj(obj)
+            subscriptions = self.ticker_storage.items()
+            # load all subscribing objects in bulk
+            objs = unpack_dbobjs([store_key[0] for store_key, _ in subscriptions])
+            for obj, (store_key, (args, kwargs)) in zip(objs, subscriptions):
+                _, interval, idstring = store_key
                 _, store_key = self._store_key(obj, interval, idstring)
                 self.ticker_pool.add(store_key, obj, interval, *args, **kwargs)
 
@@ -380,7 +525,7 @@ class TickerHandler(object):
         isdb, store_key = self._store_key(obj, interval, idstring)
         if isdb:
             self.ticker_storage[store_key] = (args, kwargs)
-            self.save()
+            self._schedule_save()
         kwargs["_hook_key"] = hook_key
         self.ticker_pool.add(store_key, obj, interval, *args, **kwargs)
 
@@ -401,7 +546,7 @@ class TickerHandler(object):
             isdb, store_key = self._store_key(obj, interval, idstring)
             if isdb:
                 self.ticker_storage.pop(store_key, None)
-                self.save()
+                self._schedule_save()
             self.ticker_pool.remove(store_key, interval)
         else:
             # remove all objects with any intervals
@@ -414,7 +559,7 @@ class TickerHandler(object):
                     should_save = True
                 self.ticker_pool.remove(store_key, interval)
             if should_save:
-                self.save()
+                self._schedule_save()
 
 
 
@@ -437,7 +582,18 @@ class TickerHandler(object):
                                         if store_key[1] != interval)
         else:
             self.ticker_storage = {}
-        self.save()
+        self._schedule_save()
+
+    def get_stats(self):
+        """
+        Get timing statistics of all tickers.
+
+        Returns:
+            stats (dict): `{interval: stats, ...}`, see `Ticker.get_stats`.
+
+        """
+        return dict((interval, ticker.get_stats())
+                    for interval, ticker in self.ticker_pool.tickers.items())
 
     def all(self, interval=None):
         """
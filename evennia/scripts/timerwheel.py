@@ -0,0 +1,353 @@
+"""
+Timer wheel
+
+The timer wheel is a shared scheduler for the timers of Scripts and
+the TickerHandler. Rather than each `ExtendedLoopingCall` putting its
+own `DelayedCall` in the reactor, they all schedule their calls in
+the wheel, which is driven by a single reactor timer.
+
+The wheel is hierarchical: the first level has one slot per tick
+(`settings.SCRIPT_TIMER_RESOLUTION` seconds), each following level
+has slots covering a full turn of the level below it. Calls are
+sorted into the slot of the level matching how far in the future
+they are and are moved down a level ("cascaded") as their time
+approaches. Scheduling and cancelling a call are both O(1), no
+matter how many calls are pending. Calls fire on the first tick at
+or after their due time, so they may be up to one tick late. The
+driver only wakes up on ticks that have calls due, or at the latest
+once per turn of the first level to cascade the levels above.
+
+The wheel offers the parts of the reactor's `IReactorTime` interface
+used by `LoopingCall` (`seconds` and `callLater`), so it can be used
+as the `clock` of one:
+
+```python
+    from evennia.scripts.timerwheel import TIMER_WHEEL
+
+    task = LoopingCall(myfunc)
+    task.clock = TIMER_WHEEL
+    task.start(10)
+```
+
+`TIMER_WHEEL.get_stats()` reports how far behind schedule the wheel
+runs, which is a measure of how loaded the reactor is.
+
+"""
+from math import ceil
+from django.conf import settings
+from twisted.internet.error import AlreadyCalled, AlreadyCancelled
+from evennia.utils import logger
+
+_RESOLUTION = settings.SCRIPT_TIMER_RESOLUTION
+
+# the first level has 256 slots, the others 64 each
+_ROOT_BITS = 8
+_LEVEL_BITS = 6
+_NLEVELS = 5
+_ROOT_SIZE = 1 << _ROOT_BITS
+_ROOT_MASK = _ROOT_SIZE - 1
+_LEVEL_SIZE = 1 << _LEVEL_BITS
+_LEVEL_MASK = _LEVEL_SIZE - 1
+_MAX_DELTA = 1 << (_ROOT_BITS + (_NLEVELS - 1) * _LEVEL_BITS)
+# guards against float rounding when converting times to ticks
+_EPSILON = 1e-9
+
+
+class WheelCall(object):
+    """
+    A call scheduled in the timer wheel. This mimics the parts of
+    Twisted's `DelayedCall` used by `LoopingCall`.
+
+    """
+    def __init__(self, wheel, time, func, args, kwargs):
+        """
+        Set up the call.
+
+        Args:
+            wheel (TimerWheel): The wheel the call is scheduled in.
+            time (float): The time to fire, in reactor seconds.
+            func (callable): The function to call.
+            args (tuple): Arguments to `func`.
+            kwargs (dict): Keyword arguments to `func`.
+
+        """
+        self.wheel = wheel
+        self.time = time
+        self.expires = wheel._tick_at(time)
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.slot = None
+        self.called = False
+        self.cancelled = False
+
+    def getTime(self):
+        """
+        Get when this call is due.
+
+        Returns:
+            time (float): The time to fire, in reactor seconds.
+
+        """
+        return self.time
+
+    def active(self):
+        """
+        Check if this call is still pending.
+
+        Returns:
+            active (bool): If the call has neither fired nor been
+                cancelled.
+
+        """
+        return not (self.called or self.cancelled)
+
+    def cancel(self):
+        """
+        Cancel the call.
+
+        Raises:
+            AlreadyCancelled: If the call was already cancelled.
+            AlreadyCalled: If the call has already fired.
+
+        """
+        if self.cancelled:
+            raise AlreadyCancelled
+        if self.called:
+            raise AlreadyCalled
+        self.cancelled = True
+        self.wheel._remove(self)
+
+
+class TimerWheel(object):
+    """
+    A hierarchical timing wheel, driven by a reactor timer while
+    there are calls pending.
+
+    """
+    def __init__(self, resolution=0.1, clock=None):
+        """
+        Set up the wheel.
+
+        Args:
+            resolution (float, optional): The length of a tick, in
+                seconds.
+            clock (IReactorTime, optional): What drives the wheel.
+                Defaults to the reactor.
+
+        """
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self.clock = clock
+        self.resolution = resolution
+        self.origin = clock.seconds()
+        # the next tick to run
+        self.tick = 0
+        self.wheels = [[set() for _ in xrange(_ROOT_SIZE)]] + \
+                      [[set() for _ in xrange(_LEVEL_SIZE)] for _ in xrange(_NLEVELS - 1)]
+        self.count = 0
+        self.driver = None
+        self.driver_tick = None
+        self.running = False
+        self.stats = {"ticks": 0, "calls": 0, "last_lag": 0.0, "max_lag": 0.0}
+
+    def _tick_at(self, time):
+        """
+        Get the first tick at or after a given time.
+
+        """
+        return int(ceil((time - self.origin) / self.resolution - _EPSILON))
+
+    def _add(self, call):
+        """
+        Put a call in the slot matching its expiry tick.
+
+        """
+        expires = call.expires
+        delta = expires - self.tick
+        if delta < 0:
+            # overdue; run on the next tick
+            slot = self.wheels[0][self.tick & _ROOT_MASK]
+        elif delta < _ROOT_SIZE:
+            slot = self.wheels[0][expires & _ROOT_MASK]
+        else:
+            if delta >= _MAX_DELTA:
+                # beyond the wheel; park it in the furthest slot, it
+                # will be re-sorted when that slot is cascaded.
+                delta = _MAX_DELTA - 1
+                expires = self.tick + delta
+            level, shift = 1, _ROOT_BITS
+            while delta >= 1 << (shift + _LEVEL_BITS):
+                level += 1
+                shift += _LEVEL_BITS
+            slot = self.wheels[level][(expires >> shift) & _LEVEL_MASK]
+        slot.add(call)
+        call.slot = slot
+
+    def _remove(self, call):
+        """
+        Remove a cancelled call from its slot.
+
+        """
+        if call.slot is not None:
+            call.slot.discard(call)
+            call.slot = None
+            self.count -= 1
+
+    def _cascade(self, level, index):
+        """
+        Re-sort the calls of a slot into the levels below it.
+
+        """
+        calls = self.wheels[level][index]
+        self.wheels[level][index] = set()
+        for call in calls:
+            self._add(call)
+
+    def _run_tick(self):
+        """
+        Run the calls due on the current tick and advance the wheel.
+
+        """
+        index = self.tick & _ROOT_MASK
+        if not index:
+            # a full turn of the first level; cascade the next slot of
+            # each level, moving upwards as long as they turn over too.
+            shift = _ROOT_BITS
+            for level in xrange(1, _NLEVELS):
+                lindex = (self.tick >> shift) & _LEVEL_MASK
+                self._cascade(level, lindex)
+                if lindex:
+                    break
+                shift += _LEVEL_BITS
+        self.tick += 1
+        calls = self.wheels[0][index]
+        self.wheels[0][index] = set()
+        while calls:
+            # popping means calls cancelled by other calls of this
+            # tick are skipped
+            call = calls.pop()
+            call.slot = None
+            call.called = True
+            self.count -= 1
+            self.stats["calls"] += 1
+            try:
+                call.func(*call.args, **call.kwargs)
+            except Exception:
+                logger.log_trace()
+
+    def _next_tick(self):
+        """
+        Find the next tick with anything to do; either a tick with
+        calls due or the end of the current turn of the first level.
+
+        """
+        if not self.tick & _ROOT_MASK:
+            return self.tick
+        end = (self.tick | _ROOT_MASK) + 1
+        root = self.wheels[0]
+        for tick in xrange(self.tick, end):
+            if root[tick & _ROOT_MASK]:
+                return tick
+        return end
+
+    def _run(self):
+        """
+        Called by the driver timer. Runs all ticks that are due.
+
+        """
+        self.driver = None
+        self.running = True
+        try:
+            now = self.clock.seconds()
+            target = int((now - self.origin) / self.resolution + _EPSILON)
+            # the driver fires at or after its tick; don't let float
+            # rounding of large reactor times put that tick in the future
+            target = max(target, self.driver_tick)
+            lag = max(0.0, now - (self.origin + self.driver_tick * self.resolution))
+            self.stats["last_lag"] = lag
+            self.stats["max_lag"] = max(self.stats["max_lag"], lag)
+            while self.count and self.tick <= target:
+                self._run_tick()
+                self.stats["ticks"] += 1
+        finally:
+            self.running = False
+        self._drive()
+
+    def _drive(self, tick=None):
+        """
+        Make sure the driver timer wakes up in time while there are
+        calls pending.
+
+        Args:
+            tick (int, optional): A tick that just got a call due. If
+                not given, look for the next tick with calls due.
+
+        """
+        if not self.count or self.running:
+            return
+        if self.driver:
+            if tick is None or tick >= self.driver_tick:
+                return
+            self.driver.cancel()
+        elif tick is None:
+            tick = self._next_tick()
+        else:
+            tick = min(tick, self._next_tick())
+        self.driver_tick = tick
+        delay = self.origin + tick * self.resolution - self.clock.seconds()
+        self.driver = self.clock.callLater(max(0, delay), self._run)
+
+    def seconds(self):
+        """
+        Get the current time.
+
+        Returns:
+            time (float): The current time, in reactor seconds.
+
+        """
+        return self.clock.seconds()
+
+    def callLater(self, delay, func, *args, **kwargs):
+        """
+        Schedule a call.
+
+        Args:
+            delay (float): Seconds until the call should fire.
+            func (callable): The function to call.
+            *args: Arguments to `func`.
+            **kwargs: Keyword arguments to `func`.
+
+        Returns:
+            call (WheelCall): The scheduled call. Use its `cancel`
+                method to remove it again.
+
+        """
+        now = self.clock.seconds()
+        if not self.count:
+            # the wheel is empty, so we can skip ahead to the present
+            self.tick = max(self.tick, self._tick_at(now))
+        call = WheelCall(self, now + max(0, delay), func, args, kwargs)
+        self._add(call)
+        self.count += 1
+        self._drive(max(call.expires, self.tick))
+        return call
+
+    def get_stats(self):
+        """
+        Get statistics for the wheel.
+
+        Returns:
+            stats (dict): The number of `pending` calls, the number of
+                `ticks` run and `calls` made, and the `last_lag` and
+                `max_lag` in seconds, how far behind schedule the wheel
+                was when it last ran and at most.
+
+        """
+        stats = dict(self.stats)
+        stats["pending"] = self.count
+        return stats
+
+
+# shared wheel for all script and ticker timers
+TIMER_WHEEL = TimerWheel(_RESOLUTION) if _RESOLUTION else None
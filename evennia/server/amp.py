@@ -29,6 +29,7 @@ except ImportError:
 from twisted.protocols import amp
 from twisted.internet import protocol, reactor
 from twisted.internet.defer import Deferred
+from django.conf import settings
 from evennia.utils.utils import to_str, variable_from_module
 
 # communication bits
@@ -54,6 +55,24 @@ _MSGBUFFER = defaultdict(list)
 
 import zlib
 
+# payload compression. The first byte on the wire tells how the rest
+# is encoded, so the receiver does not need to know the sender's settings.
+_COMPRESS_THRESHOLD = settings.AMP_COMPRESSION_THRESHOLD
+_COMPRESS_LEVEL = max(1, min(9, settings.AMP_COMPRESSION_LEVEL))
+_COMPRESS_DICTIONARY = settings.AMP_COMPRESSION_DICTIONARY
+_FLAG_RAW = chr(0)
+_FLAG_ZLIB = chr(1)
+_FLAG_ZLIB_DICT = 0x10  # + compression level
+_FLAG_LEGACY = chr(0x78)  # start of a plain zlib stream from older versions
+_DICT_WBITS = 13
+_DICT_MEMLEVEL = 6
+
+# compression statistics, for payloads sent and received by this process
+COMPRESSION_STATS = {"sent": {"payloads": 0, "compressed": 0, "raw_bytes": 0,
+                              "wire_bytes": 0, "time": 0.0},
+                     "received": {"payloads": 0, "compressed": 0, "raw_bytes": 0,
+                                  "wire_bytes": 0, "time": 0.0}}
+
 def get_restart_mode(restart_file):
     """
     Parse the server/portal restart status
@@ -232,15 +251,48 @@ class Compressed(amp.String):
 
     def toString(self, inObject):
         """
-        Convert to send on the wire, with compression.
+        Convert to send on the wire, with compression if the
+        data is larger than `settings.AMP_COMPRESSION_THRESHOLD`.
         """
-        return zlib.compress(inObject, 9)
+        t0 = time()
+        if len(inObject) < _COMPRESS_THRESHOLD:
+            outString = _FLAG_RAW + inObject
+        elif _COMPRESS_DICTIONARY:
+            compressor = _primed_codec(_COMPRESS_LEVEL)[0].copy()
+            outString = chr(_FLAG_ZLIB_DICT + _COMPRESS_LEVEL) + \
+                        compressor.compress(inObject) + compressor.flush()
+        else:
+            outString = _FLAG_ZLIB + zlib.compress(inObject, _COMPRESS_LEVEL)
+        stats = COMPRESSION_STATS["sent"]
+        stats["time"] += time() - t0
+        stats["payloads"] += 1
+        stats["compressed"] += outString[0] != _FLAG_RAW
+        stats["raw_bytes"] += len(inObject)
+        stats["wire_bytes"] += len(outString)
+        return outString
 
     def fromString(self, inString):
         """
         Convert (decompress) from the wire to Python.
         """
-        return zlib.decompress(inString)
+        t0 = time()
+        flag = inString[:1]
+        if flag == _FLAG_RAW:
+            outObject = inString[1:]
+        elif flag == _FLAG_ZLIB:
+            outObject = zlib.decompress(inString[1:])
+        elif flag == _FLAG_LEGACY:
+            outObject = zlib.decompress(inString)
+        else:
+            decompressor = _primed_codec(ord(flag) - _FLAG_ZLIB_DICT)[1].copy()
+            outObject = decompressor.decompress(inString[1:]) + decompressor.flush()
+        stats = COMPRESSION_STATS["received"]
+        stats["time"] += time() - t0
+        stats["payloads"] += 1
+        stats["compressed"] += flag != _FLAG_RAW
+        stats["raw_bytes"] += len(outObject)
+        stats["wire_bytes"] += len(inString)
+        return outObject
 
 
 class MsgPortal2Server(amp.Command):
@@ -265,6 +317,21 @@ class MsgServer2Portal(amp.Command):
     response = []
 
 
+class MsgServer2PortalBatch(amp.Command):
+    """
+    Batched messages Server -> Portal
+
+    Carries all messages sent to the Portal during one reactor
+    iteration as a list `[(sessids, kwargs), ...]`, where sessions
+    receiving the same message share one entry.
+
+    """
+    key = "MsgServer2PortalBatch"
+    arguments = [('packed_data', Compressed())]
+    errors = [(Exception, 'EXCEPTION')]
+    response = []
+
+
 class AdminPortal2Server(amp.Command):
     """
     Administration Portal -> Server
@@ -316,6 +383,60 @@ dumps = lambda data: to_str(pickle.dumps(to_str(data), pickle.HIGHEST_PROTOCOL))
 loads = lambda data: pickle.loads(to_str(data))
 
 
+# Preset dictionary for AMP compression; common fragments of
+# pickled messages and MUD text. Changing this breaks communication
+# with a Portal/Server using another version of it.
+
+_PRESET_DICTIONARY = "".join(
+    [dumps((1, {"text": "You say, \"Hello!\""})),
+     dumps([([1, 2], {"text": "Someone says, \"Hello!\""})]),
+     dumps((1, {"operation": PCONNSYNC, "sessiondata": {
+         "protocol_key": "telnet", "address": "127.0.0.1", "suid": None,
+         "sessid": 1, "uid": 1, "uname": "Player", "logged_in": True,
+         "puid": None, "encoding": "utf-8", "screenreader": False,
+         "conn_time": 0, "cmd_last": 0, "cmd_last_visible": 0, "cmd_total": 0,
+         "protocol_flags": {}, "server_data": {}, "cmdset_storage_string": ""}})),
+     "\x1b[0m\x1b[1m\x1b[22m\x1b[31m\x1b[32m\x1b[33m\x1b[34m\x1b[35m"
+     "\x1b[36m\x1b[37m\r\n{n{w{x{r{g{y{b{m{c|n|w|x|r|g|y|b|m|c",
+     "Exits: north, south, east, west, up, down\r\n",
+     "You see: \r\nCharacters: \r\n",
+     " has arrived. has left. says, \" You say, \" is here. ",
+     "You are carrying: You pick up You drop You get You give ",
+     "You cannot You can't Command '' is not available. Type \"help\" for help.",
+     "[Public] [Help] has connected. has disconnected. "
+     "the the a an and of to you your is are with from in on at "])
+
+
+_PRIMED_CODECS = {}
+
+
+def _primed_codec(level):
+    """
+    Get compressor and decompressor objects primed with the preset
+    dictionary. Copies of these are used for each payload.
+
+    Args:
+        level (int): The zlib compression level, 1-9.
+
+    Returns:
+        codec (tuple): `(compressor, decompressor)`.
+
+    Notes:
+        The zlib module of Python 2 does not support preset dictionaries
+        directly, so both sides instead process the dictionary as the
+        start of the stream. Back-references to it then work the same.
+
+    """
+    codec = _PRIMED_CODECS.get(level)
+    if codec is None:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, _DICT_WBITS, _DICT_MEMLEVEL)
+        head = compressor.compress(_PRESET_DICTIONARY) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        decompressor = zlib.decompressobj(_DICT_WBITS)
+        decompressor.decompress(head)
+        codec = _PRIMED_CODECS[level] = (compressor, decompressor)
+    return codec
+
+
 #------------------------------------------------------------
 # Core AMP protocol for communication Server <-> Portal
 #------------------------------------------------------------
@@ -344,6 +465,16 @@ class AMPProtocol(amp.AMP):
         self.send_reset_time = time()
         self.send_mode = True
         self.send_task = None
+        # outgoing Server->Portal messages waiting to be sent, as a
+        # list [(sessids, kwargs), ...]. The positions map each session
+        # and text to the index of the last entry they are part of, so
+        # a message is only merged into an entry later than the
+        # session's previous message.
+        self.msg_batch = []
+        self.msg_batch_sessid_positions = {}
+        self.msg_batch_text_positions = {}
+        self.msg_batch_call = None
+        self.msg_batch_stats = {"messages": 0, "entries": 0, "batches": 0}
 
     def connectionMade(self):
         """
@@ -395,9 +526,12 @@ class AMPProtocol(amp.AMP):
 
         Notes:
             Data will be sent across the wire pickled as a tuple
-            (sessid, kwargs).
+            (sessid, kwargs). Eventual batched messages are sent
+            first, to keep the order of operations.
 
         """
+        if self.msg_batch:
+            self.send_MsgServer2PortalBatch()
         return self.callRemote(command,
                                packed_data=dumps((sessid, kwargs))
                                ).addErrback(self.errback, command.key)
@@ -469,9 +603,79 @@ class AMPProtocol(amp.AMP):
             msg (str, optional): Message to send over the wire.
             kwargs (any, optiona): Extra data.
 
+        Notes:
+            The message is not sent immediately but added to a batch
+            sent at the end of the current reactor iteration. An
+            identical message to several sessions is only sent (and
+            serialized) once.
+
         """
         #print "msg server->portal (server side):", sessid, msg, data
-        return self.send_data(MsgServer2Portal, sessid, text=text, **kwargs)
+        kwargs["text"] = text
+        batch = self.msg_batch
+        positions = self.msg_batch_sessid_positions
+        self.msg_batch_stats["messages"] += 1
+        try:
+            ipos = self.msg_batch_text_positions.get(text, -1)
+        except TypeError:
+            # unhashable text
+            ipos = -1
+        if ipos > positions.get(sessid, -1) and batch[ipos][1] == kwargs:
+            batch[ipos][0].append(sessid)
+        else:
+            batch.append(([sessid], kwargs))
+            ipos = len(batch) - 1
+            try:
+                self.msg_batch_text_positions[text] = ipos
+            except TypeError:
+                pass
+        positions[sessid] = ipos
+        if not self.msg_batch_call:
+            self.msg_batch_call = reactor.callLater(0, self.send_MsgServer2PortalBatch)
+
+    def send_MsgServer2PortalBatch(self):
+        """
+        Send all batched messages to the Portal. This is called
+        automatically once per reactor iteration in which messages
+        were sent, but may also be called to send directly.
+
+        Returns:
+            deferred (Deferred or None): Asynchronous return, if
+                anything was sent.
+
+        """
+        if self.msg_batch_call and self.msg_batch_call.active():
+            self.msg_batch_call.cancel()
+        self.msg_batch_call = None
+        batch = self.msg_batch
+        if not batch:
+            return None
+        self.msg_batch = []
+        self.msg_batch_sessid_positions = {}
+        self.msg_batch_text_positions = {}
+        self.msg_batch_stats["entries"] += len(batch)
+        self.msg_batch_stats["batches"] += 1
+        return self.callRemote(MsgServer2PortalBatch,
+                               packed_data=dumps(batch)
+                               ).addErrback(self.errback, MsgServer2PortalBatch.key)
+
+    @MsgServer2PortalBatch.responder
+    def portal_receive_server2portal_batch(self, packed_data):
+        """
+        Receives batched messages arriving to Portal from
+        Server. This method is executed on the Portal.
+
+        Args:
+            packed_data (str): Pickled list `[(sessids, kwargs), ...]`.
+
+        """
+        portal_sessionhandler = self.factory.portal.sessions
+        for sessids, kwargs in loads(packed_data):
+            if len(sessids) > 1:
+                portal_sessionhandler.broadcast(sessids, **kwargs)
+            else:
+                portal_sessionhandler.data_out(sessids[0], **kwargs)
+        return {}
 
     # Server administration from the Portal side
     @AdminPortal2Server.responder
@@ -641,6 +845,8 @@ class AMPProtocol(amp.AMP):
             function call
 
         """
+        if self.msg_batch:
+            self.send_MsgServer2PortalBatch()
         return self.callRemote(FunctionCall,
                                module=modulepath,
                                function=functionname,
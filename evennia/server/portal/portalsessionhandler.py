@@ -15,12 +15,64 @@ _MOD_IMPORT = None
 # throttles
 _MAX_CONNECTION_RATE = float(settings.MAX_CONNECTION_RATE)
 _MAX_COMMAND_RATE = float(settings.MAX_COMMAND_RATE)
+_MAX_SESSION_COMMAND_RATE = float(settings.MAX_SESSION_COMMAND_RATE)
+_MAX_SESSION_COMMAND_BURST = max(1.0, float(settings.MAX_SESSION_COMMAND_BURST))
+_MAX_SESSION_COMMAND_QUEUE = settings.MAX_SESSION_COMMAND_QUEUE
 
 _MIN_TIME_BETWEEN_CONNECTS = 1.0 / float(settings.MAX_CONNECTION_RATE)
 _ERROR_COMMAND_OVERFLOW = settings.COMMAND_RATE_WARNING
 
 _CONNECTION_QUEUE = deque()
 
+
+class CommandThrottle(object):
+    """
+    Token bucket limiting the input rate of one session. Each
+    command uses up one token and tokens are refilled at a fixed
+    rate, up to a maximum burst size. Input arriving when the
+    bucket is empty is queued.
+
+    """
+    def __init__(self, rate, burst):
+        """
+        Args:
+            rate (float): Tokens refilled per second.
+            burst (float): Maximum number of tokens.
+
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time()
+        self.queue = deque()
+        # statistics
+        self.received = 0
+        self.queued = 0
+        self.dropped = 0
+
+    def refill(self, now):
+        """
+        Refill tokens for the time passed since last refill.
+
+        Args:
+            now (float): The current time.
+
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def stats(self):
+        """
+        Get throttle statistics.
+
+        Returns:
+            stats (dict): Number of commands `received`, `queued`,
+                `dropped` and currently `pending` in the queue.
+
+        """
+        return {"received": self.received, "queued": self.queued,
+                "dropped": self.dropped, "pending": len(self.queue)}
+
 #------------------------------------------------------------
 # Portal-SessionHandler class
 #------------------------------------------------------------
@@ -43,15 +95,20 @@ class PortalSessionHandler(SessionHandler):
         """
         self.portal = None
         self.sessions = {}
+        # webclient sessions by suid
+        self.suid_index = {}
         self.latest_sessid = 0
         self.uptime = time()
         self.connection_time = 0
 
         self.connection_last = time()
         self.connection_task = None
-        self.command_counter = 0
-        self.command_counter_reset = time()
-        self.command_overflow = False
+        # input throttling; per session and a global backstop
+        self.command_throttles = {}
+        self.command_global_throttle = CommandThrottle(_MAX_COMMAND_RATE, max(1.0, _MAX_COMMAND_RATE))
+        self.command_drain_task = None
+        # rendered output shared by all sessions during a broadcast
+        self.render_cache = None
 
     def at_server_connection(self):
         """
@@ -109,6 +166,8 @@ class PortalSessionHandler(SessionHandler):
             sessdata = session.get_sync_data()
 
             self.sessions[session.sessid] = session
+            if getattr(session, "suid", None):
+                self.suid_index[session.suid] = session.sessid
             session.server_connected = True
             #print "connecting", session.sessid, " number:", len(self.sessions)
             self.portal.amp_protocol.send_AdminPortal2Server(session.sessid,
@@ -160,6 +219,7 @@ class PortalSessionHandler(SessionHandler):
             _CONNECTION_QUEUE.remove(session)
             return
         sessid = session.sessid
+        self.command_throttles.pop(sessid, None)
         self.portal.amp_protocol.send_AdminPortal2Server(sessid,
                                                          operation=PDISCONN)
 
@@ -205,11 +265,14 @@ class PortalSessionHandler(SessionHandler):
 
         """
         session = self.sessions.get(sessid, None)
+        self.command_throttles.pop(sessid, None)
         if session:
             session.disconnect(reason)
             if sessid in self.sessions:
                 # in case sess.disconnect doesn't delete it
                 del self.sessions[sessid]
+            if getattr(session, "suid", None):
+                self.suid_index.pop(session.suid, None)
             del session
 
     def server_disconnect_all(self, reason=""):
@@ -224,6 +287,8 @@ class PortalSessionHandler(SessionHandler):
             session.disconnect(reason)
             del session
         self.sessions = {}
+        self.suid_index = {}
+        self.command_throttles = {}
 
     def server_logged_in(self, sessid, data):
         """
@@ -285,9 +350,16 @@ class PortalSessionHandler(SessionHandler):
         Returns:
             session (list): The matching session, if found.
 
+        Notes:
+            Sessions are looked up through an index by suid. Entries
+            of sessions no longer connected are removed on lookup.
+
         """
-        return [sess for sess in self.get_sessions(include_unloggedin=True)
-                if hasattr(sess, 'suid') and sess.suid == suid]
+        sess = self.sessions.get(self.suid_index.get(suid))
+        if sess and getattr(sess, 'suid', None) == suid:
+            return [sess]
+        self.suid_index.pop(suid, None)
+        return []
 
     def announce_all(self, message):
         """
@@ -378,37 +450,114 @@ class PortalSessionHandler(SessionHandler):
             kwargs (any): Other data from protocol.
 
         Notes:
-            Data is serialized before passed on.
+            Data is serialized before passed on. Input is throttled per
+            session (see `settings.MAX_SESSION_COMMAND_RATE`); input
+            arriving too fast is queued and passed on later.
 
         """
         #from evennia.server.profiling.timetrace import timetrace
         #text = timetrace(text, "portalsessionhandler.data_in")
 
-        if session:
-            if self.command_counter > _MAX_COMMAND_RATE:
-                # data throttle (anti DoS measure)
-                now = time()
-                dT = now - self.command_counter_reset
-                #print " command rate:", _MAX_COMMAND_RATE / dT, dT, self.command_counter
-                self.command_counter = 0
-                self.command_counter_reset = now
-                self.command_overflow = dT < 1.0
-                if self.command_overflow:
-                    reactor.callLater(1.0, self.data_in, None)
-            if self.command_overflow:
-                self.data_out(session.sessid, text=_ERROR_COMMAND_OVERFLOW)
-                return
-            # relay data to Server
-            self.command_counter += 1
+        if not session:
+            return
+        if _MAX_SESSION_COMMAND_RATE <= 0 and _MAX_COMMAND_RATE <= 0:
+            # throttling is turned off
             self.portal.amp_protocol.send_MsgPortal2Server(session.sessid,
+                                                           text=text,
+                                                           **kwargs)
+            return
+        sessid = session.sessid
+        throttle = self.command_throttles.get(sessid)
+        if not throttle:
+            throttle = self.command_throttles[sessid] = \
+                    CommandThrottle(_MAX_SESSION_COMMAND_RATE, _MAX_SESSION_COMMAND_BURST)
+        throttle.received += 1
+        if throttle.queue or not self._consume_token(throttle, time()):
+            # data throttle (anti DoS measure). Queue the input
+            # and pass it on later, at the allowed rate.
+            if len(throttle.queue) >= _MAX_SESSION_COMMAND_QUEUE:
+                throttle.dropped += 1
+                self.data_out(sessid, text=_ERROR_COMMAND_OVERFLOW)
+                return
+            throttle.queued += 1
+            throttle.queue.append((text, kwargs))
+            self._schedule_command_drain()
+            return
+        # relay data to Server
+        self.portal.amp_protocol.send_MsgPortal2Server(sessid,
                                                        text=text,
                                                        **kwargs)
-        else:
-           # called by the callLater callback
-            if self.command_overflow:
-                self.command_overflow = False
-                reactor.callLater(1.0, self.data_in, None)
 
+    def _consume_token(self, throttle, now):
+        """
+        Use up one token from a session throttle and from the
+        global throttle, if both have tokens left.
+
+        Args:
+            throttle (CommandThrottle): The session's throttle.
+            now (float): The current time.
+
+        Returns:
+            allowed (bool): If a command may be passed on now.
+
+        """
+        global_throttle = self.command_global_throttle
+        if _MAX_SESSION_COMMAND_RATE > 0:
+            throttle.refill(now)
+            if throttle.tokens < 1:
+                return False
+        if _MAX_COMMAND_RATE > 0:
+            global_throttle.refill(now)
+            if global_throttle.tokens < 1:
+                return False
+            global_throttle.tokens -= 1
+        throttle.tokens -= 1
+        return True
+
+    def _schedule_command_drain(self):
+        """
+        Make sure queued input will be drained.
+
+        """
+        if not self.command_drain_task:
+            rate = max(_MAX_SESSION_COMMAND_RATE, _MAX_COMMAND_RATE)
+            self.command_drain_task = reactor.callLater(1.0 / rate, self._drain_commands)
+
+    def _drain_commands(self):
+        """
+        Pass on queued input from throttled sessions to the Server,
+        as far as their throttles allow.
+
+        """
+        self.command_drain_task = None
+        now = time()
+        throttles = [(sessid, throttle) for sessid, throttle
+                     in self.command_throttles.items() if throttle.queue]
+        sent = True
+        while sent:
+            # round-robin, so the global throttle is shared fairly
+            sent = False
+            for sessid, throttle in throttles:
+                if throttle.queue and self._consume_token(throttle, now):
+                    text, kwargs = throttle.queue.popleft()
+                    self.portal.amp_protocol.send_MsgPortal2Server(sessid,
+                                                                   text=text,
+                                                                   **kwargs)
+                    sent = True
+        if any(throttle.queue for _, throttle in throttles):
+            self._schedule_command_drain()
+
+    def get_throttle_stats(self):
+        """
+        Get input throttling statistics, for monitoring.
+
+        Returns:
+            stats (dict): `{sessid: {"received": int, "queued": int,
+                "dropped": int, "pending": int}, ...}`.
+
+        """
+        return dict((sessid, throttle.stats())
+                    for sessid, throttle in self.command_throttles.items())
 
     def data_out(self, sessid, text=None, **kwargs):
         """
@@ -436,4 +585,51 @@ class PortalSessionHandler(SessionHandler):
                 #print "oobstruct_parser out:", kwargs["oob"]
             session.data_out(text=text, **kwargs)
 
+    def broadcast(self, sessids, text=None, **kwargs):
+        """
+        Called by server for relaying the same message to many
+        sessions. Sessions with the same rendering profile (such as
+        telnet clients with the same ansi/xterm256/mxp support) share
+        the work of rendering the text.
+
+        Args:
+            sessids (list): Session ids to send to.
+
+        Kwargs:
+            text (str): Text from protocol.
+            kwargs (any): Other data from protocol.
+
+        """
+        self.render_cache = {}
+        try:
+            for sessid in sessids:
+                self.data_out(sessid, text=text, **kwargs)
+        finally:
+            self.render_cache = None
+
+    def render(self, profile, renderfunc, *args, **kwargs):
+        """
+        Render outgoing data for a session. During a `broadcast`, the
+        result is cached and reused for all sessions with the same
+        rendering profile.
+
+        Args:
+            profile (tuple): Describes how the protocol renders the data,
+                such as `("telnet", nomarkup, xterm256, mxp)`. Must be
+                unique for the given `renderfunc` and arguments, except
+                for the text being broadcast.
+            renderfunc (callable): Renders the data.
+            args, kwargs (any): Passed to `renderfunc`.
+
+        Returns:
+            rendered (any): The return of `renderfunc`.
+
+        """
+        render_cache = self.render_cache
+        if render_cache is None:
+            return renderfunc(*args, **kwargs)
+        if profile not in render_cache:
+            render_cache[profile] = renderfunc(*args, **kwargs)
+        return render_cache[profile]
+
 PORTAL_SESSIONS = PortalSessionHandler()
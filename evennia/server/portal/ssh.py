@@ -220,7 +220,8 @@ class SshProtocol(Manhole, session.Session):
         if raw:
             self.lineSend(text)
         else:
-            self.lineSend(ansi.parse_ansi(text.strip("{r") + "{r", strip_ansi=nomarkup))
+            self.lineSend(self.sessionhandler.render(("ssh", self.encoding, nomarkup), ansi.parse_ansi,
+                                                     text.strip("{r") + "{r", strip_ansi=nomarkup))
 
 
 class ExtraInfoAuthServer(SSHUserAuthServer):
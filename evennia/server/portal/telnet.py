@@ -22,6 +22,29 @@ NOP = chr(241)
 _RE_N = re.compile(r"\{n$")
 _RE_LEND = re.compile(r"\n$|\r$", re.MULTILINE)
 
+
+def _render(text, nomarkup, xterm256, mxp, mxp_links=True):
+    """
+    Convert Evennia markup to what is sent to a telnet client.
+
+    Args:
+        text (str): Text to render.
+        nomarkup (bool): Strip all ansi markup.
+        xterm256 (bool): Use xterm256 colors.
+        mxp (bool): Use MXP.
+        mxp_links (bool, optional): Convert Evennia link markup to MXP.
+
+    Returns:
+        rendered (str): The rendered text.
+
+    """
+    text = ansi.parse_ansi(_RE_N.sub("", text) + "{n", strip_ansi=nomarkup,
+                           xterm256=xterm256, mxp=mxp and mxp_links)
+    if mxp:
+        text = mxp_parse(text)
+    return text
+
+
 class TelnetProtocol(Telnet, StatefulTelnetProtocol, Session):
     """
     Each player connecting over telnet (ie using most traditional mud
@@ -327,16 +350,14 @@ class TelnetProtocol(Telnet, StatefulTelnetProtocol, Session):
             # we need to make sure to kill the color at the end in order
             # to match the webclient output.
             #print "telnet data out:", self.protocol_flags, id(self.protocol_flags), id(self), "nomarkup: %s, xterm256: %s" % (nomarkup, xterm256)
-            linetosend = ansi.parse_ansi(_RE_N.sub("", text) + "{n", strip_ansi=nomarkup, xterm256=xterm256, mxp=mxp)
-            if mxp:
-                linetosend = mxp_parse(linetosend)
+            linetosend = self.sessionhandler.render(("telnet", self.encoding, nomarkup, xterm256, mxp),
+                                                    _render, text, nomarkup, xterm256, mxp)
             self.sendLine(linetosend)
 
         if prompt:
             # Send prompt separately
-            prompt = ansi.parse_ansi(_RE_N.sub("", prompt) + "{n", strip_ansi=nomarkup, xterm256=xterm256)
-            if mxp:
-                prompt = mxp_parse(prompt)
+            prompt = self.sessionhandler.render(("telnet-prompt", self.encoding, nomarkup, xterm256, mxp),
+                                                _render, prompt, nomarkup, xterm256, mxp, mxp_links=False)
             prompt = prompt.replace(IAC, IAC + IAC).replace('\n', '\r\n')
             prompt += IAC + GA
             self.transport.write(mccp_compress(self, prompt))
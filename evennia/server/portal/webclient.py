@@ -19,6 +19,7 @@ found on http://localhost:8000/webclient.)
 import time
 import json
 
+from collections import deque
 from hashlib import md5
 
 from twisted.web import server, resource
@@ -32,6 +33,9 @@ from evennia.server import session
 
 SERVERNAME = settings.SERVERNAME
 ENCODINGS = settings.ENCODINGS
+_RECEIVE_MAX_SIZE = settings.WEBCLIENT_RECEIVE_MAX_SIZE
+_BUFFER_SIZE = settings.WEBCLIENT_BUFFER_SIZE
+_BUFFER_OVERFLOW = settings.WEBCLIENT_BUFFER_OVERFLOW
 
 # defining a simple json encoder for returning
 # django data to the client. Might need to
@@ -65,6 +69,7 @@ class WebClient(resource.Resource):
     def __init__(self):
         self.requests = {}
         self.databuffer = {}
+        self.overflows = 0
 
     #def getChild(self, path, request):
     #    """
@@ -96,14 +101,38 @@ class WebClient(resource.Resource):
         request = self.requests.get(suid)
         if request:
             # we have a request waiting. Return immediately.
-            request.write(jsonify({'msg': string, 'data': data}))
+            request.write("[%s]" % jsonify({'msg': string, 'data': data}))
             request.finish()
             del self.requests[suid]
         else:
             # no waiting request. Store data in buffer
-            dataentries = self.databuffer.get(suid, [])
+            dataentries = self.databuffer.get(suid)
+            if dataentries is None:
+                dataentries = self.databuffer[suid] = deque()
+            if len(dataentries) >= _BUFFER_SIZE:
+                self.overflows += 1
+                if _BUFFER_OVERFLOW == "drop_newest":
+                    return
+                elif _BUFFER_OVERFLOW == "disconnect":
+                    self._overflow_disconnect(suid)
+                    return
+                dataentries.popleft()
             dataentries.append(jsonify({'msg': string, 'data': data}))
-            self.databuffer[suid] = dataentries
+
+    def _overflow_disconnect(self, suid):
+        """
+        Disconnect a session whose buffer is full, most likely because
+        its browser is no longer polling.
+
+        Args:
+            suid (int): Session id.
+
+        """
+        logger.log_infomsg("WebClient: Output buffer full for %s. Disconnecting." % suid)
+        self.client_disconnect(suid)
+        sess = self.sessionhandler.session_from_suid(suid)
+        if sess:
+            sess[0].sessionhandler.disconnect(sess[0])
 
     def client_disconnect(self, suid):
         """
@@ -138,7 +167,7 @@ class WebClient(resource.Resource):
         if suid == '0':
             # creating a unique id hash string
             suid = md5(str(time.time())).hexdigest()
-            self.databuffer[suid] = []
+            self.databuffer[suid] = deque()
 
             sess = WebClientSession()
             sess.client = self
@@ -177,14 +206,25 @@ class WebClient(resource.Resource):
         Args:
             request (Request): Incoming request.
 
+        Notes:
+            The reply is a JSON array of all buffered messages, up to
+            `WEBCLIENT_RECEIVE_MAX_SIZE` bytes. Anything beyond that is
+            left for the next request.
+
         """
         suid = request.args.get('suid', ['0'])[0]
         if suid == '0':
             return ''
 
-        dataentries = self.databuffer.get(suid, [])
+        dataentries = self.databuffer.get(suid)
         if dataentries:
-            return dataentries.pop(0)
+            entries = [dataentries.popleft()]
+            size = len(entries[0])
+            while dataentries and size + len(dataentries[0]) < _RECEIVE_MAX_SIZE:
+                entry = dataentries.popleft()
+                entries.append(entry)
+                size += len(entry) + 1
+            return "[%s]" % ",".join(entries)
         request.notifyFinish().addErrback(self._responseFailed, suid, request)
         if suid in self.requests:
             self.requests[suid].finish()  # Clear any stale request.
@@ -282,7 +322,8 @@ class WebClientSession(session.Session):
                 self.client.lineSend(self.suid, text)
             else:
                 self.client.lineSend(self.suid,
-                                     parse_html(text, strip_ansi=nomarkup))
+                                     self.sessionhandler.render(("html", self.encoding, nomarkup), parse_html,
+                                                                text, strip_ansi=nomarkup))
             return
         except Exception:
             logger.log_trace()
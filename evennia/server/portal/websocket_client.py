@@ -181,9 +181,11 @@ class WebSocketClient(Protocol, Session):
         raw = kwargs.get("raw", False)
         nomarkup = kwargs.get("nomarkup", False)
         if "prompt" in kwargs:
-            self.sendLine("PRT" + parse_html(kwargs["prompt"], strip_ansi=nomarkup))
+            self.sendLine("PRT" + self.sessionhandler.render(("html-prompt", self.encoding, nomarkup), parse_html,
+                                                              kwargs["prompt"], strip_ansi=nomarkup))
         if raw:
             self.sendLine("CMD" + text)
         else:
-            self.sendLine("CMD" + parse_html(text, strip_ansi=nomarkup))
+            self.sendLine("CMD" + self.sessionhandler.render(("html", self.encoding, nomarkup), parse_html,
+                                                              text, strip_ansi=nomarkup))
 
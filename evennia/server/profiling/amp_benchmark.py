@@ -0,0 +1,102 @@
+"""
+Benchmark of AMP round-trip latency.
+
+This sets up an AMP connection over the loopback interface and times
+round-trips of pickled messages of different sizes, with the payload
+compression used before the adaptive codec (always zlib at level 9)
+and with the adaptive codec, without and with the preset dictionary.
+
+Run from the evennia shell (`evennia shell`). Since this runs the
+Twisted reactor, it can only be run once per shell session:
+
+    from evennia.server.profiling.amp_benchmark import run
+    run()
+
+"""
+from time import time
+from twisted.internet import reactor, protocol
+from twisted.internet.defer import inlineCallbacks
+from twisted.protocols import amp as twisted_amp
+from django.conf import settings
+from evennia.server import amp
+
+# (name, threshold, level, dictionary)
+_CODECS = [("always level 9", 0, 9, False),
+           ("adaptive", settings.AMP_COMPRESSION_THRESHOLD,
+            settings.AMP_COMPRESSION_LEVEL, False),
+           ("adaptive+dict", settings.AMP_COMPRESSION_THRESHOLD,
+            settings.AMP_COMPRESSION_LEVEL, True)]
+
+_TEXTS = [("command", "look"),
+          ("say", "Griatch says, \"Hello everyone, how is it going?\""),
+          ("room", ("{wLimbo{n\r\nWelcome to your new {wEvennia{n-based game! " * 8 +
+                    "\r\n{wExits:{n north, south\r\n{wYou see:{n a box, a sword")),
+          ("large", "You read the book: " + "Lorem ipsum dolor sit amet. " * 400)]
+
+
+class _Echo(twisted_amp.Command):
+    "Send a payload and get it back"
+    arguments = [('packed_data', amp.Compressed())]
+    response = [('packed_data', amp.Compressed())]
+
+
+class _EchoProtocol(twisted_amp.AMP):
+    "Benchmark server side"
+    @_Echo.responder
+    def echo(self, packed_data):
+        return {"packed_data": packed_data}
+
+
+def _set_codec(threshold, level, dictionary):
+    "Configure the AMP payload codec"
+    amp._COMPRESS_THRESHOLD = threshold
+    amp._COMPRESS_LEVEL = level
+    amp._COMPRESS_DICTIONARY = dictionary
+
+
+@inlineCallbacks
+def _benchmark(client, number):
+    """
+    Time round-trips for all codecs and texts.
+
+    """
+    old_codec = (amp._COMPRESS_THRESHOLD, amp._COMPRESS_LEVEL, amp._COMPRESS_DICTIONARY)
+    print "%-10s %8s" % ("message", "bytes") + \
+          "".join(" %16s" % name for name, _, _, _ in _CODECS) + "   (ms/round-trip)"
+    try:
+        for textname, text in _TEXTS:
+            packed_data = amp.dumps((1, {"text": text}))
+            row = "%-10s %8i" % (textname, len(packed_data))
+            for _, threshold, level, dictionary in _CODECS:
+                _set_codec(threshold, level, dictionary)
+                t0 = time()
+                for _ in xrange(number):
+                    result = yield client.callRemote(_Echo, packed_data=packed_data)
+                    assert result["packed_data"] == packed_data
+                row += " %16.4f" % ((time() - t0) / number * 1000)
+            print row
+    finally:
+        _set_codec(*old_codec)
+        reactor.stop()
+
+
+def run(number=2000):
+    """
+    Run the benchmark.
+
+    Args:
+        number (int, optional): Number of round-trips per message and codec.
+
+    """
+    factory = protocol.ServerFactory()
+    factory.protocol = _EchoProtocol
+    port = reactor.listenTCP(0, factory, interface="127.0.0.1")
+    creator = protocol.ClientCreator(reactor, twisted_amp.AMP)
+    deferred = creator.connectTCP("127.0.0.1", port.getHost().port)
+    deferred.addCallback(lambda client: (client.transport.setTcpNoDelay(True),
+                                         _benchmark(client, number)))
+    reactor.run()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,115 @@
+"""
+Micro-benchmark of ANSI markup parsing.
+
+This compares the old way of parsing markup - a cascade of regex
+substitutions applied to each escape-separated part of the string -
+with the single-pass tokenizer used by `ANSIParser.parse_ansi`. The
+strings parsed are the ANSI fixtures of `evennia/utils/tests.py` and a
+corpus of long, colorful room descriptions. The parse cache is
+bypassed, so this measures the parsing itself.
+
+Run from the evennia shell (`evennia shell`):
+
+    from evennia.server.profiling.ansi_benchmark import run
+    run()
+
+"""
+import random
+from timeit import timeit
+from evennia.utils import ansi, utils
+
+# strings used in the ANSIString tests
+_FIXTURES = [r'{gThis is{rA{{r test{nTest{n',
+             r'{gTest{rTest{n',
+             "{gThis is {nA split string{g",
+             "{gTest{r",
+             '{gtest{n',
+             "{lcl{gook{ltat{le{n",
+             "{lcexamine{ltExamine{le this {rbox{n and {[r{wthat{n {{lcbox{lt {135thing",
+             "{cString{n"]
+
+_WORDS = ("the old stone floor is covered in dust and a faint smell of "
+          "smoke hangs in the air while water drips from the ceiling").split()
+_MARKUP = ["{r", "{g", "{y", "{n", "{w", "{x", "{[b", "{[R", "{500", "{[025",
+           "%c123", "{{", "{h", "{!G", "{/", "{lcnorth{ltNorth{le"]
+
+
+def _legacy_parse_ansi(parser, string, strip_ansi=False, xterm256=False, mxp=False):
+    """
+    The pre-tokenizer parse_ansi, without caching, kept for comparison.
+
+    """
+    string = parser.brightbg_sub.sub(parser.sub_brightbg, string)
+
+    def do_xterm256(part):
+        return parser.sub_xterm256(part, xterm256)
+
+    in_string = utils.to_str(string)
+    parsed_string = ""
+    parts = parser.ansi_escapes.split(in_string) + [" "]
+    for part, sep in zip(parts[::2], parts[1::2]):
+        pstring = parser.xterm256_sub.sub(do_xterm256, part)
+        pstring = parser.ansi_sub.sub(parser.sub_ansi, pstring)
+        parsed_string += "%s%s" % (pstring, sep[0].strip())
+    if not mxp:
+        parsed_string = parser.strip_mxp(parsed_string)
+    if strip_ansi:
+        return parser.strip_raw_codes(parsed_string)
+    return parsed_string
+
+
+def _make_corpus(number, seed=1):
+    """
+    Create long room descriptions with random markup.
+
+    """
+    rand = random.Random(seed)
+    corpus = []
+    for _ in xrange(number):
+        words = [rand.choice(_WORDS) if rand.random() > 0.15 else rand.choice(_MARKUP) +
+                 rand.choice(_WORDS) for _ in xrange(rand.randint(100, 600))]
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def run(number=200, ncorpus=50):
+    """
+    Time both parsers for all output profiles.
+
+    Args:
+        number (int, optional): How many times to parse each string set.
+        ncorpus (int, optional): Number of long descriptions to parse.
+
+    """
+    parser = ansi.ANSIParser()
+    corpus = _make_corpus(ncorpus)
+    profiles = [("ansi", {}), ("xterm256", {"xterm256": True}),
+                ("xterm256+mxp", {"xterm256": True, "mxp": True}),
+                ("strip", {"strip_ansi": True})]
+
+    def parse_all(strings, kwargs):
+        for string in strings:
+            # bypass the parse cache
+            ansi._PARSE_CACHE.clear()
+            parser.parse_ansi(string, **kwargs)
+
+    def legacy_parse_all(strings, kwargs):
+        for string in strings:
+            ansi._PARSE_CACHE.clear()
+            _legacy_parse_ansi(parser, string, **kwargs)
+
+    print "%-12s %-14s %12s %12s" % ("strings", "profile", "legacy (s)", "single (s)")
+    for name, strings, num in (("fixtures", _FIXTURES, number * 10),
+                               ("long descs", corpus, number)):
+        for profile, kwargs in profiles:
+            for string in strings:
+                ansi._PARSE_CACHE.clear()
+                assert parser.parse_ansi(string, **kwargs) == \
+                    _legacy_parse_ansi(parser, string, **kwargs), string
+            t_legacy = timeit(lambda: legacy_parse_all(strings, kwargs), number=num)
+            t_single = timeit(lambda: parse_all(strings, kwargs), number=num)
+            print "%-12s %-14s %12.4f %12.4f" % (name, profile, t_legacy, t_single)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,95 @@
+"""
+Benchmark of channel message distribution.
+
+This times sending messages to a channel with many subscribers, of
+which only some are online, as on a busy game where everyone is
+subscribed to the public channel. It compares the current
+`DefaultChannel.distribute_message` with the old way of looking up
+all subscribers in the database and calling `msg` on every one of
+them.
+
+The online players are logged in with fake sessions and the messages
+to them are not sent anywhere, so this only measures the server-side
+cost. To measure a running server, use the dummyrunner with the
+"socializing" profile in `dummyrunner_settings.py` instead.
+
+Run from the evennia shell (`evennia shell`), preferably on a test
+database since it creates (and afterwards deletes) a lot of players:
+
+    from evennia.server.profiling.channel_benchmark import run
+    run()
+
+"""
+from timeit import timeit
+from mock import Mock, patch
+from evennia.comms.models import TempMsg
+from evennia.server.serversession import ServerSession
+from evennia.server.sessionhandler import SESSIONS
+from evennia.utils import create
+
+_SESSID_START = 100000
+
+
+def _legacy_distribute(channel, msg):
+    """
+    Distribute a message the way it was done before the subscribers
+    were kept in memory.
+
+    """
+    for entity in list(channel.db_subscriptions.all()) + \
+            list(channel.db_object_subscriptions.all()):
+        entity.msg(msg.message, from_obj=msg.senders, from_channel=channel.id)
+
+
+def _login(players):
+    """
+    Log in the players with fake sessions.
+
+    """
+    for inum, player in enumerate(players):
+        session = ServerSession()
+        session.init_session("telnet", ("localhost", "benchmark"), SESSIONS)
+        session.sessid = _SESSID_START + inum
+        SESSIONS.portal_connect(session.get_sync_data())
+        SESSIONS.login(SESSIONS.session_from_sessid(session.sessid), player, testmode=True)
+
+
+def run(nsubscribers=1000, online=(0.1, 0.5, 1.0), number=100):
+    """
+    Time distributing messages to a channel.
+
+    Args:
+        nsubscribers (int, optional): Number of subscribing players.
+        online (tuple, optional): Fractions of subscribers online.
+        number (int, optional): How many messages to send for each test.
+
+    """
+    players = [create.create_player("chanbench%i" % inum, "chanbench@test.com",
+                                    "password", typeclass="evennia.players.players.DefaultPlayer")
+               for inum in xrange(nsubscribers)]
+    channel = create.create_channel("chanbench")
+    channel.subscriptions.add(players)
+    msg = TempMsg(message="Hello world!")
+    nlogged = 0
+    try:
+        with patch.object(SESSIONS, "server", Mock()):
+            print "%12s %8s %14s %14s" % ("subscribers", "online", "legacy (ms)", "current (ms)")
+            for fraction in online:
+                nonline = int(nsubscribers * fraction)
+                _login(players[nlogged:nonline])
+                nlogged = max(nlogged, nonline)
+                t_legacy = timeit(lambda: _legacy_distribute(channel, msg), number=number)
+                t_current = timeit(lambda: channel.distribute_message(msg), number=number)
+                print "%12i %8i %14.3f %14.3f" % (nsubscribers, nonline,
+                                                  1000.0 * t_legacy / number,
+                                                  1000.0 * t_current / number)
+            for sessid in xrange(_SESSID_START, _SESSID_START + nlogged):
+                SESSIONS.disconnect(SESSIONS.sessions[sessid])
+    finally:
+        channel.delete()
+        for player in players:
+            player.delete()
+
+
+if __name__ == "__main__":
+    run()
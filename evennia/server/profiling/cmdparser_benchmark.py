@@ -0,0 +1,87 @@
+"""
+Micro-benchmark of command parsing.
+
+This compares the old way of finding command candidates - checking
+every key and alias of every command in the merged cmdset with
+`startswith` - with the command name index used by the cmdparser.
+The default character cmdset is padded with dummy commands (such as
+channel or exit commands would add) to see how parse time grows with
+the size of the cmdset.
+
+Run from the evennia shell (`evennia shell`):
+
+    from evennia.server.profiling.cmdparser_benchmark import run
+    run()
+
+"""
+from timeit import timeit
+from evennia.commands.command import Command
+from evennia.commands.cmdparser import cmdparser
+from evennia.commands.default.cmdset_character import CharacterCmdSet
+
+# typical inputs; the last one matches no command
+_INPUTS = ["look", "l here", "get sword", "say Hello everyone!",
+           "public Hi there", "north", "xyzzy plugh"]
+
+
+class _Caller(object):
+    "Stand-in for the caller, passing all lock checks"
+    is_superuser = True
+
+
+class _DummyCmd(Command):
+    "Padding command"
+    locks = "cmd:all()"
+
+
+def _candidates_linear(l_raw_string, cmdset):
+    """
+    The pre-index way of finding command candidates, kept for comparison.
+
+    """
+    return [(cmdname, cmd) for cmd in cmdset
+            for cmdname in [cmd.key] + cmd.aliases
+            if cmdname and l_raw_string.startswith(cmdname.lower())]
+
+
+def _make_cmdset(size):
+    """
+    Create a character cmdset padded with dummy commands.
+
+    """
+    cmdset = CharacterCmdSet()
+    cmdset.add([_DummyCmd(key="dummy%i" % inum, aliases=["dm%i" % inum])
+                for inum in xrange(max(0, size - cmdset.count()))])
+    return cmdset
+
+
+def run(sizes=(50, 100, 300, 1000), number=2000):
+    """
+    Time the candidate lookup and the full parse for cmdsets of
+    different sizes.
+
+    Args:
+        sizes (tuple, optional): Number of commands in the cmdsets to test.
+        number (int, optional): How many times to parse each input.
+
+    """
+    caller = _Caller()
+    print "%8s %14s %14s %14s" % ("commands", "linear (s)", "index (s)", "cmdparser (s)")
+    for size in sizes:
+        cmdset = _make_cmdset(size)
+        t_linear, t_index, t_parse = 0.0, 0.0, 0.0
+        for raw_string in _INPUTS:
+            l_raw_string = raw_string.lower()
+            assert sorted(_candidates_linear(l_raw_string, cmdset)) == \
+                sorted(cmdset.get_command_candidates(l_raw_string))
+            t_linear += timeit(lambda: _candidates_linear(l_raw_string, cmdset),
+                               number=number)
+            t_index += timeit(lambda: cmdset.get_command_candidates(l_raw_string),
+                              number=number)
+            t_parse += timeit(lambda: cmdparser(raw_string, cmdset, caller),
+                              number=number)
+        print "%8i %14.4f %14.4f %14.4f" % (cmdset.count(), t_linear, t_index, t_parse)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark of the contents cache.
+
+This compares filtering the full contents of a room for exits or
+characters (as `DefaultObject.exits` used to do) with fetching them
+from the kind buckets of the contents cache. The test room is filled
+with objects, of which one in twenty is an exit and one in ten a
+character.
+
+Run from the evennia shell (`evennia shell`), preferably on a test
+database since it creates (and afterwards deletes) a lot of objects:
+
+    from evennia.server.profiling.contents_benchmark import run
+    run()
+
+"""
+from timeit import timeit
+from evennia.utils import create
+from evennia.objects.objects import DefaultObject, DefaultCharacter, DefaultExit, DefaultRoom
+
+
+def _populate(room, size):
+    """
+    Fill the room with objects of mixed kinds.
+
+    """
+    objs = []
+    for inum in xrange(size):
+        if inum % 20 == 0:
+            objs.append(create.create_object(DefaultExit, key="exit%i" % inum,
+                                             location=room, destination=room))
+        elif inum % 10 == 0:
+            objs.append(create.create_object(DefaultCharacter, key="char%i" % inum,
+                                             location=room))
+        else:
+            objs.append(create.create_object(DefaultObject, key="thing%i" % inum,
+                                             location=room))
+    return objs
+
+
+def run(sizes=(10, 100, 1000), number=1000):
+    """
+    Time the different ways of getting parts of a room's contents.
+
+    Args:
+        sizes (tuple, optional): Number of objects in the room.
+        number (int, optional): How many times to do each lookup.
+
+    """
+    print "%8s %12s %12s %12s %12s %12s" % ("objects", "filter exi", "exits",
+                                            "filter char", "characters", "without")
+    for size in sizes:
+        room = create.create_object(DefaultRoom, key="benchmark room", nohome=True)
+        objs = _populate(room, size)
+        looker = objs[-1]
+        try:
+            cache = room.contents_cache
+            assert sorted(cache.exits()) == sorted(obj for obj in room.contents if obj.destination)
+            t_filter_exits = timeit(lambda: [obj for obj in room.contents if obj.destination],
+                                    number=number)
+            t_exits = timeit(cache.exits, number=number)
+            t_filter_chars = timeit(lambda: [obj for obj in room.contents
+                                             if isinstance(obj, DefaultCharacter)], number=number)
+            t_chars = timeit(cache.characters, number=number)
+            t_without = timeit(lambda: cache.contents_without(looker), number=number)
+            print "%8i %12.4f %12.4f %12.4f %12.4f %12.4f" % (
+                size, t_filter_exits, t_exits, t_filter_chars, t_chars, t_without)
+        finally:
+            for obj in objs:
+                obj.delete()
+            room.delete()
+
+
+if __name__ == "__main__":
+    run()
@@ -69,6 +69,9 @@ CHANCE_OF_LOGIN = DUMMYRUNNER_SETTINGS.CHANCE_OF_LOGIN
 TELNET_PORT = DUMMYRUNNER_SETTINGS.TELNET_PORT or settings.TELNET_PORTS[0]
 #
 NLOGGED_IN = 0
+# throughput counters, reported when the runner stops
+NCMDS_SENT = 0
+NBYTES_RECEIVED = 0
 
 
 # Messages
@@ -245,6 +248,8 @@ class DummyClient(telnet.StatefulTelnetProtocol):
             data (str): Incoming data.
 
         """
+        global NBYTES_RECEIVED
+        NBYTES_RECEIVED += len(data)
         if not self._connected and not data.startswith(chr(255)):
             # wait until we actually get text back (not just telnet
             # negotiation)
@@ -302,7 +307,7 @@ class DummyClient(telnet.StatefulTelnetProtocol):
         all "intelligence" of the dummy client.
 
         """
-        global NLOGGED_IN
+        global NLOGGED_IN, NCMDS_SENT
 
         rand = random.random()
 
@@ -330,6 +335,7 @@ class DummyClient(telnet.StatefulTelnetProtocol):
             # send to the game
             self.sendLine(str(self._cmdlist.pop(0)))
             self.istep += 1
+            NCMDS_SENT += 1
 
 
 class DummyFactory(protocol.ClientFactory):
@@ -402,3 +408,5 @@ if __name__ == '__main__':
 
     # output runtime
     print "... dummy client runner stopped after %s." % time_format(ttot, style=3)
+    print "... sent %i commands (%.2f/s), received %i bytes (%.2f kB/s)." % (
+            NCMDS_SENT, NCMDS_SENT / ttot, NBYTES_RECEIVED, NBYTES_RECEIVED / ttot / 1000.0)
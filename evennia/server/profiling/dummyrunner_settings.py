@@ -270,6 +270,13 @@ ACTIONS = ( c_login,
 #           (0.1, c_creates_obj),
 #           (0.2, c_digs),
 #           (0.3, c_moves))
+## "socializing" definition. New players are subscribed to the
+## public channel, so running this with many dummies (such as
+## `evennia -dummyrunner 1000`) loads channel distribution. See also
+## channel_benchmark.py.
+#ACTIONS = (c_login_nodig,
+#           c_logout,
+#           (1.0, c_socialize))
 ## "heavy digger memory tester" definition
 #ACTIONS = (c_login,
 #           c_logout,
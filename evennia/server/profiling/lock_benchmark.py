@@ -0,0 +1,82 @@
+"""
+Micro-benchmark of lock checking.
+
+This compares the old way of checking a lock - calling all lock
+functions and eval()ing the resulting True/False string - with the
+compiled lock functions used by the LockHandler. The lock strings
+checked are the ones from `settings.DEFAULT_CHANNELS` plus a few
+common access types.
+
+Run from the evennia shell (`evennia shell`):
+
+    from evennia.server.profiling.lock_benchmark import run
+    run()
+
+"""
+from timeit import timeit
+from django.conf import settings
+from evennia.locks.lockhandler import LockHandler
+
+# commonly used lock definitions, in addition to the channel locks
+_EXTRA_LOCKSTRINGS = ["call:true()",
+                      "view:all()",
+                      "edit:perm(Wizards) or perm(Builders)",
+                      "get:not perm(Guests) and not false() and all()"]
+
+
+class _Permissions(object):
+    "Stand-in for a PermissionHandler"
+    def all(self):
+        return ["Players"]
+
+
+class _BenchObj(object):
+    "Stand-in for an object using a LockHandler"
+    lock_storage = ""
+    permissions = _Permissions()
+
+
+def _check_eval(handler, accessing_obj, access_type):
+    """
+    The pre-compilation way of checking a lock, kept for comparison.
+
+    """
+    evalstring, func_tup, raw_string, _ = handler.locks[access_type]
+    true_false = tuple(bool(tup[0](accessing_obj, handler.obj, *tup[1], **tup[2]))
+                       for tup in func_tup)
+    return eval(evalstring % true_false)
+
+
+def run(number=20000):
+    """
+    Time both lock-check paths for all benchmark lock strings.
+
+    Args:
+        number (int, optional): How many times to check each access type.
+
+    """
+    lockstrings = [chan["locks"] for chan in settings.DEFAULT_CHANNELS
+                   if chan.get("locks")] + _EXTRA_LOCKSTRINGS
+    accessing_obj = _BenchObj()
+    print "%-52s %10s %10s" % ("lock definition", "eval (s)", "compiled (s)")
+    total_eval, total_compiled = 0.0, 0.0
+    for lockstring in lockstrings:
+        obj = _BenchObj()
+        handler = LockHandler(obj)
+        handler.add(lockstring)
+        for access_type in sorted(handler.locks):
+            assert _check_eval(handler, accessing_obj, access_type) == \
+                handler.check(accessing_obj, access_type, no_superuser_bypass=True)
+            t_eval = timeit(lambda: _check_eval(handler, accessing_obj, access_type),
+                            number=number)
+            t_compiled = timeit(lambda: handler.check(accessing_obj, access_type,
+                                                      no_superuser_bypass=True),
+                                number=number)
+            total_eval += t_eval
+            total_compiled += t_compiled
+            print "%-52s %10.4f %10.4f" % (handler.get(access_type), t_eval, t_compiled)
+    print "%-52s %10.4f %10.4f" % ("total", total_eval, total_compiled)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,91 @@
+"""
+Benchmark of Msg free-text search.
+
+This compares searching the text of messages with a substring match
+in the database (the behaviour without `settings.MSG_SEARCH_INDEX`)
+with searching through the in-memory `InvertedIndex` and, if the
+database supports it, the `SQLiteFTSIndex`. The messages are made up
+of random words from a small vocabulary, so that common words match
+many messages and rare words few.
+
+Run from the evennia shell (`evennia shell`), preferably on a test
+database since it creates (and afterwards deletes) a lot of messages:
+
+    from evennia.server.profiling.msgsearch_benchmark import run
+    run()
+
+"""
+import random
+from time import time
+from mock import patch
+from evennia.comms import msgindex
+from evennia.comms.models import Msg
+from evennia.utils import create
+
+_WORDS = ["word%i" % inum for inum in xrange(2000)]
+_NWORDS = 12
+
+
+def _populate(size):
+    """
+    Create messages of random words. Common words are picked more
+    often than rare ones.
+
+    """
+    rand = random.Random(0)
+    msgs = []
+    for _ in xrange(size):
+        text = " ".join(_WORDS[int(rand.paretovariate(1.0)) % len(_WORDS)]
+                        for _ in xrange(_NWORDS))
+        msgs.append(create.create_message(None, text))
+    return msgs
+
+
+def _time_search(index, queries, number):
+    """
+    Time searching for all queries `number` times.
+
+    """
+    with patch.object(msgindex, "_MSG_INDEX", index):
+        if index:
+            # build the index outside of the timing
+            t0 = time()
+            index.rebuild()
+            t_build = time() - t0
+        else:
+            t_build = 0.0
+        t0 = time()
+        for _ in xrange(number):
+            for query in queries:
+                Msg.objects.message_search(freetext=query, limit=20)
+        return t_build, time() - t0
+
+
+def run(sizes=(1000, 10000, 50000), number=10):
+    """
+    Time searching different numbers of messages.
+
+    Args:
+        sizes (tuple, optional): Number of messages to search.
+        number (int, optional): How many times to do each search.
+
+    """
+    # a common word, a rare word and two words together
+    queries = [_WORDS[1], _WORDS[500], "%s %s" % (_WORDS[1], _WORDS[2])]
+    indexes = [("icontains", None), ("inverted", msgindex.InvertedIndex())]
+    if msgindex.SQLiteFTSIndex.is_available():
+        indexes.append(("sqlite fts5", msgindex.SQLiteFTSIndex()))
+    print "%8s %12s %12s %12s" % ("messages", "index", "build (s)", "search (s)")
+    for size in sizes:
+        msgs = _populate(size)
+        try:
+            for name, index in indexes:
+                t_build, t_search = _time_search(index, queries, number)
+                print "%8i %12s %12.3f %12.3f" % (size, name, t_build, t_search)
+        finally:
+            for msg in msgs:
+                msg.delete()
+
+
+if __name__ == "__main__":
+    run()
@@ -37,5 +37,45 @@ g = ObjectDB.objects.get(db_key="Griatch")
     exec_string = \
 """
 g.tags.all()
+"""
+    count_queries(exec_string, setup_string)
+
+    # Attribute access on many objects, one at a time vs prefetched
+
+    setup_string = \
+"""
+from evennia.objects.models import ObjectDB
+from evennia.utils.idmapper.models import flush_cache
+flush_cache()
+objs = list(ObjectDB.objects.all())
+"""
+    exec_string = \
+"""
+[obj.attributes.all() for obj in objs]
+"""
+    count_queries(exec_string, setup_string)
+
+    exec_string = \
+"""
+ObjectDB.objects.prefetch_attributes(objs)
+[obj.attributes.all() for obj in objs]
+"""
+    count_queries(exec_string, setup_string)
+
+    # Script validation, as done before every command. This used to
+    # cost one query per object on every call; now only the first
+    # call on each object queries, the second does none.
+
+    setup_string = \
+"""
+from evennia.objects.models import ObjectDB
+from evennia.utils.idmapper.models import flush_cache
+flush_cache()
+objs = list(ObjectDB.objects.all())
+"""
+    exec_string = \
+"""
+[obj.scripts.validate() for obj in objs]
+[obj.scripts.validate() for obj in objs]
 """
     count_queries(exec_string, setup_string)
@@ -0,0 +1,90 @@
+"""
+Benchmark of TickerHandler persistence.
+
+This times subscribing many tickers, as done at startup, and restoring
+them from the database, as done after a reload. Subscriptions are made
+with a separate TickerHandler (stored under its own name), spread over
+a hundred objects with many idstrings each, so no world objects are
+affected.
+
+The subscriptions are saved once, shortly after they are made (see
+`settings.TICKER_SAVE_DELAY`). For comparison, a smaller number of
+subscriptions is also made saving after every one of them
+(`TICKER_SAVE_DELAY = None`), whose cost grows with the square of the
+number of subscriptions.
+
+Run from the evennia shell (`evennia shell`):
+
+    from evennia.server.profiling.ticker_benchmark import run
+    run()
+
+"""
+from time import time
+from mock import patch
+from evennia.utils import create
+from evennia.objects.objects import DefaultObject
+from evennia.scripts import tickerhandler
+from evennia.scripts.tickerhandler import TickerHandler
+
+_SAVE_NAME = "ticker_benchmark_storage"
+_NOBJS = 100
+
+
+def _subscribe(objs, size):
+    """
+    Subscribe `size` tickers and save them.
+
+    """
+    handler = TickerHandler(save_name=_SAVE_NAME)
+    t0 = time()
+    for inum in xrange(size):
+        handler.add(objs[inum % len(objs)], 60, idstring="bench%i" % inum)
+    handler.save()
+    return handler, time() - t0
+
+
+def _restore():
+    """
+    Restore the saved tickers into a new handler.
+
+    """
+    handler = TickerHandler(save_name=_SAVE_NAME)
+    t0 = time()
+    handler.restore()
+    return handler, time() - t0
+
+
+def run(sizes=(10000, 30000, 100000), legacy_size=2000):
+    """
+    Time subscribing and restoring different numbers of tickers.
+
+    Args:
+        sizes (tuple, optional): Number of subscriptions to test.
+        legacy_size (int, optional): Number of subscriptions to test
+            when saving on every change.
+
+    """
+    objs = [create.create_object(DefaultObject, key="ticker benchmark %i" % inum)
+            for inum in xrange(_NOBJS)]
+    try:
+        print "%10s %14s %14s" % ("tickers", "subscribe (s)", "restore (s)")
+        with patch.object(tickerhandler, "_SAVE_DELAY", None):
+            handler, t_subscribe = _subscribe(objs, legacy_size)
+            handler.clear()
+        print "%10i %14.3f %14s  (saving on every change)" % (legacy_size, t_subscribe, "-")
+        for size in sizes:
+            handler, t_subscribe = _subscribe(objs, size)
+            handler.ticker_pool.stop()
+            restored, t_restore = _restore()
+            assert len(restored.ticker_storage) == size
+            restored.ticker_pool.stop()
+            print "%10i %14.3f %14.3f" % (size, t_subscribe, t_restore)
+        handler.clear()
+        handler.save()
+    finally:
+        for obj in objs:
+            obj.delete()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,108 @@
+"""
+Benchmark of the timer wheel.
+
+This times starting, running and stopping the timers of a large
+number of timed scripts, once with each timer in the reactor (as
+`settings.SCRIPT_TIMER_RESOLUTION = None` does) and once in a timer
+wheel. The scripts are simulated by looping calls with intervals
+between 10 seconds and an hour. The reactor's clock is replaced by a
+simulated one for the duration, so no database access is involved
+and the benchmark runs much faster than real time.
+
+Run from the evennia shell (`evennia shell`), where the reactor is
+not running:
+
+    from evennia.server.profiling.timerwheel_benchmark import run
+    run()
+
+"""
+from random import Random
+from time import time
+from mock import patch
+from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
+from evennia.scripts.timerwheel import TimerWheel
+
+
+class _SimulatedTime(object):
+    "Replaces the reactor's clock"
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _bench(clock, simtime, nscripts, runtime, step):
+    """
+    Time starting, running and stopping looping calls.
+
+    Args:
+        clock (IReactorTime): What to schedule the calls in.
+        simtime (_SimulatedTime): The reactor's clock.
+        nscripts (int): The number of looping calls.
+        runtime (int): How many simulated seconds to run them.
+        step (float): Seconds between each time the reactor runs
+            its timers.
+
+    Returns:
+        timings (tuple): The times to start, run and stop the calls
+            and the number of calls made.
+
+    """
+    random = Random(0)
+    ncalls = [0]
+
+    def _callback():
+        ncalls[0] += 1
+
+    tasks = []
+    t0 = time()
+    for _ in xrange(nscripts):
+        task = LoopingCall(_callback)
+        task.clock = clock
+        task.start(random.randint(10, 3600), now=False)
+        tasks.append(task)
+    t_start = time() - t0
+    t0 = time()
+    for _ in xrange(int(runtime / step)):
+        simtime.now += step
+        reactor.runUntilCurrent()
+    t_run = time() - t0
+    t0 = time()
+    for task in tasks:
+        task.stop()
+    t_stop = time() - t0
+    return t_start, t_run, t_stop, ncalls[0]
+
+
+def run(sizes=(10000, 100000), runtime=600, step=0.1):
+    """
+    Compare reactor timers with the timer wheel.
+
+    Args:
+        sizes (tuple, optional): Number of scripts to test.
+        runtime (int, optional): Simulated seconds to run each test.
+        step (float, optional): Simulated seconds between each time
+            the reactor runs its timers.
+
+    """
+    simtime = _SimulatedTime()
+    print "%8s %8s %10s %10s %10s %10s" % ("scripts", "timers", "start (s)",
+                                           "run (s)", "stop (s)", "calls")
+    with patch.object(reactor, "seconds", simtime):
+        for size in sizes:
+            t_start, t_run, t_stop, ncalls = _bench(reactor, simtime, size, runtime, step)
+            print "%8i %8s %10.3f %10.3f %10.3f %10i" % (size, "reactor", t_start, t_run,
+                                                         t_stop, ncalls)
+            wheel = TimerWheel(resolution=0.1, clock=reactor)
+            t_start, t_run, t_stop, ncalls = _bench(wheel, simtime, size, runtime, step)
+            print "%8i %8s %10.3f %10.3f %10.3f %10i" % (size, "wheel", t_start, t_run,
+                                                         t_stop, ncalls)
+            if wheel.driver:
+                wheel.driver.cancel()
+            # the reactor only drops cancelled calls when it runs
+            reactor.runUntilCurrent()
+
+
+if __name__ == "__main__":
+    run()
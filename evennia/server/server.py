@@ -208,6 +208,7 @@ class Evennia(object):
             # run the update
             from evennia.objects.models import ObjectDB
             from evennia.comms.models import ChannelDB
+            from evennia.typeclasses.models import flush_typeclass_cache
             #from evennia.players.models import PlayerDB
             for i, prev, curr in ((i, tup[0], tup[1]) for i, tup in enumerate(settings_compare) if i in mismatches):
                 # update the database
@@ -230,6 +231,7 @@ class Evennia(object):
                 PlayerDB.flush_instance_cache()
                 ScriptDB.flush_instance_cache()
                 ChannelDB.flush_instance_cache()
+                flush_typeclass_cache()
         # if this is the first start we might not have a "previous"
         # setup saved. Store it now.
         [ServerConfig.objects.conf(settings_names[i], tup[1])
@@ -371,6 +373,10 @@ class Evennia(object):
             ServerConfig.objects.conf("server_restart_mode", "reset")
             self.at_server_cold_stop()
 
+        # save eventual batched Attribute changes
+        from evennia.utils.dbserialize import flush_dirty
+        flush_dirty()
+
         # tickerhandler state should always be saved.
         from evennia.scripts.tickerhandler import TICKER_HANDLER
         TICKER_HANDLER.save()
@@ -378,6 +384,10 @@ class Evennia(object):
         # always called, also for a reload
         self.at_server_stop()
 
+        # store eventual queued write-behind saves
+        from evennia.utils.idmapper.models import flush_write_behind
+        flush_write_behind()
+
         # if _reactor_stopping is true, reactor does not need to
         # be stopped again.
         if os.name == 'nt' and os.path.exists(SERVER_PIDFILE):
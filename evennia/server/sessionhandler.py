@@ -30,6 +30,7 @@ _ServerSession = None
 _ServerConfig = None
 _ScriptDB = None
 _OOB_HANDLER = None
+_UPDATE_ONLINE_SUBSCRIBER = None
 
 
 # AMP signals
@@ -73,6 +74,17 @@ def delayed_import():
     _ServerSession, _PlayerDB, _ServerConfig, _ScriptDB
 
 
+def _update_channel_subscriber(player):
+    """
+    Let the channels know a Player went online or offline.
+
+    """
+    global _UPDATE_ONLINE_SUBSCRIBER
+    if not _UPDATE_ONLINE_SUBSCRIBER:
+        from evennia.comms.models import update_online_subscriber as _UPDATE_ONLINE_SUBSCRIBER
+    _UPDATE_ONLINE_SUBSCRIBER(player)
+
+
 #-----------------------------------------------------------
 # SessionHandler base class
 #------------------------------------------------------------
@@ -312,6 +324,7 @@ class ServerSessionHandler(SessionHandler):
 
         if not self.sessions_from_player(player):
             player.is_connected = True
+            _update_channel_subscriber(player)
 
         # sets up and assigns all properties on the session
         session.at_login(player)
@@ -363,7 +376,10 @@ class ServerSessionHandler(SessionHandler):
             string = string.format(player=session.player, address=session.address, nsessions=nsess)
             session.log(string)
 
+        player = session.logged_in and session.player
         session.at_disconnect()
+        if player and not player.is_connected:
+            _update_channel_subscriber(player)
         sessid = session.sessid
         del self.sessions[sessid]
         # inform portal that session should be closed.
@@ -519,6 +535,40 @@ class ServerSessionHandler(SessionHandler):
         return self.sessions.get(sessid)
     sessions_from_character = sessions_from_puppet
 
+    def data_out_players(self, players, text="", **kwargs):
+        """
+        Send the same data to the sessions of many Players at once.
+        Which sessions of each Player receive it follows
+        MULTISESSION_MODE, like for `player.msg`, but all sessions
+        are looked up in one go.
+
+        Args:
+            players (list): The Players to send to. Players not
+                connected are ignored.
+            text (str, optional): Text data to send.
+
+        Kwargs:
+            kwargs (any): Other data to the protocol.
+
+        """
+        uids = set(player.id for player in players)
+        player_sessions = {}
+        for session in self.sessions.values():
+            if session.logged_in and session.uid in uids:
+                player_sessions.setdefault(session.uid, []).append(session)
+        text = to_str(text, force_string=True) if text else ""
+        # we pick the sessions ourselves
+        kwargs["_forced_nomulti"] = True
+        for sessions in player_sessions.values():
+            if _MULTISESSION_MODE == 3 and sessions[0].puppet:
+                # only the sessions controlling the same puppet
+                puppet = sessions[0].puppet
+                sessions = [sess for sess in sessions if sess.puppet == puppet]
+            elif _MULTISESSION_MODE == 0:
+                sessions = sessions[:1]
+            for session in sessions:
+                session.msg(text=text, **kwargs)
+
     def announce_all(self, message):
         """
         Send message to all connected sessions
@@ -45,3 +45,129 @@ class EvenniaTestSuiteRunner(DiscoverRunner):
         import evennia
         evennia._init()
         return super(EvenniaTestSuiteRunner, self).build_suite(test_labels, extra_tests=extra_tests, **kwargs)
+
+
+class TestAMPBatch(TestCase):
+    def test_batch(self):
+        from mock import Mock, patch
+        from evennia.server import amp
+        proto = amp.AMPProtocol()
+        proto.callRemote = Mock()
+        with patch("evennia.server.amp.reactor") as mock_reactor:
+            proto.send_MsgServer2Portal(1, text="Hello")
+            proto.send_MsgServer2Portal(2, text="Hello")
+            proto.send_MsgServer2Portal(1, text="Bye")
+            proto.send_MsgServer2Portal(2, text="Hello")
+            proto.send_MsgServer2Portal(3, text="Hello")
+        self.assertEqual(1, mock_reactor.callLater.call_count)
+        proto.send_MsgServer2PortalBatch()
+        batch = amp.loads(proto.callRemote.call_args[1]["packed_data"])
+        self.assertEqual([([1, 2], {"text": "Hello"}), ([1], {"text": "Bye"}),
+                          ([2, 3], {"text": "Hello"})], batch)
+        # the portal side delivers the entries in order
+        proto.factory = Mock()
+        proto.portal_receive_server2portal_batch(amp.dumps(batch))
+        self.assertEqual([("broadcast", ([1, 2],), {"text": "Hello"}),
+                          ("data_out", (1,), {"text": "Bye"}),
+                          ("broadcast", ([2, 3],), {"text": "Hello"})],
+                         [tuple(call) for call in proto.factory.portal.sessions.mock_calls])
+
+
+class TestAMPCompression(TestCase):
+    def test_codec(self):
+        from mock import patch
+        from evennia.server import amp
+        codec = amp.Compressed()
+        small, large = amp.dumps((1, {"text": "look"})), amp.dumps((1, {"text": "Hello " * 100}))
+        self.assertEqual(amp._FLAG_RAW, codec.toString(small)[0])
+        self.assertEqual(small, codec.fromString(codec.toString(small)))
+        self.assertEqual(amp._FLAG_ZLIB, codec.toString(large)[0])
+        self.assertEqual(large, codec.fromString(codec.toString(large)))
+        with patch("evennia.server.amp._COMPRESS_DICTIONARY", True):
+            wire = codec.toString(large)
+            self.assertEqual(large, codec.fromString(wire))
+            self.assertEqual(large, codec.fromString(wire))
+        # data from versions without a flag byte
+        self.assertEqual(large, codec.fromString(amp.zlib.compress(large, 9)))
+
+
+class TestInputThrottle(TestCase):
+    def test_throttle(self):
+        from mock import Mock, patch
+        from evennia.server.portal import portalsessionhandler as psh
+        handler = psh.PortalSessionHandler()
+        handler.portal = Mock()
+        send = handler.portal.amp_protocol.send_MsgPortal2Server
+        spammer, player = Mock(sessid=1), Mock(sessid=2)
+        with patch.multiple(psh, _MAX_SESSION_COMMAND_RATE=1.0, _MAX_SESSION_COMMAND_BURST=3,
+                            _MAX_SESSION_COMMAND_QUEUE=2, _MAX_COMMAND_RATE=100.0, reactor=Mock()):
+            for inum in range(6):
+                handler.data_in(spammer, text="spam%i" % inum)
+            handler.data_in(player, text="look")
+            self.assertEqual(["spam0", "spam1", "spam2", "look"],
+                             [call[2]["text"] for call in send.mock_calls])
+            self.assertEqual({"received": 6, "queued": 2, "dropped": 1, "pending": 2},
+                             handler.get_throttle_stats()[1])
+            # the queue drains as tokens refill
+            handler.command_throttles[1].tokens = 1
+            handler.command_throttles[1].last_refill = psh.time()
+            handler._drain_commands()
+            self.assertEqual("spam3", send.mock_calls[-1][2]["text"])
+            self.assertEqual(1, handler.get_throttle_stats()[1]["pending"])
+
+
+class TestPortalBroadcast(TestCase):
+    def test_render_once(self):
+        from mock import Mock
+        from evennia.server.portal.portalsessionhandler import PortalSessionHandler
+        handler = PortalSessionHandler()
+        renderfunc = Mock(side_effect=lambda text, profile: "%s:%s" % (profile, text))
+
+        class _Session(object):
+            def __init__(self, profile):
+                self.profile, self.sent = profile, []
+            def data_out(self, text=None, **kwargs):
+                self.sent.append(handler.render((self.profile,), renderfunc, text, self.profile))
+
+        handler.sessions = dict((sessid, _Session(profile)) for sessid, profile
+                                in enumerate(["ansi", "ansi", "html", "ansi", "html"]))
+        handler.broadcast(range(5), text="Hello")
+        self.assertEqual(2, renderfunc.call_count)
+        self.assertEqual(["ansi:Hello", "ansi:Hello", "html:Hello", "ansi:Hello", "html:Hello"],
+                         [handler.sessions[sessid].sent[0] for sessid in range(5)])
+        # outside a broadcast, nothing is cached
+        handler.data_out(0, text="Bye")
+        handler.data_out(1, text="Again")
+        self.assertEqual(["ansi:Bye", "ansi:Again"],
+                         handler.sessions[0].sent[1:] + handler.sessions[1].sent[1:])
+
+
+class TestWebClientReceive(TestCase):
+    def test_receive_all(self):
+        import json
+        from mock import Mock, patch
+        from evennia.server.portal import webclient
+        client = webclient.WebClient()
+        request = Mock(args={"suid": ["abc"]})
+        with patch.multiple(webclient, _RECEIVE_MAX_SIZE=80, _BUFFER_SIZE=4,
+                            _BUFFER_OVERFLOW="drop_oldest"):
+            for inum in range(5):
+                client.lineSend("abc", "message %i" % inum)
+            self.assertEqual(1, client.overflows)
+            # the size cap splits the buffer over two replies
+            first = json.loads(client.mode_receive(request))
+            second = json.loads(client.mode_receive(request))
+        self.assertEqual(["message 1", "message 2"], [entry["msg"] for entry in first])
+        self.assertEqual(["message 3", "message 4"], [entry["msg"] for entry in second])
+
+    def test_session_from_suid(self):
+        from mock import Mock
+        from evennia.server.portal.portalsessionhandler import PortalSessionHandler
+        handler = PortalSessionHandler()
+        handler.portal = Mock()
+        handler.connection_last = 0
+        sess = Mock(sessid=None, suid="abc")
+        handler.connect(sess)
+        self.assertEqual([sess], handler.session_from_suid("abc"))
+        handler.server_disconnect(sess.sessid)
+        self.assertEqual([], handler.session_from_suid("abc"))
@@ -63,6 +63,16 @@ WEBSERVER_THREADPOOL_LIMITS = (1, 20)
 # offers the fallback ajax-based webclient backbone for browsers not supporting
 # the websocket one.
 WEBCLIENT_ENABLED = True
+# The ajax webclient buffers output until the browser asks for it.
+# All buffered messages are returned at once, up to this many bytes
+# per reply (a single message larger than this is still sent).
+WEBCLIENT_RECEIVE_MAX_SIZE = 65536
+# How many messages may be buffered for one ajax webclient session,
+# such as when its browser has stopped polling. What happens with
+# messages beyond this is decided by WEBCLIENT_BUFFER_OVERFLOW, one of
+# 'drop_oldest', 'drop_newest' or 'disconnect'.
+WEBCLIENT_BUFFER_SIZE = 1000
+WEBCLIENT_BUFFER_OVERFLOW = 'drop_oldest'
 # Activate Websocket support for modern browsers. If this is on, the
 # default webclient will use this and only use the ajax version of the browser
 # is too old to support websockets. Requires WEBCLIENT_ENABLED.
@@ -158,40 +168,67 @@ SCREENREADER_REGEX_STRIP = r"\+-+|\+$|\+~|--+|~~+|==+"
 AMP_HOST = 'localhost'
 AMP_PORT = 5000
 AMP_INTERFACE = '127.0.0.1'
+# Data passed between Portal and Server over AMP is compressed with zlib
+# when it is larger than this many bytes; smaller payloads are sent as-is
+# since compressing them costs more CPU than it saves.
+AMP_COMPRESSION_THRESHOLD = 256   # (bytes)
+# The zlib compression level (1-9) to use for AMP data. Lower levels are
+# faster, higher levels give smaller payloads.
+AMP_COMPRESSION_LEVEL = 6
+# If set, AMP compression is primed with a dictionary of common MUD text
+# and message fragments. This gives better compression of small and
+# medium payloads at the cost of some extra CPU per payload.
+AMP_COMPRESSION_DICTIONARY = False
 # Database objects are cached in what is known as the idmapper. The idmapper
 # caching results in a massive speedup of the server (since it dramatically
 # limits the number of database accesses needed) and also allows for
 # storing temporary data on objects. It is however also the main memory
-# consumer of Evennia. With this setting the cache can be capped and
-# flushed when it reaches a certain size. Minimum is 50 MB but it is
-# not recommended to set this to less than 100 MB for a distribution
-# system.
-# Empirically, N_objects_in_cache ~ ((RMEM - 35) / 0.0157):
-#  mem(MB)   |  objs in cache   ||   mem(MB)   |   objs in cache
-#      50    |       ~1000      ||      800    |     ~49 000
-#     100    |       ~4000      ||     1200    |     ~75 000
-#     200    |      ~10 000     ||     1600    |    ~100 000
-#     500    |      ~30 000     ||     2000    |    ~125 000
-# Note that the estimated memory usage is not exact (and the cap is only
-# checked every 5 minutes), so err on the side of caution if
-# running on a server with limited memory. Also note that Python
-# will not necessarily return the memory to the OS when the idmapper
-# flashes (the memory will be freed and made available to the Python
-# process only). How many objects need to be in memory at any given
+# consumer of Evennia. With this setting the cache can be capped. When
+# the resident memory of the server process comes within 10% of this
+# value, the least recently used objects are evicted from the cache,
+# roughly in proportion to how much memory must be freed. Minimum is
+# 50 MB but it is not recommended to set this to less than 100 MB for a
+# distribution system.
+# Note that the cap is only checked every 5 minutes, so err on the side
+# of caution if running on a server with limited memory. Also note that
+# Python will not necessarily return the memory to the OS when the
+# idmapper evicts objects (the memory will be freed and made available
+# to the Python process only). How many objects need to be in memory at any given
 # time depends very much on your game so some experimentation may
 # be necessary (use @server to see how many objects are in the idmapper
 # cache at any time). Setting this to None disables the cache cap.
 IDMAPPER_CACHE_MAXSIZE = 200      # (MB)
+# If set, database saves that only update some fields of an existing row
+# (such as when assigning to obj.key or obj.location) are queued for this
+# many seconds and then stored together in a single transaction. Repeated
+# updates to the same row are merged, which can cut the database load
+# considerably during busy moments. The queue is stored before querying
+# the database through the managers of Evennia's models (such as
+# ObjectDB.objects) and when the server stops or reloads. Queries made
+# in other ways (plain Django models such as m2m through tables, or raw
+# SQL) and other processes accessing the database will see the changes
+# with a delay; call evennia.utils.idmapper.models.flush_write_behind()
+# first if that matters. Set to None to save directly.
+IDMAPPER_WRITE_BEHIND_INTERVAL = None  # (seconds)
 # This determines how many connections per second the Portal should
 # accept, as a DoS countermeasure. If the rate exceeds this number, incoming
 # connections will be queued to this rate, so none will be lost.
 # Must be set to a value > 0.
 MAX_CONNECTION_RATE = 2
 # Determine how many commands per second a given Session is allowed
-# to send to the Portal via a connected protocol. Too high rate will
-# drop the command and echo a warning. Note that this will also cap
-# OOB messages so don't set it too low if you expect a lot of events
+# to send to the Portal via a connected protocol. A session may send up
+# to MAX_SESSION_COMMAND_BURST commands at once, after which further
+# input is queued and passed on at this rate. Note that this will also
+# cap OOB messages so don't set it too low if you expect a lot of events
 # from the client! To turn the limiter off, set to <= 0.
+MAX_SESSION_COMMAND_RATE = 10
+MAX_SESSION_COMMAND_BURST = 30
+# How many commands may be queued for a throttled session. Input
+# beyond this is dropped, echoing COMMAND_RATE_WARNING.
+MAX_SESSION_COMMAND_QUEUE = 100
+# The total number of commands per second passed from all sessions on to
+# the Server. This is a backstop against many sessions flooding at the same
+# time; excess input is queued on each session. To turn off, set to <= 0.
 MAX_COMMAND_RATE = 80
 # The warning to echo back to users if they send commands too fast
 COMMAND_RATE_WARNING ="You entered commands too fast. Wait a moment and try again."
@@ -275,6 +312,10 @@ MSSP_META_MODULE = "server.conf.mssp"
 # Tuple of modules implementing lock functions. All callable functions
 # inside these modules will be available as lock functions.
 LOCK_FUNC_MODULES = ("evennia.locks.lockfuncs", "server.conf.lockfuncs",)
+# Parsed lock definitions are cached and shared between all objects
+# with the same lock string. This sets the maximum number of different
+# lock strings to keep parsed, dropping the least recently used first.
+LOCKSTRING_CACHE_SIZE = 2000
 # Module holding OOB (Out of Band) hook objects. This allows for customization
 # and expansion of which hooks OOB protocols are allowed to call on the server
 # protocols for attaching tracker hooks for when various object field change
@@ -302,6 +343,11 @@ CMDSET_CHARACTER = "commands.default_cmdsets.CharacterCmdSet"
 CMDSET_PLAYER = "commands.default_cmdsets.PlayerCmdSet"
 # Location to search for cmdsets if full path not given
 CMDSET_PATHS = ["commands", "evennia", "contribs"]
+# The cmdhandler caches the result of merging the cmdsets available to
+# a caller, so the merge need not be redone for every command. This is
+# the maximum number of merged cmdsets to keep; the least recently used
+# merges are discarded first. Set to None for an unbounded cache.
+CMDSET_MERGE_CACHE_SIZE = 2000
 
 ######################################################################
 # Typeclasses and other paths
@@ -347,6 +393,32 @@ START_LOCATION = "#2"
 # out of sync between the processes. Keep on unless you face such
 # issues.
 TYPECLASS_AGGRESSIVE_CACHE = True
+# Attribute values are stored in serialized form and are normally
+# deserialized on every access, building new copies of lists and
+# dicts each time. With this set, the deserialized value is cached on
+# the Attribute until it is changed, which is faster for Attributes
+# read often. Note that repeated reads then return the same mutable
+# value rather than separate copies.
+ATTRIBUTE_VALUE_CACHE = False
+# Updating a list, dict or set stored in an Attribute in-place, like
+# obj.db.mylist[3]["count"] += 1, normally re-saves the whole value
+# right away. With this set, the change is instead saved once after the
+# current command or reactor iteration, so many updates to the same
+# value only cause one save. Changes are always saved before reloading
+# or shutting down, or when calling obj.attributes.flush().
+ATTRIBUTE_BATCH_SAVE = False
+# The TickerHandler stores its subscriptions in the database whenever
+# they change. The store is done this many seconds after a change, so
+# many subscriptions made together (such as at startup) are stored
+# only once. It is always stored before reloading or shutting down.
+# Set to None to store on every change.
+TICKER_SAVE_DELAY = 0
+# Timed Scripts and the TickerHandler schedule their timers in a shared
+# timer wheel rather than each adding their own timer to the reactor,
+# which scales better to many thousands of timers. This is the
+# resolution of the wheel in seconds; timers may fire up to this much
+# later than due. Set to None to use one reactor timer per timer.
+SCRIPT_TIMER_RESOLUTION = 0.1
 
 ######################################################################
 # Batch processors
@@ -475,6 +547,15 @@ DEFAULT_CHANNELS = [
                    "desc": "Connection log",
                    "locks": "control:perm(Immortals);listen:perm(Wizards);send:false()"}
                   ]
+# Searching the text of messages (such as with
+# evennia.search_message(freetext=...)) normally scans all stored
+# messages. With a search index, only messages containing all the
+# searched words are looked at, best match first. Note that an index
+# matches whole words rather than any part of the text. Set to "auto"
+# to use a SQLite FTS5 table if the database supports it and otherwise
+# an in-memory index, or to the python path of an index class (see
+# evennia.comms.msgindex). None means no index.
+MSG_SEARCH_INDEX = None
 
 ######################################################################
 # External Channel connections
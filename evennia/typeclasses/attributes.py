@@ -12,16 +12,48 @@ import re
 import weakref
 
 from django.db import models
+from django.db.models.signals import post_delete
 from django.conf import settings
 from django.utils.encoding import smart_str
 
 from evennia.locks.lockhandler import LockHandler
 from evennia.utils.idmapper.models import SharedMemoryModel
-from evennia.utils.dbserialize import to_pickle, from_pickle
+from evennia.utils.dbserialize import (to_pickle, from_pickle, has_packed_dbobj,
+                                       get_dirty_root, discard_dirty_root, flush_dirty)
 from evennia.utils.picklefield import PickledObjectField
 from evennia.utils.utils import lazy_property, to_str, make_iter
 
 _TYPECLASS_AGGRESSIVE_CACHE = settings.TYPECLASS_AGGRESSIVE_CACHE
+_ATTRIBUTE_VALUE_CACHE = settings.ATTRIBUTE_VALUE_CACHE
+
+#------------------------------------------------------------
+#
+#   Attribute value cache
+#
+#------------------------------------------------------------
+
+# Deserialized values referencing database objects are only valid
+# until a database object is deleted, since they might then have
+# to be unpacked as None. This counts deletions to detect that.
+_DELETE_GENERATION = [0]
+_VALUE_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def _bump_delete_generation(sender, **kwargs):
+    "Signal handler called whenever any database object is deleted"
+    _DELETE_GENERATION[0] += 1
+post_delete.connect(_bump_delete_generation)
+
+
+def value_cache_stats():
+    """
+    Get statistics for the Attribute value cache.
+
+    Returns:
+        stats (dict): The number of `hits` and `misses` so far.
+
+    """
+    return dict(_VALUE_CACHE_STATS)
 
 #------------------------------------------------------------
 #
@@ -125,23 +157,50 @@ class Attribute(SharedMemoryModel):
     # value = self.attr and del self.attr respectively (where self
     # is the object in question).
 
+    # cache of the deserialized value, as a tuple
+    # (db_value, delete_generation or None, value)
+    _cached_value = None
+
     # value property (wraps db_value)
     #@property
     def __value_get(self):
         """
         Getter. Allows for `value = self.value`.
-        We cannot cache here since it makes certain cases (such
-        as storing a dbobj which is then deleted elsewhere) out-of-sync.
-        The overhead of unpickling seems hard to avoid.
-        """
-        return from_pickle(self.db_value, db_obj=self)
+
+        If `settings.ATTRIBUTE_VALUE_CACHE` is set, the deserialized
+        value is cached until the value is set again. Values
+        referencing database objects are also re-read after any
+        database object was deleted, since the reference may then
+        be gone.
+
+        If `settings.ATTRIBUTE_BATCH_SAVE` is set, an updated but not
+        yet saved mutable value is returned as-is.
+        """
+        dirty = get_dirty_root(self)
+        if dirty is not None:
+            return dirty
+        if not _ATTRIBUTE_VALUE_CACHE:
+            return from_pickle(self.db_value, db_obj=self)
+        cached = self._cached_value
+        if (cached and cached[0] is self.db_value and
+                cached[1] in (None, _DELETE_GENERATION[0])):
+            _VALUE_CACHE_STATS["hits"] += 1
+            return cached[2]
+        _VALUE_CACHE_STATS["misses"] += 1
+        db_value = self.db_value
+        generation = _DELETE_GENERATION[0] if has_packed_dbobj(db_value) else None
+        value = from_pickle(db_value, db_obj=self)
+        self._cached_value = (db_value, generation, value)
+        return value
 
     #@value.setter
     def __value_set(self, new_value):
         """
-        Setter. Allows for self.value = value. We cannot cache here,
-        see self.__value_get.
+        Setter. Allows for self.value = value. This invalidates
+        the cached value and pending batch-saves, if any.
         """
+        self._cached_value = None
+        discard_dirty_root(self)
         self.db_value = to_pickle(new_value)
         self.save(update_fields=["db_value"])
 
@@ -185,6 +244,12 @@ class Attribute(SharedMemoryModel):
         return result
 
 
+def _discard_deleted_dirty_root(sender, instance, **kwargs):
+    "Signal handler dropping pending batch-saves of deleted Attributes"
+    discard_dirty_root(instance)
+post_delete.connect(_discard_deleted_dirty_root, sender=Attribute)
+
+
 #
 # Handlers making use of the Attribute model
 #
@@ -210,7 +275,20 @@ class AttributeHandler(object):
         "Cache all attributes of this object"
         query = {"%s__id" % self._model : self._objid,
                  "attribute__db_attrtype" : self._attrtype}
-        attrs = [conn.attribute for conn in getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query)]
+        attrs = [conn.attribute for conn in getattr(self.obj, self._m2m_fieldname).through.objects.filter(
+                                                            **query).select_related("attribute")]
+        self._cache_attributes(attrs)
+
+    def _cache_attributes(self, attrs):
+        """
+        Replace the cache with the given Attributes. This is also
+        used by the managers to fill the caches of many objects at once.
+
+        Args:
+            attrs (list): All Attributes of this handler's type stored on
+                the object.
+
+        """
         self._cache = dict(("%s-%s" % (to_str(attr.db_key).lower(),
                                        attr.db_category.lower() if attr.db_category else None),
                             attr) for attr in attrs)
@@ -505,6 +583,22 @@ class AttributeHandler(object):
             [attr.delete() for attr in self._cache.values()]
         self._recache()
 
+    def flush(self):
+        """
+        Save all nested Attribute values on this object that were
+        changed but not yet saved. This is only needed if
+        `settings.ATTRIBUTE_BATCH_SAVE` is set, where changes
+        are otherwise saved after the current command or reactor
+        iteration.
+
+        Returns:
+            nflushed (int): The number of Attributes saved.
+
+        """
+        if not self._cache:
+            return 0
+        return flush_dirty(self._cache.values())
+
     def all(self, accessing_obj=None, default_access=True):
         """
         Return all Attribute objects on this object.
@@ -4,6 +4,7 @@ abstract models in dbobjects.py (and which are thus shared by
 all Attributes and TypedObjects).
 
 """
+from collections import defaultdict
 from functools import update_wrapper
 from django.db.models import Q
 from evennia.utils import idmapper
@@ -12,6 +13,9 @@ from evennia.utils.utils import make_iter, variable_from_module
 __all__ = ("TypedObjectManager", )
 _GA = object.__getattribute__
 _Tag = None
+# max number of objects to fetch Attributes for in one query (this
+# keeps us below the sql variable limit of some databases)
+_PREFETCH_CHUNK_SIZE = 500
 
 #
 # Decorators
@@ -102,6 +106,90 @@ class TypedObjectManager(idmapper.manager.SharedMemoryManager):
             query.append(("attribute__db_value", value))
         return [th.attribute for th in self.model.db_attributes.through.objects.filter(**dict(query))]
 
+    def prefetch_attributes(self, objs, attrtype=None, force=False):
+        """
+        Fill the Attribute caches of many objects at once. This loads
+        the Attributes of all given objects in one query (or one query
+        per few hundred objects), rather than each object's handler
+        querying separately on its first Attribute access.
+
+        Args:
+            objs (list): Entities handled by this manager, such as the
+                contents of a room.
+            attrtype (str, optional): The Attribute-type to load. `None`
+                fills the `attributes` handlers and `"nick"` the `nicks`
+                handlers.
+            force (bool, optional): Also reload handlers that are already
+                cached. Normally those are skipped.
+
+        Returns:
+            nqueried (int): The number of objects whose Attributes were
+                loaded.
+
+        """
+        handlername = "nicks" if attrtype == "nick" else "attributes"
+        handlers = {}
+        for obj in make_iter(objs):
+            if obj and obj.id:
+                handler = getattr(obj, handlername)
+                if force or handler._cache is None:
+                    handlers[obj.id] = handler
+        if not handlers:
+            return 0
+        modelname = self.model.__dbclass__.__name__.lower()
+        fieldname = "%s_id" % modelname
+        through = self.model.db_attributes.through
+        objids = handlers.keys()
+        attrs = defaultdict(list)
+        for istart in range(0, len(objids), _PREFETCH_CHUNK_SIZE):
+            query = {"%s__id__in" % modelname: objids[istart:istart + _PREFETCH_CHUNK_SIZE],
+                     "attribute__db_attrtype": attrtype}
+            for conn in through.objects.filter(**query).select_related("attribute"):
+                attrs[getattr(conn, fieldname)].append(conn.attribute)
+        for objid, handler in handlers.items():
+            handler._cache_attributes(attrs[objid])
+        return len(handlers)
+
+    def prefetch_tags(self, objs, tagtype=None, force=False):
+        """
+        Fill the Tag caches of many objects at once, in parallel to
+        `prefetch_attributes`.
+
+        Args:
+            objs (list): Entities handled by this manager.
+            tagtype (str, optional): The Tag-type to load. `None` fills
+                the `tags` handlers, `"alias"` the `aliases` handlers and
+                `"permission"` the `permissions` handlers.
+            force (bool, optional): Also reload handlers that are already
+                cached. Normally those are skipped.
+
+        Returns:
+            nqueried (int): The number of objects whose Tags were loaded.
+
+        """
+        handlername = {"alias": "aliases", "permission": "permissions"}.get(tagtype, "tags")
+        handlers = {}
+        for obj in make_iter(objs):
+            if obj and obj.id:
+                handler = getattr(obj, handlername)
+                if force or handler._cache is None:
+                    handlers[obj.id] = handler
+        if not handlers:
+            return 0
+        modelname = self.model.__dbclass__.__name__.lower()
+        fieldname = "%s_id" % modelname
+        through = self.model.db_tags.through
+        objids = handlers.keys()
+        tags = defaultdict(list)
+        for istart in range(0, len(objids), _PREFETCH_CHUNK_SIZE):
+            query = {"%s__id__in" % modelname: objids[istart:istart + _PREFETCH_CHUNK_SIZE],
+                     "tag__db_tagtype": tagtype}
+            for conn in through.objects.filter(**query).select_related("tag"):
+                tags[getattr(conn, fieldname)].append(conn.tag)
+        for objid, handler in handlers.items():
+            handler._cache_tags(tags[objid])
+        return len(handlers)
+
     def get_nick(self, key=None, category=None, value=None, strvalue=None, obj=None):
         """
         Get a nick, in parallel to `get_attribute`.
@@ -55,6 +55,73 @@ _TYPECLASS_AGGRESSIVE_CACHE = settings.TYPECLASS_AGGRESSIVE_CACHE
 _GA = object.__getattribute__
 _SA = object.__setattr__
 
+# resolved typeclasses, {(model, path, use_typeclass_paths): class}
+_TYPECLASS_CACHE = {}
+
+
+def flush_typeclass_cache():
+    """
+    Forget all resolved typeclass paths. Use this if the typeclass
+    modules or the default typeclass settings changed.
+
+    """
+    _TYPECLASS_CACHE.clear()
+
+
+def _resolve_typeclass(model, path, use_typeclass_paths):
+    """
+    Find the class to use for a typeclass path, falling back to the
+    default typeclasses of the model if it cannot be loaded.
+
+    Args:
+        model (class): The class being instantiated.
+        path (str): The typeclass path to load.
+        use_typeclass_paths (bool): If `path` was given explicitly
+            (rather than read from the database). Such paths may be
+            relative to `settings.TYPECLASS_PATHS` and fall back to
+            the `__settingsclasspath__` of the model first.
+
+    Returns:
+        typeclass (class): The class to use.
+
+    Notes:
+        The result is cached per path, including when the path
+        fails to load, so the fallbacks are only searched (and the
+        errors only logged) the first time a path is seen.
+
+    """
+    key = (model, path, use_typeclass_paths)
+    try:
+        return _TYPECLASS_CACHE[key]
+    except KeyError:
+        pass
+    if use_typeclass_paths:
+        try:
+            typeclass = class_from_module(path, defaultpaths=settings.TYPECLASS_PATHS)
+        except Exception:
+            log_trace()
+            try:
+                typeclass = class_from_module(model.__settingsclasspath__)
+            except Exception:
+                log_trace()
+                try:
+                    typeclass = class_from_module(model.__defaultclasspath__)
+                except Exception:
+                    log_trace()
+                    typeclass = model._meta.proxy_for_model or model
+    else:
+        try:
+            typeclass = class_from_module(path)
+        except Exception:
+            log_trace()
+            try:
+                typeclass = class_from_module(model.__defaultclasspath__)
+            except Exception:
+                log_trace()
+                typeclass = model
+    _TYPECLASS_CACHE[key] = typeclass
+    return typeclass
+
 #------------------------------------------------------------
 #
 # Typed Objects
@@ -224,37 +291,19 @@ class TypedObject(SharedMemoryModel):
             Normal operation is to load successfully at either step 1
             or 2 depending on how the class was called. Tracebacks
             will be logged for every step the loader must take beyond
-            2.
+            2. The outcome for each path is cached, so the tracebacks
+            are only logged the first time a path fails to load.
 
         """
         typeclass_path = kwargs.pop("typeclass", None)
         super(TypedObject, self).__init__(*args, **kwargs)
         if typeclass_path:
             try:
-                self.__class__ = class_from_module(typeclass_path, defaultpaths=settings.TYPECLASS_PATHS)
-            except Exception:
-                log_trace()
-                try:
-                    self.__class__ = class_from_module(self.__settingsclasspath__)
-                except Exception:
-                    log_trace()
-                    try:
-                        self.__class__ = class_from_module(self.__defaultclasspath__)
-                    except Exception:
-                        log_trace()
-                        self.__class__ = self._meta.proxy_for_model or self.__class__
+                self.__class__ = _resolve_typeclass(self.__class__, typeclass_path, True)
             finally:
                 self.db_typclass_path = typeclass_path
         elif self.db_typeclass_path:
-            try:
-                self.__class__ = class_from_module(self.db_typeclass_path)
-            except Exception:
-                log_trace()
-                try:
-                    self.__class__ = class_from_module(self.__defaultclasspath__)
-                except Exception:
-                    log_trace()
-                    self.__dbclass__ = self._meta.proxy_for_model or self.__class__
+            self.__class__ = _resolve_typeclass(self.__class__, self.db_typeclass_path, False)
         else:
             self.db_typeclass_path = "%s.%s" % (self.__module__, self.__class__.__name__)
         # important to put this at the end since _meta is based on the set __class__
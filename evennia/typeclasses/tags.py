@@ -105,6 +105,17 @@ class TagHandler(object):
         query = {"%s__id" % self._model : self._objid,
                  "tag__db_tagtype" : self._tagtype}
         tagobjs = [conn.tag for conn in getattr(self.obj, self._m2m_fieldname).through.objects.filter(**query)]
+        self._cache_tags(tagobjs)
+
+    def _cache_tags(self, tagobjs):
+        """
+        Replace the cache with the given Tags. This is also used by
+        the managers to fill the caches of many objects at once.
+
+        Args:
+            tagobjs (list): All Tags of this handler's type on the object.
+
+        """
         self._cache = dict(("%s-%s" % (to_str(tagobj.db_key).lower(),
                                        tagobj.db_category.lower() if tagobj.db_category else None),
                             tagobj) for tagobj in tagobjs)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""
+This is part of Evennia's unittest framework, for testing
+the stability and integrity of the codebase during updates.
+
+This module tests the Attribute and typeclass functionality.
+
+"""
+from mock import patch
+from evennia.utils.test_resources import EvenniaTest
+from evennia.objects.models import ObjectDB
+
+# ------------------------------------------------------------
+# Attribute testing
+# ------------------------------------------------------------
+
+
+class TestPrefetchAttributes(EvenniaTest):
+    def test_prefetch(self):
+        self.obj1.db.testattr = 1
+        self.obj2.attributes.add("testattr", 2, category="testcat")
+        objs = [self.obj1, self.obj2, self.char1]
+        for obj in objs:
+            obj.attributes._cache = None
+        with self.assertNumQueries(1):
+            self.assertEqual(3, ObjectDB.objects.prefetch_attributes(objs))
+        with self.assertNumQueries(0):
+            self.assertEqual(1, self.obj1.db.testattr)
+            self.assertEqual(2, self.obj2.attributes.get("testattr", category="testcat"))
+            self.assertEqual(None, self.char1.db.testattr)
+            # already cached handlers are skipped
+            self.assertEqual(0, ObjectDB.objects.prefetch_attributes(objs))
+
+
+@patch("evennia.typeclasses.attributes._ATTRIBUTE_VALUE_CACHE", True)
+class TestAttributeValueCache(EvenniaTest):
+    def test_value_cache(self):
+        self.obj1.db.stats = {"str": 10, "items": [1, 2]}
+        stats = self.obj1.db.stats
+        self.assertTrue(stats is self.obj1.db.stats)
+        stats["items"].append(3)
+        self.assertEqual([1, 2, 3], list(self.obj1.db.stats["items"]))
+        self.obj1.db.stats = {"str": 12}
+        self.assertEqual({"str": 12}, self.obj1.db.stats)
+
+    def test_deleted_reference(self):
+        self.obj1.db.target = self.obj2
+        self.assertEqual(self.obj2, self.obj1.db.target)
+        self.obj2.delete()
+        self.assertEqual(None, self.obj1.db.target)
+
+
+@patch("evennia.utils.dbserialize._BATCH_SAVE", True)
+@patch("evennia.utils.dbserialize.reactor")
+class TestAttributeBatchSave(EvenniaTest):
+    def test_batch_save(self, mock_reactor):
+        self.obj1.db.inventory = [{"count": 0}]
+        with self.assertNumQueries(0):
+            for _ in range(10):
+                self.obj1.db.inventory[0]["count"] += 1
+        self.assertEqual(10, self.obj1.db.inventory[0]["count"])
+        attr = self.obj1.attributes.get("inventory", return_obj=True)
+        self.assertEqual([{"count": 0}], attr.db_value)
+        self.assertEqual(1, self.obj1.attributes.flush())
+        self.assertEqual([{"count": 10}], attr.db_value)
+        self.assertEqual(0, self.obj1.attributes.flush())
+
+    def test_deleted_attribute(self, mock_reactor):
+        from evennia.typeclasses.attributes import Attribute
+        from evennia.utils.dbserialize import flush_dirty, get_dirty_root
+        self.obj1.db.inventory = [0]
+        self.obj1.db.inventory.append(1)
+        attr = self.obj1.attributes.get("inventory", return_obj=True)
+        self.assertTrue(get_dirty_root(attr))
+        # deleting the Attribute (also in bulk) drops its pending save
+        Attribute.objects.filter(id=attr.id).delete()
+        with patch("evennia.utils.dbserialize.logger") as mock_logger:
+            self.assertEqual(0, flush_dirty())
+        self.assertFalse(mock_logger.log_trace.called)
+
+
+@patch("evennia.utils.idmapper.models._WRITE_BEHIND_INTERVAL", 0.5)
+@patch("evennia.utils.idmapper.models.reactor")
+class TestWriteBehind(EvenniaTest):
+    def test_write_behind(self, mock_reactor):
+        from evennia.utils.idmapper.models import flush_write_behind, write_behind_stats
+        flush_write_behind()
+        with self.assertNumQueries(0):
+            for i in range(5):
+                self.obj1.key = "Obj%i" % i
+            self.obj2.key = "Other"
+        self.assertEqual(1, mock_reactor.callLater.call_count)
+        self.assertEqual(2, write_behind_stats()["pending"])
+        # querying stores the queue first
+        self.assertTrue(ObjectDB.objects.filter(db_key="Obj4").exists())
+        self.assertEqual(0, write_behind_stats()["pending"])
+        self.assertEqual(0, flush_write_behind())
+
+    def test_partial_save(self, mock_reactor):
+        from evennia.utils.idmapper.models import flush_write_behind, write_behind_stats
+        flush_write_behind()
+        self.obj1.key = "Queued"
+        self.assertEqual(1, write_behind_stats()["pending"])
+        # a save that is not deferred must not lose the pending field
+        self.obj1.save(update_fields=["db_cmdset_storage"], using="default")
+        self.assertEqual(0, write_behind_stats()["pending"])
+        self.assertTrue(ObjectDB.objects.filter(id=self.obj1.id, db_key="Queued").exists())
+
+
+class TestIdmapperEviction(EvenniaTest):
+    def test_evict_lru(self):
+        from evennia.utils.idmapper import models as idmapper
+        nstart, _, dbstats = idmapper.cache_size(stats=True)
+        nevicted = dbstats["ObjectDB"]["evictions"]
+        nobjs = dbstats["ObjectDB"]["size"]
+        self.assertEqual(nstart, sum(idmapper.cache_size()[1].values()))
+        for obj in (self.obj1, self.room1, self.room2, self.char1, self.char2, self.obj2):
+            ObjectDB.get_cached_instance(obj.id)
+        self.obj2.set_recache_protection()
+        self.assertEqual(nstart - 3, idmapper.evict_cache(3))
+        self.assertEqual(set([self.char1, self.char2, self.obj2]),
+                         set(ObjectDB.get_all_cached_instances()))
+        ntotal, _, dbstats = idmapper.cache_size(stats=True)
+        self.assertEqual(3, ntotal)
+        self.assertEqual(nevicted + nobjs - 3, dbstats["ObjectDB"]["evictions"])
+        self.assertTrue(dbstats["ObjectDB"]["hits"] >= 6)
+        self.obj2.set_recache_protection(False)
+
+
+class TestContentsHandler(EvenniaTest):
+    def test_kinds(self):
+        cache = self.room1.contents_cache
+        self.assertEqual([self.exit], self.room1.exits)
+        self.assertEqual(set([self.char1, self.char2]), set(cache.characters()))
+        self.assertEqual(set([self.exit, self.obj1, self.obj2, self.char2]),
+                         set(cache.contents_without(self.char1)))
+        # kinds follow changes of destination and location
+        self.obj1.destination = self.room2
+        self.assertEqual(set([self.exit, self.obj1]), set(self.room1.exits))
+        self.exit.location = self.room2
+        self.assertEqual([self.obj1], self.room1.exits)
+        self.assertEqual([self.exit], self.room2.exits)
+
+    def test_evicted(self):
+        self.obj2.flush_from_cache(force=True)
+        with self.assertNumQueries(1):
+            contents = self.room1.contents_cache.get(exclude=self.char1)
+        self.assertEqual(set([self.exit.pk, self.obj1.pk, self.obj2.pk, self.char2.pk]),
+                         set(obj.pk for obj in contents))
+
+
+class TestTypeclassCache(EvenniaTest):
+    def test_resolve_once(self):
+        from evennia.typeclasses import models as typeclass_models
+        from evennia.objects.objects import DefaultObject
+        typeclass_models.flush_typeclass_cache()
+        with patch.object(typeclass_models, "class_from_module",
+                          wraps=typeclass_models.class_from_module) as mock_load, \
+                patch.object(typeclass_models, "log_trace") as mock_trace:
+            for _ in range(3):
+                self.assertTrue(isinstance(ObjectDB(db_typeclass_path="no.such.Typeclass"),
+                                           DefaultObject))
+                ObjectDB(db_typeclass_path="evennia.objects.objects.DefaultObject")
+        # one failed load and its fallback, then the valid path
+        self.assertEqual(3, mock_load.call_count)
+        self.assertEqual(1, mock_trace.call_count)
+
+
+class TestCandidateSearch(EvenniaTest):
+    def test_search_in_memory(self):
+        self.obj1.aliases.add("sword")
+        self.obj2.key = "Big shiny sword"
+        candidates = self.room1.contents
+        ObjectDB.objects.prefetch_tags(candidates, tagtype="alias")
+        with self.assertNumQueries(0):
+            self.assertEqual([self.obj1], ObjectDB.objects.object_search("Sword", candidates=candidates))
+            self.assertEqual([self.obj2], ObjectDB.objects.object_search("bi sw", candidates=candidates,
+                                                                        exact=False))
+            self.assertEqual([self.char1], ObjectDB.objects.object_search("char", candidates=candidates))
+            self.assertEqual([], ObjectDB.objects.object_search("Room", candidates=candidates))
+        # same result as the database search
+        self.assertEqual([self.obj1], ObjectDB.objects.object_search("sword"))
@@ -14,6 +14,9 @@ user.
 
 """
 import re
+from array import array as _array
+from bisect import bisect_left
+from itertools import islice, izip
 from evennia.utils import utils
 from evennia.utils.utils import to_str, to_unicode
 
@@ -61,9 +64,8 @@ ANSI_SPACE = " "
 # Escapes
 ANSI_ESCAPES = ("{{", "\\\\")
 
-from collections import OrderedDict
-_PARSE_CACHE = OrderedDict()
 _PARSE_CACHE_SIZE = 10000
+_PARSE_CACHE = utils.LRUCache(maxsize=_PARSE_CACHE_SIZE)
 
 
 class ANSIParser(object):
@@ -247,42 +249,81 @@ class ANSIParser(object):
         if not string:
             return ''
 
-        # check cached parsings
-        global _PARSE_CACHE
-        cachekey = "%s-%s-%s-%s" % (string, strip_ansi, xterm256, mxp)
-        if cachekey in _PARSE_CACHE:
-            return _PARSE_CACHE[cachekey]
+        # check cached parsings. The key refers to the string rather
+        # than copying it, and reuses its cached hash.
+        cachekey = (string, strip_ansi, xterm256, mxp)
+        parsed_string = _PARSE_CACHE.get(cachekey)
+        if parsed_string is not None:
+            return parsed_string
+
+        # replace all markup tokens (and escapes) in one pass
+        table = self._get_token_table(xterm256, strip_ansi)
+        def do_token(match):
+            token = match.group()
+            try:
+                return table[token]
+            except KeyError:
+                return self._add_token(table, token, xterm256, strip_ansi)
+        parsed_string = self.tokenizer.sub(do_token, utils.to_str(string))
 
-        # pre-convert bright colors to xterm256 color tags
-        string = self.brightbg_sub.sub(self.sub_brightbg, string)
+        if not mxp and "{lc" in parsed_string:
+            parsed_string = self.strip_mxp(parsed_string)
 
-        def do_xterm256(part):
-            return self.sub_xterm256(part, xterm256)
+        if strip_ansi and ANSI_ESCAPE in parsed_string:
+            # remove all ansi codes manually inserted in string
+            parsed_string = self.strip_raw_codes(parsed_string)
 
-        in_string = utils.to_str(string)
+        _PARSE_CACHE.set(cachekey, parsed_string)
+        return parsed_string
 
-        # do string replacement
-        parsed_string =  ""
-        parts = self.ansi_escapes.split(in_string) + [" "]
-        for part, sep in zip(parts[::2], parts[1::2]):
-            pstring = self.xterm256_sub.sub(do_xterm256, part)
-            pstring = self.ansi_sub.sub(self.sub_ansi, pstring)
-            parsed_string += "%s%s" % (pstring, sep[0].strip())
+    def _get_token_table(self, xterm256, strip_ansi):
+        """
+        Get the table mapping markup tokens to their output for
+        the given output profile. The table is prefilled with the
+        fixed tokens; xterm256 tokens are added as they are found.
 
-        if not mxp:
-            parsed_string = self.strip_mxp(parsed_string)
+        Args:
+            xterm256 (bool): If xterm256 colors are supported.
+            strip_ansi (bool): If all markup is removed.
 
-        if strip_ansi:
-            # remove all ansi codes (including those manually
-            # inserted in string)
-            return self.strip_raw_codes(parsed_string)
+        Returns:
+            table (dict): Mapping `{token: output}`.
 
-        # cache and crop old cache
-        _PARSE_CACHE[cachekey] = parsed_string
-        if len(_PARSE_CACHE) > _PARSE_CACHE_SIZE:
-           _PARSE_CACHE.popitem(last=False)
+        """
+        tables = getattr(self, "_token_tables", None)
+        if tables is None:
+            tables = self._token_tables = {}
+        profile = (bool(xterm256), bool(strip_ansi))
+        table = tables.get(profile)
+        if table is None:
+            # the escapes are regexes, keyed here by the text they match;
+            # "\\\\" matches a single backslash, which is kept as it is
+            table = dict((re.sub(r"\\(.)", r"\1", escape), escape[0]) for escape in ANSI_ESCAPES)
+            for token, code in self.ansi_map.items():
+                table[token] = self.strip_raw_codes(code) if strip_ansi else code
+            tables[profile] = table
+        return table
+
+    def _add_token(self, table, token, xterm256, strip_ansi):
+        """
+        Convert a bright-background or xterm256 token and add it
+        to a token table.
 
-        return parsed_string
+        Args:
+            table (dict): The token table to update.
+            token (str): The token to convert.
+            xterm256 (bool): If xterm256 colors are supported.
+            strip_ansi (bool): If all markup is removed.
+
+        Returns:
+            output (str): The converted token.
+
+        """
+        # bright backgrounds are xterm256 background colors
+        rgbmatch = self.xterm256_sub.match(self.ansi_bright_bgs.get(token, token))
+        output = "" if strip_ansi else self.sub_xterm256(rgbmatch, xterm256)
+        table[token] = output
+        return output
 
     # Mapping using {r {n etc
 
@@ -384,6 +425,13 @@ class ANSIParser(object):
     # instance of each
     ansi_escapes = re.compile(r"(%s)" % "|".join(ANSI_ESCAPES), re.DOTALL)
 
+    # all markup, matched in one pass by parse_ansi. Escapes are
+    # matched first, so markup can be escaped.
+    tokenizer = re.compile(r"|".join(list(ANSI_ESCAPES) +
+                                     [re.escape(bgtoken) for bgtoken in ansi_bright_bgs] +
+                                     [tup[0] for tup in xterm256_map] +
+                                     [re.escape(tup[0]) for tup in ext_ansi_map]), re.DOTALL)
+
 ANSI_PARSER = ANSIParser()
 
 
@@ -520,14 +568,10 @@ def _transform(func_name):
     """
     def wrapped(self, *args, **kwargs):
         replacement_string = _query_super(func_name)(self, *args, **kwargs)
-        to_string = []
-        char_counter = 0
-        for index in range(0, len(self._raw_string)):
-            if index in self._code_indexes:
-                to_string.append(self._raw_string[index])
-            elif index in self._char_indexes:
-                to_string.append(replacement_string[char_counter])
-                char_counter += 1
+        to_string = list(self._raw_string)
+        for char_counter, index in enumerate(self._char_indexes):
+            to_string[index] = replacement_string[char_counter]
+        # the codes stay in place, so the index tables can be shared
         return ANSIString(
             ''.join(to_string), decoded=True,
             code_indexes=self._code_indexes, char_indexes=self._char_indexes,
@@ -535,6 +579,172 @@ def _transform(func_name):
     return wrapped
 
 
+class _IndexTable(object):
+    """
+    A read-only, sorted table of indexes into the raw string of an
+    ANSIString.
+
+    The indexes are stored in a compact integer array. A table is a
+    window `[start:stop]` onto such an array, with an `offset` added
+    to every value, so slicing and shifting a table shares the array
+    instead of copying it. A table without an array represents the
+    plain range of integers from `start` to `stop`, which is what the
+    strings without any ANSI codes need.
+
+    The table compares equal to any sequence holding the same values.
+
+    """
+    __slots__ = ("_array", "_start", "_stop", "_offset")
+
+    def __init__(self, array=None, start=0, stop=None, offset=0):
+        self._array = array
+        self._start = start
+        self._stop = len(array) if stop is None else stop
+        self._offset = offset
+
+    @classmethod
+    def range(cls, start, stop):
+        """
+        Create a table of consecutive indexes.
+
+        Args:
+            start (int): First index.
+            stop (int): End of the range, not included.
+
+        """
+        return cls(None, start, max(start, stop))
+
+    @classmethod
+    def from_iterable(cls, iterable):
+        """
+        Create a table from any iterable of sorted indexes.
+
+        Args:
+            iterable (iterable): The indexes. If this is already a
+                table, it is returned as-is.
+
+        """
+        if isinstance(iterable, cls):
+            return iterable
+        return cls(_array("i", iterable))
+
+    @classmethod
+    def concatenate(cls, *tables):
+        """
+        Join tables into a new one.
+
+        Args:
+            tables (tuple): `(table, shift)` pairs, where `shift` is
+                added to all the indexes of `table`.
+
+        Returns:
+            table (_IndexTable): The joined table.
+
+        """
+        tables = [(table, shift + table._offset) for table, shift in tables if len(table)]
+        if all(table._array is None for table, _ in tables):
+            # see if the ranges line up into a single range
+            start = stop = tables[0][0]._start + tables[0][1] if tables else 0
+            for table, shift in tables:
+                if table._start + shift != stop:
+                    break
+                stop = table._stop + shift
+            else:
+                return cls.range(start, stop)
+        array = _array("i")
+        for table, shift in tables:
+            if table._array is None:
+                array.extend(xrange(table._start + shift, table._stop + shift))
+            elif shift:
+                array.extend(value + shift for value in
+                             islice(table._array, table._start, table._stop))
+            else:
+                array.extend(table._array[table._start:table._stop])
+        return cls(array)
+
+    def shifted(self, shift):
+        """
+        Get the table with all indexes shifted, sharing storage.
+
+        Args:
+            shift (int): Number to add to all indexes.
+
+        """
+        return _IndexTable(self._array, self._start, self._stop, self._offset + shift)
+
+    def bisect(self, value):
+        """
+        Find the position of an index in the table.
+
+        Args:
+            value (int): Index to look for.
+
+        Returns:
+            position (int): The position of `value` in the table, or
+                where it would be inserted. This is also the number
+                of indexes in the table smaller than `value`.
+
+        """
+        value -= self._offset
+        if self._array is None:
+            return min(max(value, self._start), self._stop) - self._start
+        return bisect_left(self._array, value, self._start, self._stop) - self._start
+
+    def index(self, value):
+        position = self.bisect(value)
+        if position < len(self) and self[position] == value:
+            return position
+        raise ValueError("%s is not in the table" % value)
+
+    def __contains__(self, value):
+        position = self.bisect(value)
+        return position < len(self) and self[position] == value
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return _IndexTable(_array("i", list(self)[item]))
+            return _IndexTable(self._array, self._start + start,
+                               self._start + max(start, stop), self._offset)
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("table index out of range")
+        if self._array is None:
+            return self._start + item + self._offset
+        return self._array[self._start + item] + self._offset
+
+    def __iter__(self):
+        offset = self._offset
+        if self._array is None:
+            return iter(xrange(self._start + offset, self._stop + offset))
+        values = islice(self._array, self._start, self._stop)
+        if not offset:
+            return values
+        return (value + offset for value in values)
+
+    def __eq__(self, other):
+        try:
+            if len(self) != len(other):
+                return False
+        except TypeError:
+            return NotImplemented
+        return all(value == ovalue for value, ovalue in izip(self, other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 class ANSIMeta(type):
     """
     Many functions on ANSIString are just light wrappers around the unicode
@@ -585,7 +795,8 @@ class ANSIString(unicode):
 
         Internally, ANSIString can also passes itself precached code/character
         indexes and clean strings to avoid doing extra work when combining
-        ANSIStrings.
+        ANSIStrings. The clean string may be passed without the indexes,
+        which are then calculated when first needed.
 
         """
         string = args[0]
@@ -596,12 +807,11 @@ class ANSIString(unicode):
         code_indexes = kwargs.pop('code_indexes', None)
         char_indexes = kwargs.pop('char_indexes', None)
         clean_string = kwargs.pop('clean_string', None)
-        # All True, or All False, not just one.
-        checks = map(lambda x: x is None, [code_indexes, char_indexes, clean_string])
-        if not len(set(checks)) == 1:
-            raise ValueError("You must specify code_indexes, char_indexes, "
-                             "and clean_string together, or not at all.")
-        if not all(checks):
+        if (code_indexes is None) != (char_indexes is None) or \
+                (code_indexes is not None and clean_string is None):
+            raise ValueError("You must specify code_indexes and char_indexes "
+                             "together, and only along with clean_string.")
+        if clean_string is not None:
             decoded = True
         if not decoded:
             # Completely new ANSI String
@@ -613,8 +823,8 @@ class ANSIString(unicode):
         elif hasattr(string, '_clean_string'):
             # It's already an ANSIString
             clean_string = string._clean_string
-            code_indexes = string._code_indexes
-            char_indexes = string._char_indexes
+            code_indexes = string._code_table
+            char_indexes = string._char_table
             string = string._raw_string
         else:
             # It's a string that has been pre-ansi decoded.
@@ -626,8 +836,11 @@ class ANSIString(unicode):
         ansi_string = super(ANSIString, cls).__new__(ANSIString, to_str(clean_string), "utf-8")
         ansi_string._raw_string = string
         ansi_string._clean_string = clean_string
-        ansi_string._code_indexes = code_indexes
-        ansi_string._char_indexes = char_indexes
+        if code_indexes is not None:
+            code_indexes = _IndexTable.from_iterable(code_indexes)
+            char_indexes = _IndexTable.from_iterable(char_indexes)
+        ansi_string._code_table = code_indexes
+        ansi_string._char_table = char_indexes
         return ansi_string
 
     def __str__(self):
@@ -673,40 +886,49 @@ class ANSIString(unicode):
         The third thing to set is the _clean_string. This is a unicode object
         that is devoid of all ANSI Escapes.
 
-        Finally, _code_indexes and _char_indexes are defined. These are lookup
+        Finally, there are _code_indexes and _char_indexes. These are lookup
         tables for which characters in the raw string are related to ANSI
-        escapes, and which are for the readable text.
+        escapes, and which are for the readable text. They are only
+        calculated when first needed (many strings are never sliced) and
+        are shared between strings where possible, see _IndexTable.
 
         """
         self.parser = kwargs.pop('parser', ANSI_PARSER)
         super(ANSIString, self).__init__()
-        if self._code_indexes is None:
-            self._code_indexes, self._char_indexes = self._get_indexes()
 
-    @staticmethod
-    def _shifter(iterable, offset):
-        """
-        Takes a list of integers, and produces a new one incrementing all
-        by a number.
+    @property
+    def _code_indexes(self):
+        "Indexes of the raw string occupied by ANSI codes"
+        if self._code_table is None:
+            self._code_table, self._char_table = self._get_indexes()
+        return self._code_table
 
-        """
-        return [i + offset for i in iterable]
+    @property
+    def _char_indexes(self):
+        "Indexes of the raw string occupied by readable characters"
+        if self._char_table is None:
+            self._code_table, self._char_table = self._get_indexes()
+        return self._char_table
 
     @classmethod
-    def _adder(cls, first, second):
+    def _adder(cls, *strings):
         """
-        Joins two ANSIStrings, preserving calculated info.
+        Joins ANSIStrings, preserving calculated info.
 
         """
-
-        raw_string = first._raw_string + second._raw_string
-        clean_string = first._clean_string + second._clean_string
-        code_indexes = first._code_indexes[:]
-        char_indexes = first._char_indexes[:]
-        code_indexes.extend(
-            cls._shifter(second._code_indexes, len(first._raw_string)))
-        char_indexes.extend(
-            cls._shifter(second._char_indexes, len(first._raw_string)))
+        raw_string = u''.join(string._raw_string for string in strings)
+        clean_string = u''.join(string._clean_string for string in strings)
+        if any(string._code_table is None for string in strings):
+            # the indexes are calculated when needed
+            return ANSIString(raw_string, clean_string=clean_string)
+        shifts, shift = [], 0
+        for string in strings:
+            shifts.append(shift)
+            shift += len(string._raw_string)
+        code_indexes = _IndexTable.concatenate(
+            *[(string._code_table, shift) for string, shift in zip(strings, shifts)])
+        char_indexes = _IndexTable.concatenate(
+            *[(string._char_table, shift) for string, shift in zip(strings, shifts)])
         return ANSIString(raw_string, code_indexes=code_indexes,
                           char_indexes=char_indexes,
                           clean_string=clean_string)
@@ -758,7 +980,14 @@ class ANSIString(unicode):
         those indexes to figure out what escape characters need to be
         replayed.
 
+        For plain [x:y] slices, everything between the first and last
+        character in the raw string is kept, so the raw string can be
+        sliced directly and the index tables of the result shifted from
+        ours rather than recalculated.
+
         """
+        if slc.step in (None, 1):
+            return self._slice_contiguous(slc)
         slice_indexes = self._char_indexes[slc]
         # If it's the end of the string, we need to append final color codes.
         if not slice_indexes:
@@ -785,6 +1014,44 @@ class ANSIString(unicode):
             append_tail = ''
         return ANSIString(string + append_tail, decoded=True)
 
+    def _slice_contiguous(self, slc):
+        """
+        Slice without a step. The escapes before the slice are replayed
+        at its start, and the escapes following its last character are
+        kept, unless it is a single character in mid-string.
+
+        """
+        char_indexes = self._char_indexes
+        start, stop, _ = slc.indices(len(char_indexes))
+        if start >= stop:
+            return ANSIString('')
+        first = char_indexes[start]
+        if stop >= len(char_indexes):
+            end = len(self._raw_string)
+        elif stop - start > 1:
+            end = char_indexes[stop]
+        else:
+            end = first + 1
+        code_indexes = self._code_indexes
+        nprefix = code_indexes.bisect(first)
+        shift = nprefix - first
+        raw_string = self._get_prefix(first) + self._raw_string[first:end]
+        code_indexes = _IndexTable.concatenate(
+            (_IndexTable.range(0, nprefix), 0),
+            (code_indexes[nprefix:code_indexes.bisect(end)], shift))
+        return ANSIString(raw_string, clean_string=self._clean_string[start:stop],
+                          code_indexes=code_indexes,
+                          char_indexes=char_indexes[start:stop].shifted(shift))
+
+    def _get_prefix(self, index):
+        """
+        Get all escapes placed before an index of the raw string.
+
+        """
+        raw_string = self._raw_string
+        code_indexes = self._code_indexes
+        return u''.join(raw_string[i] for i in code_indexes[:code_indexes.bisect(index)])
+
     def __getitem__(self, item):
         """
         Gateway for slices and getting specific indexes in the ANSIString. If
@@ -797,23 +1064,18 @@ class ANSIString(unicode):
             # Slices must be handled specially.
             return self._slice(item)
         try:
-            self._char_indexes[item]
+            index = self._char_indexes[item]
         except IndexError:
             raise IndexError("ANSIString Index out of range")
         # Get character codes after the index as well.
-        if self._char_indexes[-1] == self._char_indexes[item]:
+        if self._char_indexes[-1] == index:
             append_tail = self._get_interleving(item + 1)
         else:
             append_tail = ''
-        item = self._char_indexes[item]
-
-        clean = self._raw_string[item]
-        result = ''
+        clean = self._raw_string[index]
         # Get the character they're after, and replay all escape sequences
         # previous to it.
-        for index in xrange(0, item + 1):
-            if index in self._code_indexes:
-                result += self._raw_string[index]
+        result = self._get_prefix(index)
         return ANSIString(result + clean + append_tail, decoded=True)
 
     def clean(self):
@@ -874,15 +1136,19 @@ class ANSIString(unicode):
 
         """
 
-        code_indexes = []
-        for match in self.parser.ansi_regex.finditer(self._raw_string):
-            code_indexes.extend(range(match.start(), match.end()))
+        raw_string = self._raw_string
+        code_indexes, char_indexes = _array("i"), _array("i")
+        end = 0
+        for match in self.parser.ansi_regex.finditer(raw_string):
+            # all indexes not occupied by ansi codes are normal characters
+            char_indexes.extend(xrange(end, match.start()))
+            end = match.end()
+            code_indexes.extend(xrange(match.start(), end))
         if not code_indexes:
             # Plain string, no ANSI codes.
-            return code_indexes, range(0, len(self._raw_string))
-        # all indexes not occupied by ansi codes are normal characters
-        char_indexes = [i for i in range(len(self._raw_string)) if i not in code_indexes]
-        return code_indexes, char_indexes
+            return _IndexTable.range(0, 0), _IndexTable.range(0, len(raw_string))
+        char_indexes.extend(xrange(end, len(raw_string)))
+        return _IndexTable(code_indexes), _IndexTable(char_indexes)
 
     def _get_interleving(self, index):
         """
@@ -890,20 +1156,18 @@ class ANSIString(unicode):
         character.
 
         """
+        char_indexes = self._char_indexes
         try:
-            index = self._char_indexes[index - 1]
+            start = char_indexes[index - 1]
         except IndexError:
             return ''
-        s = ''
-        while True:
-            index += 1
-            if index in self._char_indexes:
-                break
-            elif index in self._code_indexes:
-                s += self._raw_string[index]
-            else:
-                break
-        return s
+        # everything up to the next character is code
+        position = char_indexes.bisect(start) + 1
+        if position < len(char_indexes):
+            end = char_indexes[position]
+        else:
+            end = len(self._raw_string)
+        return self._raw_string[start + 1:end]
 
     def split(self, by, maxsplit=-1):
         """
@@ -941,13 +1205,13 @@ class ANSIString(unicode):
             return NotImplemented
         raw_string = self._raw_string * other
         clean_string = self._clean_string * other
-        code_indexes = self._code_indexes[:]
-        char_indexes = self._char_indexes[:]
-        for i in range(1, other + 1):
-            code_indexes.extend(
-                self._shifter(self._code_indexes, i * len(self._raw_string)))
-            char_indexes.extend(
-                self._shifter(self._char_indexes, i * len(self._raw_string)))
+        if self._code_table is None:
+            return ANSIString(raw_string, clean_string=clean_string)
+        length = len(self._raw_string)
+        code_indexes = _IndexTable.concatenate(
+            *[(self._code_table, i * length) for i in xrange(other)])
+        char_indexes = _IndexTable.concatenate(
+            *[(self._char_table, i * length) for i in xrange(other)])
         return ANSIString(
             raw_string, code_indexes=code_indexes, char_indexes=char_indexes,
             clean_string=clean_string)
@@ -988,16 +1252,17 @@ class ANSIString(unicode):
         Joins together strings in an iterable.
 
         """
-        result = ANSIString('')
-        last_item = None
+        separator = ANSIString(self._raw_string)
+        items = []
         for item in iterable:
-            if last_item is not None:
-                result += self._raw_string
+            if items:
+                items.append(separator)
             if not isinstance(item, ANSIString):
                 item = ANSIString(item)
-            result += item
-            last_item = item
-        return result
+            items.append(item)
+        if not items:
+            return ANSIString('')
+        return self._adder(*items)
 
     def _filler(self, char, amount):
         """
@@ -1008,8 +1273,8 @@ class ANSIString(unicode):
         if not isinstance(char, ANSIString):
             line = char * amount
             return ANSIString(
-                char * amount, code_indexes=[], char_indexes=range(0, len(line)),
-                clean_string=char)
+                line, code_indexes=_IndexTable.range(0, 0),
+                char_indexes=_IndexTable.range(0, len(line)), clean_string=line)
         try:
             start = char._code_indexes[0]
         except IndexError:
@@ -1018,10 +1283,11 @@ class ANSIString(unicode):
         prefix = char._raw_string[start:end]
         postfix = char._raw_string[end + 1:]
         line = char._clean_string * amount
-        code_indexes = [i for i in range(0, len(prefix))]
         length = len(prefix) + len(line)
-        code_indexes.extend([i for i in range(length, length + len(postfix))])
-        char_indexes = self._shifter(xrange(0, len(line)), len(prefix))
+        code_indexes = _IndexTable.concatenate(
+            (_IndexTable.range(0, len(prefix)), 0),
+            (_IndexTable.range(length, length + len(postfix)), 0))
+        char_indexes = _IndexTable.range(len(prefix), length)
         raw_string = prefix + line + postfix
         return ANSIString(
             raw_string, clean_string=line, char_indexes=char_indexes,
@@ -1036,8 +1302,7 @@ class ANSIString(unicode):
         remainder = difference % 2
         difference /= 2
         spacing = self._filler(fillchar, difference)
-        result = spacing + self + spacing + self._filler(fillchar, remainder)
-        return result
+        return self._adder(spacing, self, spacing, self._filler(fillchar, remainder))
 
     @_spacing_preflight
     def ljust(self, width, fillchar, difference):
@@ -25,6 +25,8 @@ try:
     from cPickle import dumps, loads
 except ImportError:
     from pickle import dumps, loads
+from twisted.internet import reactor
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.contenttypes.models import ContentType
 from evennia.server.models import ServerConfig
@@ -42,6 +44,9 @@ _SA = object.__setattr__
 _FROM_MODEL_MAP = None
 _TO_MODEL_MAP = None
 _IS_PACKED_DBOBJ = lambda o: type(o) == tuple and len(o) == 4 and o[0] == '__packed_dbobj__'
+_BATCH_SAVE = settings.ATTRIBUTE_BATCH_SAVE
+# max number of ids per query when unpacking many dbobjs
+_UNPACK_CHUNK_SIZE = 500
 if uses_database("mysql") and ServerConfig.objects.get_mysql_db_version() < '5.6.4':
     # mysql <5.6.4 don't support millisecond precision
     _DATESTRING = "%Y:%m:%d-%H:%M:%S:000000"
@@ -78,6 +83,92 @@ def _init_globals():
         _TO_MODEL_MAP = defaultdict(str)
         _TO_MODEL_MAP.update(dict((c.natural_key(), c.model_class()) for c in ContentType.objects.all()))
 
+#
+# Batched saving of updated _Saver* mutables
+#
+
+# dirty roots waiting to be saved, keyed by their db_obj
+_DIRTY_ROOTS = {}
+_FLUSH_SCHEDULED = [False]
+
+
+def _scheduled_flush():
+    "Called by the reactor to flush the roots dirtied since last time"
+    _FLUSH_SCHEDULED[0] = False
+    flush_dirty()
+
+
+def _mark_dirty(root):
+    """
+    Register a root _Saver* mutable as changed, to be saved to its
+    db_obj at the next flush.
+
+    """
+    _DIRTY_ROOTS[root._db_obj] = root
+    if not _FLUSH_SCHEDULED[0]:
+        _FLUSH_SCHEDULED[0] = True
+        reactor.callLater(0, _scheduled_flush)
+
+
+def get_dirty_root(db_obj):
+    """
+    Get the changed but not yet saved value of a db_obj.
+
+    Args:
+        db_obj (Attribute): The object holding the value.
+
+    Returns:
+        root (_SaverList, _SaverDict, _SaverSet or None): The
+            unsaved root mutable, or `None` if nothing is pending.
+
+    """
+    return _DIRTY_ROOTS.get(db_obj)
+
+
+def discard_dirty_root(db_obj):
+    """
+    Forget a pending save, used when a new value is assigned to the
+    db_obj directly.
+
+    Args:
+        db_obj (Attribute): The object holding the value.
+
+    """
+    _DIRTY_ROOTS.pop(db_obj, None)
+
+
+def flush_dirty(db_objs=None):
+    """
+    Save the root mutables changed since the last flush. This is only
+    relevant if `settings.ATTRIBUTE_BATCH_SAVE` is set. It is called
+    by the reactor soon after a change, after each command and before
+    the server reloads or shuts down.
+
+    Args:
+        db_objs (list, optional): Only flush the values of these objects
+            (normally Attributes). If not given, flush everything.
+
+    Returns:
+        nflushed (int): The number of values saved.
+
+    """
+    if db_objs is None:
+        dirty = _DIRTY_ROOTS.items()
+        _DIRTY_ROOTS.clear()
+    else:
+        dirty = [(db_obj, _DIRTY_ROOTS.pop(db_obj)) for db_obj in db_objs
+                 if db_obj in _DIRTY_ROOTS]
+    nflushed = 0
+    for db_obj, root in dirty:
+        if getattr(db_obj, "_is_deleted", False) or db_obj.pk is None:
+            continue
+        try:
+            db_obj.value = root
+            nflushed += 1
+        except Exception:
+            logger.log_trace()
+    return nflushed
+
 #
 # SaverList, SaverDict, SaverSet - Attribute-specific helper classes and functions
 #
@@ -107,11 +198,17 @@ class _SaverMutable(object):
         self._data = None
 
     def _save_tree(self):
-        "recursively traverse back up the tree, save when we reach the root"
+        """
+        recursively traverse back up the tree, save when we reach the
+        root (or mark the root for saving later, in batch-save mode)
+        """
         if self._parent:
             self._parent._save_tree()
         elif self._db_obj:
-            self._db_obj.value = self
+            if _BATCH_SAVE:
+                _mark_dirty(self)
+            else:
+                self._db_obj.value = self
         else:
             logger.log_errmsg("_SaverMutable %s has no root Attribute to save to." % self)
 
@@ -233,6 +330,30 @@ def pack_dbobj(item):
                              _TO_DATESTRING(obj), _GA(obj, "id")) or item
 
 
+def has_packed_dbobj(data):
+    """
+    Check if a to_pickle'd structure references any database objects.
+
+    Args:
+        data (any): Data as returned from `to_pickle`.
+
+    Returns:
+        result (bool): If any packed database objects were found.
+
+    """
+    if _IS_PACKED_DBOBJ(data):
+        return True
+    dtype = type(data)
+    if dtype in (basestring, int, long, float, bool):
+        return False
+    elif dtype == dict:
+        return any(has_packed_dbobj(key) or has_packed_dbobj(val)
+                   for key, val in data.items())
+    elif hasattr(data, '__iter__'):
+        return any(has_packed_dbobj(val) for val in data)
+    return False
+
+
 def unpack_dbobj(item):
     """
     Check and convert internal representations back to Django database
@@ -257,6 +378,34 @@ def unpack_dbobj(item):
     # databases may 're-use' the id)
     return _TO_DATESTRING(obj) == item[2] and obj or None
 
+
+def unpack_dbobjs(items):
+    """
+    Convert many internal representations back to database models
+    at once. The models are loaded with one query per model type (or
+    one per few hundred objects) rather than one query each.
+
+    Args:
+        items (list): Packed dbobjs, as created by `pack_dbobj`.
+
+    Returns:
+        unpacked (list): The unpacked items, in order. See `unpack_dbobj`.
+
+    """
+    _init_globals()
+    ids = defaultdict(set)
+    for item in items:
+        if item[3]:
+            ids[item[1]].add(item[3])
+    for natural_key, objids in ids.items():
+        # loading the objects puts them in the idmapper cache, where
+        # unpack_dbobj finds them
+        manager = _TO_MODEL_MAP[natural_key].objects
+        objids = list(objids)
+        for istart in range(0, len(objids), _UNPACK_CHUNK_SIZE):
+            list(manager.filter(id__in=objids[istart:istart + _UNPACK_CHUNK_SIZE]))
+    return [unpack_dbobj(item) for item in items]
+
 #
 # Access methods
 #
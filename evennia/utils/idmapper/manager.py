@@ -3,11 +3,28 @@ IDmapper extension to the default manager.
 """
 from django.db.models.manager import Manager
 
+_WRITE_BEHIND_QUEUE = None
+_FLUSH_WRITE_BEHIND = None
+
 class SharedMemoryManager(Manager):
     # CL: this ensures our manager is used when accessing instances via
     # ForeignKey etc. (see docs)
     use_for_related_fields = True
 
+    def get_queryset(self):
+        """
+        Make sure saves waiting in the write-behind queue are stored
+        before the database is queried.
+
+        """
+        global _WRITE_BEHIND_QUEUE, _FLUSH_WRITE_BEHIND
+        if _WRITE_BEHIND_QUEUE is None:
+            from evennia.utils.idmapper.models import _WRITE_BEHIND_QUEUE, \
+                    flush_write_behind as _FLUSH_WRITE_BEHIND
+        if _WRITE_BEHIND_QUEUE:
+            _FLUSH_WRITE_BEHIND()
+        return super(SharedMemoryManager, self).get_queryset()
+
     # TODO: improve on this implementation
     # We need a way to handle reverse lookups so that this model can
     # still use the singleton cache, but the active model isn't required
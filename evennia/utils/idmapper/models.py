@@ -7,11 +7,16 @@ leave caching unexpectedly (no use of WeakRefs).
 Also adds `cache_size()` for monitoring the size of the cache.
 """
 
-import os, threading, gc, time
+import os, threading, gc, time, heapq
+from itertools import count
 #from twisted.internet import reactor
 #from twisted.internet.threads import blockingCallFromThread
+from collections import OrderedDict
 from weakref import WeakValueDictionary
+from twisted.internet import reactor
 from twisted.internet.reactor import callFromThread
+from django.conf import settings
+from django.db import transaction
 from django.core.exceptions import ObjectDoesNotExist, FieldError
 from django.db.models.signals import post_save
 from django.db.models.base import Model, ModelBase
@@ -23,6 +28,9 @@ from manager import SharedMemoryManager
 
 AUTO_FLUSH_MIN_INTERVAL = 60.0 * 5 # at least 5 mins between cache flushes
 
+# access counter used to track how recently cached instances were used
+_ACCESS_COUNTER = count()
+
 _GA = object.__getattribute__
 _SA = object.__setattr__
 _DA = object.__delattr__
@@ -41,6 +49,14 @@ _SERVER_PID, _PORTAL_PID = get_evennia_pids()
 _IS_SUBPROCESS = (_SERVER_PID and _PORTAL_PID) and not _SELF_PID in (_SERVER_PID, _PORTAL_PID)
 _IS_MAIN_THREAD = threading.currentThread().getName() == "MainThread"
 
+# Write-behind queue. Field-limited saves are merged per database row
+# here and stored together in one transaction after a short delay.
+_WRITE_BEHIND_INTERVAL = settings.IDMAPPER_WRITE_BEHIND_INTERVAL
+_WRITE_BEHIND_QUEUE = OrderedDict()
+_WRITE_BEHIND_FLUSH = [None, None]  # [delayed call, time of first queued save]
+_WRITE_BEHIND_STATS = {"queued": 0, "merged": 0, "flushes": 0, "rows": 0,
+                       "last_latency": 0.0, "max_latency": 0.0}
+
 class SharedMemoryModelBase(ModelBase):
     # CL: upstream had a __new__ method that skipped ModelBase's __new__ if
     # SharedMemoryModelBase was not in the model class's ancestors. It's not
@@ -85,6 +101,8 @@ class SharedMemoryModelBase(ModelBase):
         if not hasattr(dbmodel, "__instance_cache__"):
             # we store __instance_cache__ only on the dbmodel base
             dbmodel.__instance_cache__ = {}
+            # hits, misses, evictions
+            dbmodel.__cache_stats__ = [0, 0, 0]
         super(SharedMemoryModelBase, cls)._prepare()
 
     def __new__(cls, name, bases, attrs):
@@ -260,7 +278,14 @@ class SharedMemoryModel(Model):
         done even when instance caching is disabled.
 
         """
-        return cls.__dbclass__.__instance_cache__.get(id)
+        dbclass = cls.__dbclass__
+        instance = dbclass.__instance_cache__.get(id)
+        if instance is None:
+            dbclass.__cache_stats__[1] += 1
+        else:
+            dbclass.__cache_stats__[0] += 1
+            _SA(instance, "_idmapper_last_access", next(_ACCESS_COUNTER))
+        return instance
 
     @classmethod
     def cache_instance(cls, instance, new=False):
@@ -277,6 +302,7 @@ class SharedMemoryModel(Model):
         pk = instance._get_pk_val()
         if pk is not None:
             cls.__dbclass__.__instance_cache__[pk] = instance
+            _SA(instance, "_idmapper_last_access", next(_ACCESS_COUNTER))
             if new:
                 try:
                     # trigger the at_init hook only
@@ -356,6 +382,7 @@ class SharedMemoryModel(Model):
 
         """
         self.flush_from_cache()
+        _WRITE_BEHIND_QUEUE.pop((self.__class__.__dbclass__, self._get_pk_val()), None)
         self._is_deleted = True
         super(SharedMemoryModel, self).delete(*args, **kwargs)
 
@@ -380,7 +407,8 @@ class SharedMemoryModel(Model):
 
         if _IS_MAIN_THREAD:
             # in main thread - normal operation
-            super(SharedMemoryModel, self).save(*args, **kwargs)
+            if not _queue_write_behind(self, args, kwargs):
+                super(SharedMemoryModel, self).save(*args, **kwargs)
         else:
             # in another thread; make sure to save in reactor thread
             def _save_callback(cls, *args, **kwargs):
@@ -410,6 +438,103 @@ class SharedMemoryModel(Model):
                 _GA(self, fieldtracker)(fieldname)
 
 
+def _queue_write_behind(instance, args, kwargs):
+    """
+    Put a field-limited save in the write-behind queue, merging it
+    with eventual pending saves of the same database row.
+
+    Args:
+        instance (SharedMemoryModel): The instance being saved.
+        args (tuple): Positional arguments to `save`.
+        kwargs (dict): Keyword arguments to `save`.
+
+    Returns:
+        queued (bool): If the save was queued. If not, the caller
+            must save directly.
+
+    """
+    if not _WRITE_BEHIND_INTERVAL or _IS_SUBPROCESS:
+        return False
+    qkey = (instance.__class__.__dbclass__, instance._get_pk_val())
+    if args or kwargs.keys() != ["update_fields"] or not kwargs["update_fields"] or qkey[1] is None:
+        # only plain field updates of existing rows are deferred.
+        pending = _WRITE_BEHIND_QUEUE.pop(qkey, None)
+        if pending and (args or kwargs.get("update_fields") is not None):
+            # this save does not include all fields, so store the
+            # pending ones first
+            super(SharedMemoryModel, pending[0]).save(update_fields=list(pending[1]))
+        return False
+    pending = _WRITE_BEHIND_QUEUE.get(qkey)
+    if pending:
+        _WRITE_BEHIND_STATS["merged"] += 1
+        pending[1].update(kwargs["update_fields"])
+    else:
+        _WRITE_BEHIND_QUEUE[qkey] = (instance, set(kwargs["update_fields"]))
+    _WRITE_BEHIND_STATS["queued"] += 1
+    if not _WRITE_BEHIND_FLUSH[0]:
+        _WRITE_BEHIND_FLUSH[0] = reactor.callLater(_WRITE_BEHIND_INTERVAL, flush_write_behind)
+        _WRITE_BEHIND_FLUSH[1] = time.time()
+    return True
+
+
+def flush_write_behind():
+    """
+    Store all saves waiting in the write-behind queue to the database,
+    in a single transaction. This is called automatically after
+    `settings.IDMAPPER_WRITE_BEHIND_INTERVAL` seconds, before
+    querying a SharedMemoryModel through its manager and when the
+    server stops or reloads. Call it before querying the changed rows
+    in other ways, such as with raw SQL.
+
+    Returns:
+        nrows (int): The number of database rows stored.
+
+    """
+    delayed, tqueued = _WRITE_BEHIND_FLUSH
+    _WRITE_BEHIND_FLUSH[0] = _WRITE_BEHIND_FLUSH[1] = None
+    if delayed and delayed.active():
+        delayed.cancel()
+    if not _WRITE_BEHIND_QUEUE:
+        return 0
+    pending = _WRITE_BEHIND_QUEUE.values()
+    _WRITE_BEHIND_QUEUE.clear()
+    nrows = 0
+    with transaction.atomic():
+        for instance, fields in pending:
+            if getattr(instance, "_is_deleted", False):
+                continue
+            try:
+                with transaction.atomic():
+                    super(SharedMemoryModel, instance).save(update_fields=list(fields))
+                nrows += 1
+            except Exception:
+                logger.log_trace("write-behind save of %r failed." % instance)
+    if tqueued:
+        latency = time.time() - tqueued
+        _WRITE_BEHIND_STATS["last_latency"] = latency
+        _WRITE_BEHIND_STATS["max_latency"] = max(latency, _WRITE_BEHIND_STATS["max_latency"])
+    _WRITE_BEHIND_STATS["flushes"] += 1
+    _WRITE_BEHIND_STATS["rows"] += nrows
+    return nrows
+
+
+def write_behind_stats():
+    """
+    Get statistics for the write-behind queue.
+
+    Returns:
+        stats (dict): Contains `pending` (rows waiting to be saved),
+            `queued` (total saves queued), `merged` (saves merged into an
+            already pending row), `flushes`, `rows` (total rows stored),
+            `last_latency` and `max_latency` (seconds from the first save
+            of a batch being queued until it was stored).
+
+    """
+    stats = dict(_WRITE_BEHIND_STATS)
+    stats["pending"] = len(_WRITE_BEHIND_QUEUE)
+    return stats
+
+
 class WeakSharedMemoryModelBase(SharedMemoryModelBase):
     """
     Uses a WeakValue dictionary for caching instead of a regular one.
@@ -484,10 +609,96 @@ def update_cached_instance(sender, instance, **kwargs):
 post_save.connect(update_cached_instance)
 
 
+def _get_rss():
+    """
+    Get the resident memory of the current process without
+    spawning a subprocess.
+
+    Returns:
+        rss (float or None): Resident memory in MB, or `None` if this
+            could not be determined on this platform.
+
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1000.0 * 1000.0)
+    except (IOError, OSError, IndexError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        return None
+    # this is the peak rather than current memory usage; kB on Linux
+    # but bytes on OSX
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if os.uname()[0] == "Darwin":
+        maxrss /= 1000.0
+    return maxrss / 1000.0
+
+
+def _dbclasses():
+    """
+    Get all database models using the idmapper cache (proxy models
+    share the cache of their database model).
+
+    Returns:
+        dbclasses (set): The database models.
+
+    """
+    dbclasses = set()
+    def get_recurse(submodels):
+        for submodel in submodels:
+            if hasattr(submodel, "__dbclass__"):
+                dbclasses.add(submodel.__dbclass__)
+            get_recurse(submodel.__subclasses__())
+    get_recurse(SharedMemoryModel.__subclasses__())
+    return dbclasses
+
+
+def evict_cache(nkeep):
+    """
+    Evict the least recently used instances from the idmapper cache
+    until at most `nkeep` instances remain. Instances with recache
+    protection are never evicted.
+
+    Args:
+        nkeep (int): The number of instances to keep in the cache.
+
+    Returns:
+        nevicted (int): The number of instances evicted.
+
+    """
+    candidates = []
+    ncache = 0
+    for dbclass in _dbclasses():
+        for pk, instance in dbclass.__instance_cache__.items():
+            ncache += 1
+            if not instance._idmapper_recache_protection:
+                candidates.append((getattr(instance, "_idmapper_last_access", -1), dbclass, pk))
+    nevict = ncache - max(nkeep, 0)
+    if nevict <= 0:
+        return 0
+    evicted = heapq.nsmallest(nevict, candidates, key=lambda tup: tup[0])
+    for _, dbclass, pk in evicted:
+        dbclass.__instance_cache__.pop(pk, None)
+        dbclass.__cache_stats__[2] += 1
+    gc.collect()
+    return len(evicted)
+
+
 LAST_FLUSH = None
+_CACHE_TARGET = [None]
 def conditional_flush(max_rmem, force=False):
     """
-    Flush the cache if the estimated memory usage exceeds `max_rmem`.
+    Shrink the cache if the memory usage exceeds `max_rmem`.
+
+    When the resident memory of the process is within 10% of
+    `max_rmem`, the least recently used instances are evicted. The
+    cache is shrunk in proportion to how much memory must be freed.
+    Since Python will not necessarily return freed memory to the OS,
+    later calls will only evict again if the cache has grown past the
+    size it had after the last eviction.
 
     The flusher has a timeout to avoid flushing over and over
     in particular situations (this means that for some setups
@@ -495,64 +706,51 @@ def conditional_flush(max_rmem, force=False):
     more memory is probably required for the given game).
 
     Args:
-        max_rmem (int): memory-usage estimation-treshold after which
-            cache is flushed.
+        max_rmem (int): memory-usage treshold (in MB) after which
+            the cache is shrunk.
         force (bool, optional): forces a flush, regardless of timeout.
             Defaults to `False`.
 
+    Returns:
+        nevicted (int): The number of evicted instances.
+
     """
     global LAST_FLUSH
 
-    def mem2cachesize(desired_rmem):
-        """
-        Estimate the size of the idmapper cache based on the memory
-        desired. This is used to optionally cap the cache size.
-
-        desired_rmem - memory in MB (minimum 50MB)
-
-        The formula is empirically estimated from usage tests (Linux)
-        and is
-            Ncache = RMEM - 35.0 / 0.0157
-        where RMEM is given in MB and Ncache is the size of the cache
-        for this memory usage. VMEM tends to be about 100MB higher
-        than RMEM for large memory usage.
-        """
-        vmem = max(desired_rmem, 50.0)
-        Ncache = int(abs(float(vmem) - 35.0) / 0.0157)
-        return Ncache
-
     if not max_rmem:
         # auto-flush is disabled
-        return
+        return 0
 
     now = time.time()
     if not LAST_FLUSH:
         # server is just starting
         LAST_FLUSH = now
-        return
+        return 0
 
     if ((now - LAST_FLUSH) < AUTO_FLUSH_MIN_INTERVAL) and not force:
         # too soon after last flush.
         logger.log_warnmsg("Warning: Idmapper flush called more than "\
                             "once in %s min interval. Check memory usage." % (AUTO_FLUSH_MIN_INTERVAL/60.0))
-        return
+        return 0
 
-    if os.name == "nt":
-        # we can't look for mem info in Windows at the moment
-        return
+    actual_rmem = _get_rss()
+    if actual_rmem is None or actual_rmem <= max_rmem * 0.9:
+        return 0
 
-    # check actual memory usage
-    Ncache_max = mem2cachesize(max_rmem)
     Ncache, _ = cache_size()
-    actual_rmem = float(os.popen('ps -p %d -o %s | tail -1' % (os.getpid(), "rss")).read()) / 1000.0  # resident memory
-
-    if Ncache >= Ncache_max and actual_rmem > max_rmem * 0.9:
-        # flush cache when number of objects in cache is big enough and our
-        # actual memory use is within 10% of our set max
-        flush_cache()
-        LAST_FLUSH = now
-
-def cache_size(mb=True):
+    target = _CACHE_TARGET[0]
+    if target is None or force:
+        # assume the memory use scales with the cache size
+        target = int(Ncache * max_rmem * 0.8 / actual_rmem)
+    if Ncache <= target:
+        return 0
+    nevicted = evict_cache(target)
+    _CACHE_TARGET[0] = target
+    LAST_FLUSH = now
+    return nevicted
+
+
+def cache_size(mb=True, stats=False):
     """
     Calculate statistics about the cache.
 
@@ -563,20 +761,29 @@ def cache_size(mb=True):
     Python is clearly reusing memory behind the scenes that we cannot
     catch in an easy way here.  Ideas are appreciated. /Griatch
 
+    Args:
+        mb (bool, optional): Unused.
+        stats (bool, optional): Also return access statistics.
+
     Returns:
-      total_num, {objclass:total_num, ...}
+      total_num, {objclass:total_num, ...}: If `stats` is not set.
+      total_num, {objclass:total_num, ...}, {dbclass:{"size":int, "hits":int,
+        "misses":int, "evictions":int}, ...}: If `stats` is set.
 
     """
-    numtotal = [0] # use mutable to keep reference through recursion
+    numtotal = 0
     classdict = {}
-    def get_recurse(submodels):
-        for submodel in submodels:
-            subclasses = submodel.__subclasses__()
-            if not subclasses:
-                num = len(submodel.get_all_cached_instances())
-                numtotal[0] += num
-                classdict[submodel.__name__] = num
-            else:
-                get_recurse(subclasses)
-    get_recurse(SharedMemoryModel.__subclasses__())
-    return numtotal[0], classdict
+    dbstats = {}
+    for dbclass in _dbclasses():
+        instances = dbclass.__instance_cache__.values()
+        numtotal += len(instances)
+        for instance in instances:
+            name = instance.__class__.__name__
+            classdict[name] = classdict.get(name, 0) + 1
+        if stats:
+            hits, misses, evictions = dbclass.__cache_stats__
+            dbstats[dbclass.__name__] = {"size": len(instances), "hits": hits,
+                                         "misses": misses, "evictions": evictions}
+    if stats:
+        return numtotal, classdict, dbstats
+    return numtotal, classdict
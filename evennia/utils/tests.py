@@ -150,6 +150,34 @@ class ANSIStringTestCase(TestCase):
         ]
         self.table_check(c, char_table, code_table)
 
+    def test_index_tables(self):
+        """
+        Verify the index tables are calculated lazily and shared by slices.
+        """
+        a = ANSIString("{rTest{n String")
+        self.assertIsNone(a._code_table)
+        b = a[2:8]
+        self.assertIs(b._char_indexes._array, a._char_indexes._array)
+        self.assertEqual(b, u"st Str")
+        self.table_check(b, [9, 10, 15, 16, 17, 18], range(0, 9) + [11, 12, 13, 14])
+        c = ANSIString("{rab{n") * 2
+        self.checker(c, u'\x1b[1m\x1b[31mab\x1b[0m\x1b[1m\x1b[31mab\x1b[0m', u'abab')
+        self.table_check(c, [9, 10, 24, 25], range(0, 9) + range(11, 24) + range(26, 30))
+
+
+class TestParseAnsi(TestCase):
+    def test_parse_ansi(self):
+        from .ansi import parse_ansi, ANSI_HILITE, ANSI_RED, ANSI_NORMAL, ANSI_BACK_RED
+        self.assertEqual(ANSI_HILITE + ANSI_RED + "Red" + ANSI_NORMAL, parse_ansi("{rRed{n"))
+        self.assertEqual("{r is red", parse_ansi("{{r is red"))
+        self.assertEqual("\033[48;5;196mBright", parse_ansi("{[rBright", xterm256=True))
+        self.assertEqual(ANSI_BACK_RED + "Bright", parse_ansi("{[rBright"))
+        self.assertEqual("A\r\nB look", parse_ansi("{rA{/B {lclook{ltlook{le", strip_ansi=True))
+        self.assertEqual("{lclook{ltlook{le", parse_ansi("{lclook{ltlook{le", mxp=True))
+        # backslashes are kept as they are, and do not escape markup
+        self.assertEqual("C:\\\\dir\\file", parse_ansi("C:\\\\dir\\file"))
+        self.assertEqual("\\" + ANSI_HILITE + ANSI_RED + "Red", parse_ansi("\\{rRed"))
+
 
 class TestIsIter(TestCase):
     def test_is_iter(self):
@@ -229,3 +257,19 @@ class TestMLen(TestCase):
 
     def test_dict(self):
         self.assertEqual(utils.m_len({'hello': True, 'Goodbye': False}), 2)
+
+
+class TestLRUCache(TestCase):
+    def test_eviction(self):
+        evicted = []
+        cache = utils.LRUCache(maxsize=2, on_evict=lambda key, val: evicted.append(key))
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(1, cache.get("a"))
+        cache.set("c", 3)
+        # "b" was least recently used
+        self.assertEqual(["b"], evicted)
+        self.assertEqual(None, cache.get("b"))
+        self.assertEqual(3, cache.get("c"))
+        self.assertEqual({"size": 2, "maxsize": 2, "hits": 2, "misses": 1, "evictions": 1},
+                         cache.stats())
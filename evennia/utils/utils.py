@@ -17,7 +17,7 @@ import random
 import traceback
 from importlib import import_module
 from inspect import ismodule, trace
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from twisted.internet import threads, defer, reactor
 from django.conf import settings
 from django.utils import timezone
@@ -1438,6 +1438,114 @@ class lazy_property(object):
         obj.__dict__[self.__name__] = value
         return value
 
+class LRUCache(object):
+    """
+    A size-bounded mapping that discards its least recently used
+    entries once it grows beyond its maximum size. It keeps count of
+    its hits, misses and evictions so that its efficiency can be
+    inspected at run-time.
+
+    """
+    def __init__(self, maxsize=1000, on_evict=None):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int, optional): The maximum number of entries to
+                hold. If `None` or <= 0, the cache is unbounded.
+            on_evict (callable, optional): Called as `on_evict(key, value)`
+                whenever an entry is evicted to make room for a new one.
+
+        """
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self._storage = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._storage)
+
+    def __contains__(self, key):
+        return key in self._storage
+
+    def get(self, key, default=None):
+        """
+        Get an entry from the cache, marking it as recently used.
+
+        Args:
+            key (hashable): The key to look up.
+            default (any, optional): Returned on a cache miss.
+
+        Returns:
+            value (any): The cached value or `default`.
+
+        """
+        storage = self._storage
+        try:
+            value = storage.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        storage[key] = value
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """
+        Store an entry in the cache, evicting the least recently used
+        entries if the cache is full.
+
+        Args:
+            key (hashable): The key to store under.
+            value (any): The value to cache.
+
+        """
+        storage = self._storage
+        storage.pop(key, None)
+        storage[key] = value
+        if self.maxsize and self.maxsize > 0:
+            while len(storage) > self.maxsize:
+                oldkey, oldvalue = storage.popitem(last=False)
+                self.evictions += 1
+                if self.on_evict:
+                    self.on_evict(oldkey, oldvalue)
+
+    def pop(self, key, default=None):
+        """
+        Remove an entry from the cache without counting it as an eviction.
+
+        Args:
+            key (hashable): The key to remove.
+            default (any, optional): Returned if key is not cached.
+
+        Returns:
+            value (any): The removed value or `default`.
+
+        """
+        return self._storage.pop(key, default)
+
+    def clear(self):
+        """
+        Empty the cache. The statistics counters are not reset.
+
+        """
+        self._storage.clear()
+
+    def stats(self):
+        """
+        Get the efficiency statistics of the cache.
+
+        Returns:
+            stats (dict): The current `size`, `maxsize` and the number
+                of `hits`, `misses` and `evictions` so far.
+
+        """
+        return {"size": len(self._storage), "maxsize": self.maxsize,
+                "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
 _STRIP_ANSI = None
 _RE_CONTROL_CHAR = re.compile('[%s]' % re.escape(''.join([unichr(c) for c in range(0,32)])))# + range(127,160)])))
 def strip_control_sequences(string):